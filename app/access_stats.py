@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+from pywebio.output import put_buttons, put_markdown, put_scope, put_table, use_scope
+
+from data.access_stats import get_access_stats
+from data.token import Token
+from utils.exceptions import TokenNotExistError
+from utils.login import require_login
+from utils.page import get_token, set_token
+from widgets.toast import toast_error_and_return
+
+NAME: str = "访问统计"
+DESC: str = "查看各页面的访问量与独立 IP 数"
+VISIBILITY: bool = False
+
+TIME_RANGES = {
+    "1 小时": timedelta(hours=1),
+    "24 小时": timedelta(days=1),
+    "7 天": timedelta(days=7),
+    "30 天": timedelta(days=30),
+}
+
+
+def put_access_stats_table(time_range_name: str) -> None:
+    stats = get_access_stats(datetime.now() - TIME_RANGES[time_range_name])
+
+    with use_scope("access_stats", clear=True):
+        put_markdown(f"## {time_range_name}")
+        if not stats:
+            put_markdown("暂无访问数据")
+            return
+
+        put_table(
+            [
+                [
+                    item["module"],
+                    item["count"],
+                    item["unique_ip_count"],
+                    item["logged_in_count"],
+                    item["anonymous_count"],
+                    " / ".join(
+                        f"{protocol}：{count}"
+                        for protocol, count in sorted(item["protocol_count"].items())
+                    ),
+                ]
+                for item in stats
+            ],
+            header=["模块", "访问次数", "独立 IP（估计）", "已登录", "未登录", "协议"],
+        )
+
+
+def access_stats() -> None:
+    try:
+        user = Token.from_token_value(get_token()).user
+    except TokenNotExistError:
+        user = require_login()
+        token = user.generate_token()
+        set_token(token.value)
+
+    if user.permission_admin <= 0:
+        toast_error_and_return("您没有查看访问统计的权限")
+
+    put_markdown("# 访问统计")
+    put_buttons(
+        list(TIME_RANGES.keys()),
+        onclick=put_access_stats_table,
+    )
+    put_scope("access_stats")
+    put_access_stats_table("24 小时")
@@ -1,6 +1,8 @@
-import pyecharts.options as opts
+from typing import Literal
+
 from pywebio.output import put_html, put_markdown, put_tabs
 
+from data.ohlc import get_ohlc
 from data.overview import (
     get_24h_traded_FTN_avg_price,
     get_finished_orders_count,
@@ -10,7 +12,7 @@ from data.overview import (
     get_total_traded_amount,
     get_total_traded_price,
 )
-from utils.chart import single_line_chart
+from utils.chart import candlestick_chart, single_line_chart
 from widgets.trade import put_trade_item
 
 NAME: str = "数据概览"
@@ -18,6 +20,25 @@ DESC: str = "查看价格走势、成交量等信息"
 VISIBILITY: bool = True
 
 
+def get_ohlc_chart(trade_type: Literal["buy", "sell"]):
+    # 每小时一根 K 线，叠加成交量加权平均价
+    ohlc = get_ohlc(trade_type, 3600, 72)
+    if not ohlc:
+        return put_markdown("72 小时内暂无成交")
+
+    return put_html(
+        candlestick_chart(
+            [item["time"] for item in ohlc],
+            [[item["open"], item["high"], item["low"], item["close"]] for item in ohlc],
+            "K 线",
+            [item["vwap"] for item in ohlc],
+            "成交量加权平均价",
+            {},
+            in_tab=True,
+        )
+    )
+
+
 def data_overview() -> None:
     put_markdown("# 数据概览")
 
@@ -33,10 +54,10 @@ def data_overview() -> None:
     put_markdown("## 24 小时交易价格")
     per_hour_buy_avg_price = get_per_hour_trade_avg_price("buy", 24)
     per_hour_sell_avg_price = get_per_hour_trade_avg_price("sell", 24)
-    buy_x = [str(item["_id"]) for item in per_hour_buy_avg_price]
+    buy_x = [item["_id"] for item in per_hour_buy_avg_price]
     buy_y = [item["avg_price"] for item in per_hour_buy_avg_price]
-    sell_x = [str(item["_id"]) for item in per_hour_sell_avg_price]
-    sell_y = [str(item["avg_price"]) for item in per_hour_sell_avg_price]
+    sell_x = [item["_id"] for item in per_hour_sell_avg_price]
+    sell_y = [item["avg_price"] for item in per_hour_sell_avg_price]
     put_tabs(
         [
             {
@@ -47,8 +68,8 @@ def data_overview() -> None:
                         buy_y,
                         "24 小时买单价格",
                         {
-                            "yaxis_opts": opts.AxisOpts(min_=0.08, max_=0.12),
-                            "legend_opts": opts.LegendOpts(is_show=False),
+                            "yAxis": {"min": 0.08, "max": 0.12},
+                            "legend": {"show": False},
                         },
                         in_tab=True,
                     )
@@ -62,8 +83,8 @@ def data_overview() -> None:
                         sell_y,
                         "24 小时卖单价格",
                         {
-                            "yaxis_opts": opts.AxisOpts(min_=0.08, max_=0.12),
-                            "legend_opts": opts.LegendOpts(is_show=False),
+                            "yAxis": {"min": 0.08, "max": 0.12},
+                            "legend": {"show": False},
                         },
                         in_tab=True,
                     )
@@ -72,6 +93,14 @@ def data_overview() -> None:
         ]
     )
 
+    put_markdown("## 72 小时 K 线")
+    put_tabs(
+        [
+            {"title": "买单", "content": get_ohlc_chart("buy")},
+            {"title": "卖单", "content": get_ohlc_chart("sell")},
+        ]
+    )
+
     put_markdown("# 近期成交")
 
     buy_view = []
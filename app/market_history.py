@@ -0,0 +1,66 @@
+from typing import Literal
+
+from pywebio.output import (
+    put_buttons,
+    put_html,
+    put_markdown,
+    put_scope,
+    put_tabs,
+    use_scope,
+)
+
+from data.market_history import HISTORY_RANGES, get_market_history
+from utils.chart import single_line_chart
+
+NAME: str = "市场历史"
+DESC: str = "查看不同时间范围内的价格与成交量走势"
+VISIBILITY: bool = True
+
+
+def get_history_charts(trade_type: Literal["buy", "sell"], range_name: str) -> list:
+    history = get_market_history(trade_type, range_name)
+    if not history:
+        return [put_markdown("该时间范围内暂无成交")]
+
+    x = [item["time"] for item in history]
+    return [
+        put_markdown("### 平均价格"),
+        put_html(
+            single_line_chart(
+                x,
+                [item["avg_price"] for item in history],
+                "平均价格",
+                {"legend": {"show": False}, "yAxis": {"scale": True}},
+                in_tab=True,
+            )
+        ),
+        put_markdown("### 成交量"),
+        put_html(
+            single_line_chart(
+                x,
+                [item["trade_amount"] for item in history],
+                "成交量",
+                {"legend": {"show": False}},
+                in_tab=True,
+            )
+        ),
+    ]
+
+
+def put_history(range_name: str) -> None:
+    with use_scope("history", clear=True):
+        put_markdown(f"## {range_name}")
+        put_tabs(
+            [
+                {"title": "买单", "content": get_history_charts("buy", range_name)},
+                {"title": "卖单", "content": get_history_charts("sell", range_name)},
+            ]
+        )
+
+
+def market_history() -> None:
+    put_markdown("# 市场历史")
+
+    put_buttons(list(HISTORY_RANGES.keys()), onclick=put_history)
+    put_scope("history")
+    put_history("24 小时")
@@ -1,57 +1,395 @@
+from threading import RLock
+from typing import Any, Callable, Dict, Literal, Optional
+
 from pywebio.output import (
     close_popup,
     popup,
+    put_button,
     put_buttons,
+    put_collapse,
     put_markdown,
+    put_scope,
     put_tabs,
     put_warning,
+    remove,
+    use_scope,
 )
+from pywebio.pin import pin, put_input
+from pywebio.session import local
 
-from data.order import Order
+from data.matcher import find_crossing_orders
+from data.order import ORDER_EVENTS_TOPIC, Order, OrderStatus
+from data.overview import get_24h_traded_FTN_avg_price
 from data.token import Token
-from utils.exceptions import TokenNotExistError
+from data.user import User
+from utils.broadcast import subscribe_in_session
+from utils.callback import bind_enter_key_callback
+from utils.db_metrics import measure_queries
+from utils.exceptions import (
+    AmountIlliegalError,
+    OrderModifiedError,
+    PriceIlliegalError,
+    TokenNotExistError,
+)
 from utils.html import link
 from utils.login import require_login
-from utils.page import get_token, get_url_to_module, jump_to, reload, set_token
-from widgets.order import put_finished_order_item, put_order_detail
-from widgets.toast import toast_success
+from utils.page import get_token, get_url_to_module, set_token
+from utils.pagination import Cursor
+from utils.preview import bind_live_preview
+from widgets.market_stats import put_market_stats
+from widgets.order import (
+    put_finished_order_item,
+    put_order_detail,
+    put_order_item,
+)
+from widgets.toast import toast_error_and_return, toast_success
 
 NAME: str = "我的意向单"
 DESC: str = "查看并修改自己的意向单"
 VISIBILITY: bool = True
 
+FINISHED_ORDERS_PAGE_SIZE: int = 20
+
+# 在浏览器中根据新单价计算总价与输入提示
+UNIT_PRICE_PREVIEW_JS = """
+function (values, params) {
+    var result = {values: {total_price: ""}, hints: []};
+    var unitPrice = parseFloat(values.unit_price);
+    if (unitPrice > params.min_price && unitPrice <= params.max_price) {
+        result.values.total_price = Math.round(
+            unitPrice * params.total_amount * 100
+        ) / 100;
+    } else if (values.unit_price) {
+        result.hints.push({
+            text: "单价必须在 " + params.min_price + " - " + params.max_price + " 之间",
+        });
+    }
+    return result;
+}
+"""
+
+# 在浏览器中根据新的已交易数量计算剩余数量与输入提示
+TRADED_AMOUNT_PREVIEW_JS = """
+function (values, params) {
+    var result = {values: {remaining_amount: ""}, hints: []};
+    var tradedAmount = Number(values.traded_amount);
+    if (!values.traded_amount) {
+        return result;
+    }
+    // 等于当前值时视为未修改，不展示提示
+    if (!Number.isInteger(tradedAmount) || tradedAmount < params.traded_amount
+        || tradedAmount > params.total_amount) {
+        result.hints.push({
+            text: "已交易数量不能小于当前值 " + params.traded_amount
+                + "，不能大于总量 " + params.total_amount,
+        });
+        return result;
+    }
+
+    var remainingAmount = params.total_amount - tradedAmount;
+    result.values.remaining_amount = remainingAmount;
+    if (remainingAmount === 0) {
+        result.hints.push({
+            text: "在您点击更新按钮后，该交易单将被自动标记为完成，并移动到下方的“已完成”列表中",
+            type: "success",
+        });
+    }
+    return result;
+}
+"""
+
+
+def put_finished_orders_page(
+    user: User,
+    order_type: Literal["buy", "sell"],
+    cursor: Optional[Cursor] = None,
+) -> None:
+    """将下一页已完成意向单追加到列表末尾，不会重新渲染已展示的意向单"""
+    orders, next_cursor = user.finished_orders_page(
+        order_type, FINISHED_ORDERS_PAGE_SIZE, cursor
+    )
 
-def on_delete_confirmed(order: Order) -> None:
-    order.delete()
+    with use_scope(f"finished_{order_type}_orders"):
+        for order in orders:
+            put_finished_order_item(order)
+        if not orders and not cursor:
+            put_scope(
+                f"finished_{order_type}_empty",
+                put_markdown(
+                    f"您没有已完成的{'买单' if order_type == 'buy' else '卖单'}"
+                ),
+            )
+
+    with use_scope(f"finished_{order_type}_load_more", clear=True):
+        if next_cursor:
+            put_button(
+                "加载更多",
+                onclick=lambda: put_finished_orders_page(user, order_type, next_cursor),
+                color="success",
+                outline=True,
+            )
+
+
+def prepend_finished_order(order: Order) -> None:
+    """将刚完成的意向单插入已完成列表顶部
+
+    已完成列表按完成时间由近到远排列，刚完成的意向单总在最前，插入后“加载更多”的游标仍然有效
+    """
+    remove(f"finished_{order.type}_empty")
+    put_finished_order_item(order, scope=f"finished_{order.type}_orders", position=0)
+
+
+def put_crossing_orders(order: Order, user: User) -> None:
+    """展示价格与该意向单交叉的对手方意向单"""
+    crossing_orders = find_crossing_orders(order)
+    if not crossing_orders:
+        return
+
+    put_collapse(
+        f"可成交的{'卖单' if order.type == 'buy' else '买单'}（{len(crossing_orders)}）",
+        [put_order_item(item, user) for item in crossing_orders],
+        open=True,
+    )
+
+
+def put_active_order_section(
+    user: User, order_type: Literal["buy", "sell"], order: Optional[Order]
+) -> None:
+    """使用已有的意向单对象渲染交易中意向单区域，替换区域中原有的内容"""
+    local.displayed_orders[order_type] = order
+
+    with use_scope(f"{order_type}_order_section", clear=True):
+        if not order:
+            order_type_name = "买单" if order_type == "buy" else "卖单"
+            publish_url = get_url_to_module(
+                "publish_order", params={"order_type": order_type}
+            )
+            put_markdown(
+                f"""
+                ## {order_type_name}
+
+                您目前没有{order_type_name}，{link("去发布>>>", publish_url, new_window=True)}
+                """,
+                sanitize=False,
+            )
+            return
+
+        put_order_detail(order)
+        put_buttons(
+            buttons=[
+                {
+                    "label": "修改单价",
+                    "value": "change_unit_price",
+                    "color": "success",
+                },
+                {
+                    "label": "修改已交易数量",
+                    "value": "change_traded_amount",
+                    "color": "success",
+                },
+                {
+                    "label": "全部完成",
+                    "value": "set_all_traded",
+                    "color": "success",
+                },
+                {
+                    "label": "删除",
+                    "value": "delete",
+                    "color": "warning",
+                },
+            ],
+            onclick=[
+                lambda: on_change_unit_price_button_clicked(user, order),
+                lambda: on_change_traded_amount_button_clicked(user, order),
+                lambda: on_set_all_traded_button_clicked(user, order),
+                lambda: on_order_delete_button_clicked(user, order),
+            ],
+        )
+        put_crossing_orders(order, user)
+
+
+def apply_order_change(
+    user: User, order: Order, action: Literal["create", "update", "delete"]
+) -> None:
+    """根据意向单的最新状态更新页面，只重新渲染受影响的区域
+
+    本会话的操作与其它会话发布的事件都通过该函数更新页面，已处理过的变化不会重复渲染
+    """
+    with local.render_lock:
+        displayed_order: Optional[Order] = local.displayed_orders[order.type]
+        is_displayed = displayed_order is not None and displayed_order.id == order.id
+
+        if action == "create":
+            if order.status == OrderStatus.TREADING and not is_displayed:
+                put_active_order_section(user, order.type, order)
+        elif action == "delete":
+            if is_displayed:
+                put_active_order_section(user, order.type, None)
+        elif order.status == OrderStatus.TREADING:
+            put_active_order_section(user, order.type, order)
+        elif is_displayed:
+            put_active_order_section(user, order.type, None)
+            if order.status == OrderStatus.FINISHED:
+                prepend_finished_order(order)
+
+
+def on_order_event(user: User, event: Dict[str, Any]) -> None:
+    order: Order = event["order"]
+    if order.user_id != user.id:
+        return
+
+    apply_order_change(user, order, event["action"])
+
+
+def on_delete_confirmed(user: User, order: Order) -> None:
+    with measure_queries("删除意向单"):
+        order.delete()
+        close_popup()
+        apply_order_change(user, order, "delete")
     toast_success("删除成功")
-    reload(delay=1)
 
 
-def on_set_all_traded_confirmed(order: Order) -> None:
-    order.set_all_traded()
+def on_set_all_traded_confirmed(user: User, order: Order) -> None:
+    with measure_queries("将意向单设为全部完成"):
+        try:
+            order.set_all_traded()
+        except OrderModifiedError:
+            toast_error_and_return("意向单已被修改，请刷新页面后重试")
+        close_popup()
+        apply_order_change(user, order, "update")
     toast_success("已设为全部完成")
-    reload(delay=1)
 
 
-def on_change_unit_price_button_clicked(order: Order) -> None:
-    jump_to(
-        get_url_to_module(
-            "change_unit_price",
-            {"order_id": order.id},
-        ),
+def on_change_unit_price_confirmed(user: User, order: Order) -> None:
+    with measure_queries("修改意向单单价"):
+        try:
+            order.change_unit_price(pin.unit_price)
+        except PriceIlliegalError:
+            toast_error_and_return("单价为空或不在正常范围内")
+        close_popup()
+        apply_order_change(user, order, "update")
+    toast_success("更新成功")
+
+
+def on_change_traded_amount_confirmed(user: User, order: Order) -> None:
+    with measure_queries("修改意向单已交易数量"):
+        try:
+            order.change_traded_amount(pin.traded_amount)
+        except AmountIlliegalError:
+            toast_error_and_return("已交易数量为空或不在正常范围内")
+        except OrderModifiedError:
+            toast_error_and_return("意向单已被修改，请刷新页面后重试")
+        close_popup()
+        apply_order_change(user, order, "update")
+    toast_success("更新成功")
+
+
+def put_change_buttons(on_confirm: Callable[[], None]) -> None:
+    put_buttons(
+        buttons=[
+            {
+                "label": "更新",
+                "value": "confirm",
+                "color": "success",
+            },
+            {
+                "label": "取消",
+                "value": "cancel",
+            },
+        ],
+        onclick=[
+            on_confirm,
+            close_popup,
+        ],
+    )
+
+
+def on_change_unit_price_button_clicked(user: User, order: Order) -> None:
+    with popup("修改单价", size="large"):
+        put_input(
+            "unit_price",
+            "float",
+            label="单价",
+            value=order.unit_price,
+            help_text="市场参考价："
+            + str(get_24h_traded_FTN_avg_price(order.type, missing="default")),
+        )
+        put_input(
+            "total_amount",
+            "number",
+            label="总量",
+            value=order.total_amount,
+            readonly=True,
+        )
+        put_input(
+            "total_price",
+            "number",
+            label="总价",
+            value=order.total_price,
+            readonly=True,
+        )
+        put_scope("unit_price_preview_hints")
+        put_market_stats(order.type)
+        put_change_buttons(lambda: on_change_unit_price_confirmed(user, order))
+
+    bind_live_preview(
+        ["unit_price"],
+        UNIT_PRICE_PREVIEW_JS,
+        params={
+            "total_amount": order.total_amount,
+            "min_price": 0.05,
+            "max_price": 0.2,
+        },
+        hint_scope="unit_price_preview_hints",
+    )
+    bind_enter_key_callback(
+        "unit_price",
+        on_press=lambda _: on_change_unit_price_confirmed(user, order),
     )
 
 
-def on_change_traded_amount_button_clicked(order: Order) -> None:
-    jump_to(
-        get_url_to_module(
-            "change_traded_amount",
-            {"order_id": order.id},
-        ),
+def on_change_traded_amount_button_clicked(user: User, order: Order) -> None:
+    with popup("修改已交易数量", size="large"):
+        put_input(
+            "total_amount",
+            "number",
+            label="总量",
+            value=order.total_amount,
+            readonly=True,
+        )
+        put_input(
+            "traded_amount",
+            "number",
+            label="已交易",
+            value=order.traded_amount,
+            help_text="不能小于当前值，不能大于总量",
+        )
+        put_input(
+            "remaining_amount",
+            "number",
+            label="剩余",
+            value=order.remaining_amount,
+            readonly=True,
+        )
+        put_scope("traded_amount_preview_hints")
+        put_change_buttons(lambda: on_change_traded_amount_confirmed(user, order))
+
+    bind_live_preview(
+        ["traded_amount"],
+        TRADED_AMOUNT_PREVIEW_JS,
+        params={
+            "traded_amount": order.traded_amount,
+            "total_amount": order.total_amount,
+        },
+        hint_scope="traded_amount_preview_hints",
+    )
+    bind_enter_key_callback(
+        "traded_amount",
+        on_press=lambda _: on_change_traded_amount_confirmed(user, order),
     )
 
 
-def on_set_all_traded_button_clicked(order: Order) -> None:
+def on_set_all_traded_button_clicked(user: User, order: Order) -> None:
     with popup("全部完成", size="large"):
         put_markdown(
             """
@@ -75,13 +413,13 @@ def on_set_all_traded_button_clicked(order: Order) -> None:
                 },
             ],
             onclick=[
-                lambda: on_set_all_traded_confirmed(order),
+                lambda: on_set_all_traded_confirmed(user, order),
                 close_popup,
             ],
         )
 
 
-def on_order_delete_button_clicked(order: Order) -> None:
+def on_order_delete_button_clicked(user: User, order: Order) -> None:
     with popup("确认删除", size="large"):
         put_markdown(
             """
@@ -105,7 +443,7 @@ def on_order_delete_button_clicked(order: Order) -> None:
                 },
             ],
             onclick=[
-                lambda: on_delete_confirmed(order),
+                lambda: on_delete_confirmed(user, order),
                 close_popup,
             ],
         )
@@ -130,119 +468,39 @@ def my_orders() -> None:
             ),
         )
 
-    buy_order = user.buy_order
-    if not buy_order:
-        put_markdown(
-            f"""
-            ## 买单
-
-            您目前没有买单，{link("去发布>>>", get_url_to_module(
-                "publish_order", params={"order_type": "buy"}
-            ), new_window=True)}
-            """,
-            sanitize=False,
-        )
-    else:
-        put_order_detail(buy_order)
-        put_buttons(
-            buttons=[
-                {
-                    "label": "修改单价",
-                    "value": "change_unit_price",
-                    "color": "success",
-                },
-                {
-                    "label": "修改已交易数量",
-                    "value": "change_traded_amount",
-                    "color": "success",
-                },
-                {
-                    "label": "全部完成",
-                    "value": "set_all_traded",
-                    "color": "success",
-                },
-                {
-                    "label": "删除",
-                    "value": "delete",
-                    "color": "warning",
-                },
-            ],
-            onclick=[
-                lambda: on_change_unit_price_button_clicked(buy_order),
-                lambda: on_change_traded_amount_button_clicked(buy_order),
-                lambda: on_set_all_traded_button_clicked(buy_order),
-                lambda: on_order_delete_button_clicked(buy_order),
-            ],
-        )
+    # 整页加载的查询次数记录在调试日志中，可与单项操作的查询次数对比
+    with measure_queries("加载我的意向单页面"):
+        local.displayed_orders = {"buy": None, "sell": None}
+        local.render_lock = RLock()
+        put_scope("buy_order_section")
+        put_scope("sell_order_section")
+        put_active_order_section(user, "buy", user.buy_order)
+        put_active_order_section(user, "sell", user.sell_order)
 
-    sell_order = user.sell_order
-    if not sell_order:
-        put_markdown(
-            f"""
-            ## 卖单
-
-            您目前没有卖单，{link("去发布>>>", get_url_to_module(
-                "publish_order", params={"order_type": "sell"}
-            ), new_window=True)}
-            """,
-            sanitize=False,
-        )
-    else:
-        put_order_detail(sell_order)
-        put_buttons(
-            buttons=[
-                {
-                    "label": "修改价格",
-                    "value": "change_unit_price",
-                    "color": "success",
-                },
-                {
-                    "label": "修改已交易数量",
-                    "value": "change_traded_amount",
-                    "color": "success",
-                },
+        put_markdown("## 已完成")
+
+        put_tabs(
+            [
                 {
-                    "label": "全部完成",
-                    "value": "set_all_traded",
-                    "color": "success",
+                    "title": "买单",
+                    "content": [
+                        put_scope("finished_buy_orders"),
+                        put_scope("finished_buy_load_more"),
+                    ],
                 },
                 {
-                    "label": "删除",
-                    "value": "delete",
-                    "color": "warning",
+                    "title": "卖单",
+                    "content": [
+                        put_scope("finished_sell_orders"),
+                        put_scope("finished_sell_load_more"),
+                    ],
                 },
-            ],
-            onclick=[
-                lambda: on_change_unit_price_button_clicked(sell_order),
-                lambda: on_change_traded_amount_button_clicked(sell_order),
-                lambda: on_set_all_traded_button_clicked(sell_order),
-                lambda: on_order_delete_button_clicked(sell_order),
-            ],
+            ]
         )
+        put_finished_orders_page(user, "buy")
+        put_finished_orders_page(user, "sell")
 
-    put_markdown(
-        """
-        ## 已完成
-
-        仅展示最近 20 条
-        """
-    )
-
-    finished_buy_view = []
-    for finished_buy_order in user.finished_orders("buy", 20):
-        finished_buy_view.append(put_finished_order_item(finished_buy_order))
-    if not finished_buy_view:
-        finished_buy_view.append(put_markdown("您没有已完成的买单"))
-
-    finished_sell_view = []
-    for finished_sell_order in user.finished_orders("sell", 20):
-        finished_sell_view.append(put_finished_order_item(finished_sell_order))
-    if not finished_sell_view:
-        finished_sell_view.append(put_markdown("您没有已完成的卖单"))
-
-    put_tabs(
-        [
-            {"title": "买单", "content": finished_buy_view},
-            {"title": "卖单", "content": finished_sell_view},
-        ]
+    # 其它页面或会话修改本人的意向单后，在此更新对应区域
+    subscribe_in_session(
+        ORDER_EVENTS_TOPIC, lambda event: on_order_event(user, event)
     )
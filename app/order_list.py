@@ -1,15 +1,151 @@
-from pywebio.output import put_markdown, put_tabs, put_warning
+from bisect import bisect_left
+from threading import Lock
+from typing import Any, Dict, List, Literal, Optional, Tuple
 
-from data.order import get_active_orders_list
+from pywebio.output import (
+    put_button,
+    put_markdown,
+    put_scope,
+    put_tabs,
+    put_warning,
+    remove,
+    use_scope,
+)
+
+from data.order import ORDER_EVENTS_TOPIC, Order, OrderStatus, get_active_orders_page
 from data.token import Token
+from data.user import User
+from utils.broadcast import subscribe_in_session
 from utils.exceptions import TokenNotExistError
 from utils.page import get_token
+from utils.pagination import Cursor
 from widgets.order import put_order_item
 
 NAME: str = "意向单列表"
 DESC: str = "查看系统中已有的意向单"
 VISIBILITY: bool = True
 
+PAGE_SIZE: int = 20
+
+# 卡片排序键，由价格与 _id 组成，买单取负值，使两种类型的列表均按排序键升序展示
+SortKey = Tuple[float, int]
+
+
+class RenderedOrders:
+    """会话中已展示的某种类型的意向单，按列表中的顺序记录排序键，用于确定卡片的插入位置
+
+    买单按价格降序排列，卖单按价格升序排列，价格相同时按 _id 排序，与键集分页的顺序一致
+    """
+
+    def __init__(self, order_type: Literal["buy", "sell"]) -> None:
+        self.order_type = order_type
+        self.direction: Literal[1, -1] = -1 if order_type == "buy" else 1
+        # 列表中各卡片的排序键，按展示顺序升序排列
+        self.keys: List[SortKey] = []
+        self.order_keys: Dict[str, SortKey] = {}
+        # 下一页游标对应的排序键，排在其后的意向单由之后的分页加载，为 None 时已全部加载
+        self.cursor_key: Optional[SortKey] = None
+        # 事件处理与加载更多运行在不同的线程中
+        self.lock = Lock()
+
+    def get_sort_key(self, unit_price: float, id: str) -> SortKey:
+        return (self.direction * unit_price, self.direction * int(id, 16))
+
+    def __contains__(self, order_id: str) -> bool:
+        return order_id in self.order_keys
+
+
+def put_empty_hint(rendered: RenderedOrders) -> None:
+    with use_scope(f"{rendered.order_type}_orders_empty", clear=True):
+        if not rendered.keys and rendered.cursor_key is None:
+            put_markdown("系统中暂无意向单，去发布一个？")
+
+
+def insert_order_card(
+    rendered: RenderedOrders, order: Order, user: Optional[User]
+) -> None:
+    """将意向单卡片插入列表中的排序位置，排在未加载分页中的意向单不会展示"""
+    key = rendered.get_sort_key(order.unit_price, order.id)
+    if rendered.cursor_key is not None and key > rendered.cursor_key:
+        return
+
+    index = bisect_left(rendered.keys, key)
+    rendered.keys.insert(index, key)
+    rendered.order_keys[order.id] = key
+    # 每张卡片位于独立的 Scope 中，意向单变化时只更新对应的卡片
+    put_scope(
+        f"order_{order.id}",
+        put_order_item(order, user),
+        scope=f"{order.type}_orders",
+        position=index if index < len(rendered.keys) - 1 else -1,
+    )
+    if len(rendered.keys) == 1:  # 第一张卡片，移除无意向单提示
+        put_empty_hint(rendered)
+
+
+def remove_order_card(rendered: RenderedOrders, order_id: str) -> None:
+    rendered.keys.remove(rendered.order_keys.pop(order_id))
+    remove(f"order_{order_id}")
+    if not rendered.keys:
+        put_empty_hint(rendered)
+
+
+def put_orders_page(
+    rendered: RenderedOrders, user: Optional[User], cursor: Optional[Cursor] = None
+) -> None:
+    """将下一页意向单追加到列表末尾，不会重新渲染已展示的意向单"""
+    with rendered.lock:
+        orders, next_cursor = get_active_orders_page(
+            rendered.order_type, PAGE_SIZE, cursor
+        )
+        rendered.cursor_key = (
+            rendered.get_sort_key(*next_cursor) if next_cursor else None
+        )
+        for order in orders:
+            # 已由事件插入的意向单不再重复展示
+            if order.id not in rendered:
+                insert_order_card(rendered, order, user)
+        put_empty_hint(rendered)
+
+    with use_scope(f"{rendered.order_type}_load_more", clear=True):
+        if next_cursor:
+            put_button(
+                "加载更多",
+                onclick=lambda: put_orders_page(rendered, user, next_cursor),
+                color="success",
+                outline=True,
+            )
+
+
+def on_order_event(
+    event: Dict[str, Any],
+    user: Optional[User],
+    rendered_orders: Dict[str, RenderedOrders],
+) -> None:
+    """根据意向单变化事件更新列表中对应的卡片"""
+    order: Order = event["order"]
+    rendered = rendered_orders[order.type]
+
+    with rendered.lock:
+        is_rendered = order.id in rendered
+        if event["action"] == "delete" or order.status != OrderStatus.TREADING:
+            if is_rendered:
+                remove_order_card(rendered, order.id)
+            return
+
+        if is_rendered:
+            if rendered.order_keys[order.id] == rendered.get_sort_key(
+                order.unit_price, order.id
+            ):
+                with use_scope(f"order_{order.id}", clear=True):
+                    put_order_item(order, user)
+                return
+            # 价格变化后重新插入到新的排序位置
+            remove_order_card(rendered, order.id)
+
+        # 新发布的意向单，或价格变化后进入已加载范围的意向单
+        insert_order_card(rendered, order, user)
+
 
 def order_list() -> None:
     try:
@@ -21,21 +157,28 @@ def order_list() -> None:
     put_markdown("# 意向单列表")
     put_warning("以下意向单均为用户自主发布，请自行核对其真实性，谨防上当受骗")
 
-    buy_view = []
-    for buy_order in get_active_orders_list("buy", 20):
-        buy_view.append(put_order_item(buy_order, user))
-    if not buy_view:
-        buy_view.append(put_markdown("系统中暂无意向单，去发布一个？"))
-
-    sell_view = []
-    for sell_order in get_active_orders_list("sell", 20):
-        sell_view.append(put_order_item(sell_order, user))
-    if not sell_view:
-        sell_view.append(put_markdown("系统中暂无意向单，去发布一个？"))
-
     put_tabs(
         [
-            {"title": "买单", "content": buy_view},
-            {"title": "卖单", "content": sell_view},
+            {
+                "title": title,
+                "content": [
+                    put_scope(f"{order_type}_orders_empty"),
+                    put_scope(f"{order_type}_orders"),
+                    put_scope(f"{order_type}_load_more"),
+                ],
+            }
+            for title, order_type in (("买单", "buy"), ("卖单", "sell"))
         ]
     )
+    rendered_orders: Dict[str, RenderedOrders] = {
+        "buy": RenderedOrders("buy"),
+        "sell": RenderedOrders("sell"),
+    }
+    put_orders_page(rendered_orders["buy"], user)
+    put_orders_page(rendered_orders["sell"], user)
+
+    # 订阅意向单变化事件，在页面中原地更新，无需刷新页面
+    subscribe_in_session(
+        ORDER_EVENTS_TOPIC,
+        lambda event: on_order_event(event, user, rendered_orders),
+    )
@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from pywebio.output import (
+    clear,
+    put_button,
+    put_buttons,
+    put_markdown,
+    put_scope,
+    use_scope,
+)
+from pywebio.pin import pin, put_checkbox, put_input, put_select
+
+from data.order_search import OrderSearchQuery, search_active_orders
+from data.token import Token
+from data.user import User
+from utils.exceptions import TokenNotExistError
+from utils.page import get_token
+from utils.pagination import Cursor
+from widgets.order import put_order_item
+
+NAME: str = "搜索意向单"
+DESC: str = "按价格、数量与发布时间筛选交易中的意向单"
+VISIBILITY: bool = True
+
+PAGE_SIZE: int = 20
+
+SORT_KEY_NAMES: Dict[str, str] = {
+    "单价从低到高": "price_asc",
+    "单价从高到低": "price_desc",
+    "剩余数量从多到少": "remaining_desc",
+    "最新发布": "publish_time_desc",
+}
+PUBLISH_TIME_WINDOWS: Dict[str, Optional[timedelta]] = {
+    "不限": None,
+    "1 小时内": timedelta(hours=1),
+    "24 小时内": timedelta(days=1),
+    "3 天内": timedelta(days=3),
+    "7 天内": timedelta(days=7),
+}
+JIANSHU_BINDED_ONLY_OPTION: str = "只看已绑定简书账号的用户"
+
+
+def get_query_from_inputs() -> OrderSearchQuery:
+    publish_time_window = PUBLISH_TIME_WINDOWS[pin.publish_time_window]
+    return OrderSearchQuery(
+        order_type="buy" if pin.order_type == "买单" else "sell",
+        min_unit_price=pin.min_unit_price,
+        max_unit_price=pin.max_unit_price,
+        min_remaining_amount=pin.min_remaining_amount,
+        max_remaining_amount=pin.max_remaining_amount,
+        publish_time_start=datetime.now() - publish_time_window
+        if publish_time_window
+        else None,
+        jianshu_binded_only=JIANSHU_BINDED_ONLY_OPTION in pin.jianshu_binded_only,
+        sort_key=SORT_KEY_NAMES[pin.sort_key],
+    )
+
+
+def put_results_page(
+    query: OrderSearchQuery, user: Optional[User], cursor: Optional[Cursor] = None
+) -> None:
+    """将下一页搜索结果追加到列表末尾"""
+    orders, next_cursor, index_name = search_active_orders(query, PAGE_SIZE, cursor)
+
+    with use_scope("results"):
+        for order in orders:
+            put_order_item(order, user)
+        if not orders and not cursor:
+            put_markdown("没有符合条件的意向单")
+
+    with use_scope("query_info", clear=True):
+        put_markdown(f"使用索引：`{index_name}`")
+
+    with use_scope("load_more", clear=True):
+        if next_cursor:
+            put_button(
+                "加载更多",
+                onclick=lambda: put_results_page(query, user, next_cursor),
+                color="success",
+                outline=True,
+            )
+
+
+def on_search_button_clicked(user: Optional[User]) -> None:
+    query = get_query_from_inputs()
+
+    clear("results")
+    put_results_page(query, user)
+
+
+def order_search() -> None:
+    try:
+        user = Token.from_token_value(get_token()).user
+    except TokenNotExistError:
+        # 这个页面并不强制要求用户登录
+        user = None
+
+    put_markdown("# 搜索意向单")
+    put_select("order_type", label="意向类型", options=["买单", "卖单"])
+    put_input("min_unit_price", "float", label="最低单价")
+    put_input("max_unit_price", "float", label="最高单价")
+    put_input("min_remaining_amount", "number", label="最少剩余数量")
+    put_input("max_remaining_amount", "number", label="最多剩余数量")
+    put_select(
+        "publish_time_window",
+        label="发布时间",
+        options=list(PUBLISH_TIME_WINDOWS.keys()),
+    )
+    put_checkbox("jianshu_binded_only", options=[JIANSHU_BINDED_ONLY_OPTION])
+    put_select("sort_key", label="排序", options=list(SORT_KEY_NAMES.keys()))
+    put_buttons(
+        buttons=[
+            {
+                "label": "搜索",
+                "value": "search",
+                "color": "success",
+            },
+        ],
+        onclick=[
+            lambda: on_search_button_clicked(user),
+        ],
+    )
+
+    put_scope("query_info")
+    put_scope("results")
+    put_scope("load_more")
+    on_search_button_clicked(user)
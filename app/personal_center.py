@@ -5,16 +5,19 @@ from pywebio.output import (
     put_buttons,
     put_markdown,
     put_row,
+    put_table,
     use_scope,
 )
 from pywebio.pin import pin, put_input
 
 from data.token import Token
 from data.user import User
+from data.user_stats import get_user_stats
 from utils.callback import bind_enter_key_callback
 from utils.exceptions import (
     DuplicatedUsernameError,
     DuplicatedUserURLError,
+    JianshuAPIError,
     PasswordIlliegalError,
     PasswordNotEqualError,
     TokenNotExistError,
@@ -197,6 +200,40 @@ def on_logout_button_clicked() -> None:
     reload(delay=1)
 
 
+def on_logout_all_devices_button_clicked(user: User) -> None:
+    with popup("退出所有设备", size="large"):
+        put_markdown(
+            """
+            确认要退出所有设备吗？
+
+            操作后，您在所有设备上的登录状态都将失效，包括当前设备。
+            """
+        )
+        put_buttons(
+            buttons=[
+                {
+                    "label": "确认",
+                    "value": "confirm",
+                    "color": "warning",
+                },
+                {
+                    "label": "取消",
+                    "value": "cancel",
+                },
+            ],
+            onclick=[
+                lambda: on_logout_all_devices_confirmed(user),
+                close_popup,
+            ],
+        )
+
+
+def on_logout_all_devices_confirmed(user: User) -> None:
+    user.expire_all_tokens()
+    toast_success("您已退出所有设备")
+    reload(delay=1)
+
+
 def on_bind_jianshu_account_button_clicked(user: User) -> None:
     with popup("绑定简书账号", size="large"):
         put_markdown(
@@ -243,6 +280,8 @@ def on_bind_jianshu_account_confirmed(user: User) -> None:
         toast_error_and_return("链接为空或输入错误")
     except DuplicatedUserURLError:
         toast_warn_and_return("该简书账号已被他人绑定")
+    except JianshuAPIError:
+        toast_error_and_return("获取简书账号信息失败，请稍后再试")
     else:
         toast_success(f"您已成功绑定简书账号 {jianshu_name}")
         # 将按钮设为不可用
@@ -274,6 +313,41 @@ def on_copy_uid_button_clicked(user: User) -> None:
     toast_success("复制成功")
 
 
+def put_user_stats(user: User) -> None:
+    stats = get_user_stats(user.id)
+    order = stats["order"]
+    buy = stats["trade"]["buy"]
+    sell = stats["trade"]["sell"]
+
+    completion_rate = (
+        f"{order['completion_rate']}%" if order["completion_rate"] is not None else "-"
+    )
+    put_markdown("## 交易统计")
+    # 每行单独成段，否则 Markdown 会将相邻的行合并为一段
+    put_markdown(
+        "\n\n".join(
+            [
+                f"已发布意向单：{order['published']}",
+                f"已完成 / 已过期：{order['finished']} / {order['expired']}",
+                f"完成率：{completion_rate}",
+            ]
+        )
+    )
+    put_table(
+        [
+            [
+                name,
+                item["count"],
+                item["amount"],
+                item["total_price"],
+                item["avg_price"] if item["avg_price"] is not None else "-",
+            ]
+            for name, item in (("买入", buy), ("卖出", sell))
+        ],
+        header=["", "交易次数", "交易量", "总价", "均价"],
+    )
+
+
 def personal_center() -> None:
     try:
         user = Token.from_token_value(get_token()).user
@@ -341,15 +415,30 @@ def personal_center() -> None:
         small=True,
     )
 
+    put_user_stats(user)
+
     put_markdown(
         """
         ## 退出登录
 
-        安全退出系统。
+        安全退出系统。如果您在其它设备上登录过，可选择退出所有设备。
         """
     )
-    put_button(
-        "退出登录",
-        onclick=on_logout_button_clicked,
-        color="warning",
+    put_buttons(
+        buttons=[
+            {
+                "label": "退出登录",
+                "value": "logout",
+                "color": "warning",
+            },
+            {
+                "label": "退出所有设备",
+                "value": "logout_all_devices",
+                "color": "warning",
+            },
+        ],
+        onclick=[
+            on_logout_button_clicked,
+            lambda: on_logout_all_devices_button_clicked(user),
+        ],
     )
@@ -0,0 +1,156 @@
+from typing import Literal
+
+from pywebio.output import (
+    put_button,
+    put_buttons,
+    put_markdown,
+    put_scope,
+    put_table,
+    toast,
+    use_scope,
+)
+from pywebio.pin import pin, put_input, put_select
+
+from data.overview import get_24h_traded_FTN_avg_price
+from data.price_alert import (
+    MAX_ACTIVE_ALERTS_PER_USER,
+    PriceAlert,
+    PriceAlertStatus,
+    get_price_alert_topic,
+    get_user_price_alerts,
+)
+from data.token import Token
+from data.user import User
+from utils.broadcast import subscribe_in_session
+from utils.exceptions import (
+    PriceIlliegalError,
+    TokenNotExistError,
+    TooManyPriceAlertsError,
+)
+from utils.login import require_login
+from utils.page import get_token, set_token
+from widgets.toast import toast_error_and_return, toast_success
+
+NAME: str = "价格提醒"
+DESC: str = "成交价达到设定值时收到站内提醒"
+VISIBILITY: bool = True
+
+STATUS_TEXT = {
+    PriceAlertStatus.ACTIVE: "等待触发",
+    PriceAlertStatus.TRIGGERED: "已触发",
+}
+
+
+def put_alerts_table(user: User) -> None:
+    alerts = get_user_price_alerts(user.id)
+
+    with use_scope("alerts", clear=True):
+        if not alerts:
+            put_markdown("您还没有设置价格提醒")
+            return
+
+        put_table(
+            [
+                [
+                    alert.description,
+                    STATUS_TEXT[alert.status],
+                    str(alert.create_time),
+                    f"{alert.trigger_time}（{alert.trigger_price}）"
+                    if alert.status == PriceAlertStatus.TRIGGERED
+                    else "",
+                    put_button(
+                        "取消",
+                        onclick=lambda alert=alert: on_cancel_button_clicked(
+                            user, alert
+                        ),
+                        color="warning",
+                        small=True,
+                    )
+                    if alert.status == PriceAlertStatus.ACTIVE
+                    else "",
+                ]
+                for alert in alerts
+            ],
+            header=["条件", "状态", "创建时间", "触发时间（成交价）", ""],
+        )
+
+
+def on_add_button_clicked(user: User) -> None:
+    trade_type: Literal["buy", "sell"] = "buy" if pin.trade_type == "买单" else "sell"
+    direction: Literal["above", "below"] = (
+        "above" if pin.direction == "不低于" else "below"
+    )
+
+    try:
+        PriceAlert.create(trade_type, direction, pin.threshold, user)
+    except PriceIlliegalError:
+        toast_error_and_return("阈值为空或不在正常范围内")
+    except TooManyPriceAlertsError:
+        toast_error_and_return(
+            f"最多只能同时设置 {MAX_ACTIVE_ALERTS_PER_USER} 条价格提醒"
+        )
+
+    toast_success("添加成功")
+    put_alerts_table(user)
+
+
+def on_cancel_button_clicked(user: User, alert: PriceAlert) -> None:
+    if alert.cancel():
+        toast_success("已取消")
+    else:
+        toast("该提醒已被触发，无法取消", color="warn")
+    put_alerts_table(user)
+
+
+def on_alert_triggered(user: User, alert: PriceAlert) -> None:
+    toast(
+        f"价格提醒：{alert.description}，最新成交价 {alert.trigger_price}",
+        duration=0,
+        color="info",
+    )
+    put_alerts_table(user)
+
+
+def price_alerts() -> None:
+    try:
+        user = Token.from_token_value(get_token()).user
+    except TokenNotExistError:
+        user = require_login()
+        token = user.generate_token()
+        set_token(token.value)
+
+    buy_avg_price = get_24h_traded_FTN_avg_price("buy", missing="ignore")
+    sell_avg_price = get_24h_traded_FTN_avg_price("sell", missing="ignore")
+    put_markdown(
+        f"""
+        # 价格提醒
+
+        成交价达到设定值时，在本页面提醒您，每条提醒只触发一次。
+
+        24 小时平均买 / 卖价：{buy_avg_price} / {sell_avg_price}
+        """
+    )
+    put_select("trade_type", label="交易类型", options=["买单", "卖单"])
+    put_select("direction", label="条件", options=["不低于", "不高于"])
+    put_input("threshold", "float", label="成交价", help_text="0.05 - 0.2，最多三位小数")
+    put_buttons(
+        buttons=[
+            {
+                "label": "添加",
+                "value": "add",
+                "color": "success",
+            },
+        ],
+        onclick=[
+            lambda: on_add_button_clicked(user),
+        ],
+    )
+
+    put_markdown("## 我的提醒")
+    put_scope("alerts")
+    put_alerts_table(user)
+
+    # 提醒被触发时，由成交所在的会话推送到此处
+    subscribe_in_session(
+        get_price_alert_topic(user.id), lambda alert: on_alert_triggered(user, alert)
+    )
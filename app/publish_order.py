@@ -1,7 +1,7 @@
 from typing import Literal
 
-from pywebio.output import popup, put_buttons, put_markdown, use_scope
-from pywebio.pin import pin, pin_on_change, pin_update, put_input, put_select
+from pywebio.output import popup, put_buttons, put_markdown, put_scope, use_scope
+from pywebio.pin import pin, put_input, put_select
 
 from data.order import Order
 from data.overview import get_24h_traded_FTN_avg_price
@@ -23,6 +23,8 @@ from utils.page import (
     jump_to,
     set_token,
 )
+from utils.preview import bind_live_preview
+from widgets.market_stats import put_market_stats
 from widgets.toast import (
     toast_error_and_return,
     toast_success,
@@ -34,27 +36,39 @@ DESC: str = "发布交易意向"
 VISIBILITY: bool = True
 
 
-def on_unit_price_or_total_amount_input_changed(_) -> None:
-    unit_price: float = pin.unit_price
-    total_amount: float = pin.total_amount
-
-    if not unit_price or not total_amount:
-        return
-
-    if not 0.05 < unit_price <= 0.2 or not 0 < total_amount <= 10**8:
-        return
-
-    total_price: float = round(unit_price * total_amount, 2)
-    pin_update("total_price", value=total_price)
-
-
-def on_order_type_changed(_) -> None:
-    order_type: Literal["buy", "sell"] = "buy" if pin.order_type == "买单" else "sell"
-
-    help_text: str = (
-        f"市场参考价：{get_24h_traded_FTN_avg_price(order_type, missing='default')}"
-    )
-    pin_update("unit_price", help_text=help_text)
+# 在浏览器中计算总价与输入提示，切换意向单类型时更新参考价并切换市场价格统计
+PREVIEW_JS = """
+function (values, params) {
+    var orderType = values.order_type === "买单" ? "buy" : "sell";
+    var otherType = orderType === "buy" ? "sell" : "buy";
+    var result = {
+        values: {total_price: ""},
+        help: {unit_price: "市场参考价：" + params.reference_prices[orderType]},
+        show: ["market_stats_" + orderType],
+        hide: ["market_stats_" + otherType],
+        hints: [],
+    };
+
+    var unitPrice = parseFloat(values.unit_price);
+    var totalAmount = Number(values.total_amount);
+    var unitPriceValid = unitPrice > params.min_price && unitPrice <= params.max_price;
+    var totalAmountValid = Number.isInteger(totalAmount)
+        && totalAmount > 0 && totalAmount <= params.max_amount;
+
+    if (values.unit_price && !unitPriceValid) {
+        result.hints.push({
+            text: "单价必须在 " + params.min_price + " - " + params.max_price + " 之间",
+        });
+    }
+    if (values.total_amount && !totalAmountValid) {
+        result.hints.push({text: "总量必须为不超过 " + params.max_amount + " 的正整数"});
+    }
+    if (unitPriceValid && totalAmountValid) {
+        result.values.total_price = Math.round(unitPrice * totalAmount * 100) / 100;
+    }
+    return result;
+}
+"""
 
 
 def on_publish_button_clicked(user: User) -> None:
@@ -118,22 +132,29 @@ def publish_order() -> None:
                 sanitize=False,
             )
 
-    order_type = "买单" if get_url_params().get("order_type", "buy") == "buy" else "卖单"
+    order_type: Literal["buy", "sell"] = (
+        "buy" if get_url_params().get("order_type", "buy") == "buy" else "sell"
+    )
+    # 两种类型的参考价在页面加载时一并传入浏览器，切换类型时无需请求服务器
+    reference_prices = {
+        "buy": get_24h_traded_FTN_avg_price("buy", missing="default"),
+        "sell": get_24h_traded_FTN_avg_price("sell", missing="default"),
+    }
 
     put_markdown("# 发布意向单")
     put_select(
         "order_type",
         label="意向类型",
         options=["买单", "卖单"],
-        value=order_type,
+        value="买单" if order_type == "buy" else "卖单",
         help_text="我要买贝 => 买单，我要卖贝 => 卖单",
     )
     put_input(
         "unit_price",
         "float",
         label="单价",
-        help_text=f"市场参考价：{get_24h_traded_FTN_avg_price('buy', missing='default')}",
-    )  # 默认 order_type 为 buy
+        help_text=f"市场参考价：{reference_prices[order_type]}",
+    )
     put_input(
         "total_amount",
         "number",
@@ -145,6 +166,10 @@ def publish_order() -> None:
         label="总价",
         readonly=True,
     )
+    put_scope("preview_hints")
+    # 两种类型的市场价格统计都在页面加载时渲染，由浏览器根据所选类型切换显示
+    put_scope("market_stats_buy", put_market_stats("buy"))
+    put_scope("market_stats_sell", put_market_stats("sell"))
     with use_scope("buttons", clear=True):
         put_buttons(
             buttons=[
@@ -164,15 +189,14 @@ def publish_order() -> None:
             ],
         )
 
-    pin_on_change(
-        "price",
-        onchange=lambda _: on_unit_price_or_total_amount_input_changed(user),
-    )
-    pin_on_change(
-        "total_amount",
-        onchange=lambda _: on_unit_price_or_total_amount_input_changed(user),
-    )
-    pin_on_change(
-        "order_type",
-        onchange=on_order_type_changed,
+    bind_live_preview(
+        ["order_type", "unit_price", "total_amount"],
+        PREVIEW_JS,
+        params={
+            "reference_prices": reference_prices,
+            "min_price": 0.05,
+            "max_price": 0.2,
+            "max_amount": 10**8,
+        },
+        hint_scope="preview_hints",
     )
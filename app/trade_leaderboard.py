@@ -0,0 +1,39 @@
+from pywebio.output import put_buttons, put_markdown, put_scope, put_table, use_scope
+
+from data.leaderboard import LEADERBOARD_SIZE, LEADERBOARD_WINDOWS, leaderboard
+
+NAME: str = "交易排行榜"
+DESC: str = "查看不同时间范围内交易量最多的用户"
+VISIBILITY: bool = True
+
+
+def put_leaderboard(window: str) -> None:
+    # 排行榜在内存中维护，渲染只读取前 K 名，不查询数据库
+    top = leaderboard.get_top(window)
+
+    with use_scope("leaderboard", clear=True):
+        put_markdown(f"## {window}")
+        if not top:
+            put_markdown("该时间范围内暂无成交")
+            return
+
+        put_table(
+            [[item["rank"], item["user_name"], item["trade_amount"]] for item in top],
+            header=["排名", "昵称", "交易量"],
+        )
+        if leaderboard.reconcile_time:
+            put_markdown(f"数据校准时间：{leaderboard.reconcile_time:%Y-%m-%d %H:%M}")
+
+
+def trade_leaderboard() -> None:
+    put_markdown(
+        f"""
+        # 交易排行榜
+
+        按买卖两个方向的交易量合计排名，展示前 {LEADERBOARD_SIZE} 名。
+        """
+    )
+
+    put_buttons(list(LEADERBOARD_WINDOWS.keys()), onclick=put_leaderboard)
+    put_scope("leaderboard")
+    put_leaderboard("7 天")
@@ -4,6 +4,7 @@ from bson import ObjectId
 
 from utils.db import user_data_db
 from utils.dict_helper import flatten_dict, get_reversed_dict
+from utils.write_behind import write_behind_buffer
 
 
 class DataModel:
@@ -89,6 +90,44 @@ class DataModel:
         # 调用 __init__ 初始化对象
         return cls(**data_to_init_func)
 
+    @classmethod
+    def insert(cls, db_data: Dict, session=None):
+        """将数据字典写入数据库，并直接构建数据模型，不会再次查询数据库
+
+        Args:
+            db_data (Dict): 数据字典，不包含 _id
+            session (ClientSession, optional): 数据库会话. Defaults to None.
+
+        Returns:
+            DataModel: 数据模型
+        """
+        insert_result = cls.db.insert_one(db_data, session=session)
+        db_data["_id"] = insert_result.inserted_id
+        return cls.from_db_data(db_data)
+
+    def copy(self):
+        """复制数据模型，副本的属性修改不会影响原对象
+
+        Returns:
+            DataModel: 数据模型副本
+        """
+        return self.__class__(
+            **{attr: getattr(self, attr) for attr in self.__class__.attr_db_key_mapping}
+        )
+
+    def _update_from_db_data(self, db_data: Dict) -> None:
+        """使用数据库返回的数据字典更新模型属性，不会将属性标脏
+
+        Args:
+            db_data (Dict): 数据字典
+        """
+        for k, v in flatten_dict(db_data).items():
+            attr_name = self.__class__.db_key_attr_mapping.get(k)
+            if not attr_name or attr_name == "id":
+                continue
+            # 绕过 __setattr__，避免属性被标脏
+            object.__setattr__(self, attr_name, v)
+
     def __eq__(self, __o: Any) -> bool:
         """判断两对象是否相等，只有同一个类产生的 ID 相同的对象相等。
 
@@ -163,6 +202,26 @@ class DataModel:
         # 更新数据库中的信息
         self.db.update_one({"_id": self.object_id}, {"$set": data_to_update})
 
+    def sync_deferred(self, attr_list: Sequence[str]) -> None:
+        """将指定脏数据交由延迟写入缓冲区，在下一次缓冲区刷新时写入数据库
+
+        Args:
+            attr_list (Sequence[str]): 待刷新的数据列表
+
+        Raises:
+            Exception: 属性未被标脏
+        """
+        for attr in attr_list:
+            if attr not in self._dirty:
+                raise Exception(f"{attr} 未被标记为脏数据")
+            db_key: str = self.__class__.attr_db_key_mapping[attr]
+            write_behind_buffer.set(
+                self.db, self.object_id, db_key, getattr(self, attr)
+            )
+
+            # 从脏数据列表中删除对应属性名
+            self._dirty.remove(attr)
+
     def sync_all(self) -> None:
         """强制将全部数据刷新到数据库，无论标脏与否。
         """
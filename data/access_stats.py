@@ -0,0 +1,86 @@
+from datetime import datetime
+from typing import Any, Dict, List
+
+from utils.db import access_stats_db
+from utils.hyperloglog import HyperLogLog
+
+
+def get_access_stats(start_time: datetime) -> List[Dict[str, Any]]:
+    """获取指定时间之后各模块的访问统计
+
+    仅读取日志保存时写入的每分钟统计数据，不聚合原始访问日志
+
+    Args:
+        start_time (datetime): 开始时间
+
+    Returns:
+        List[Dict[str, Any]]: 各模块的访问统计，按访问次数降序排列
+    """
+    match: Dict[str, Any] = {"$match": {"time": {"$gte": start_time}}}
+
+    result: Dict[str, Dict[str, Any]] = {
+        item["_id"]: {
+            "module": item["_id"],
+            "count": item["count"],
+            "logged_in_count": item["logged_in_count"],
+            "anonymous_count": item["anonymous_count"],
+            "protocol_count": {},
+            "unique_ip_count": 0,
+        }
+        for item in access_stats_db.aggregate(
+            [
+                match,
+                {
+                    "$group": {
+                        "_id": "$module",
+                        "count": {"$sum": "$count"},
+                        "logged_in_count": {"$sum": "$logged_in_count"},
+                        "anonymous_count": {"$sum": "$anonymous_count"},
+                    }
+                },
+            ]
+        )
+    }
+
+    for item in access_stats_db.aggregate(
+        [
+            match,
+            {
+                "$project": {
+                    "module": 1,
+                    "protocols": {"$objectToArray": "$protocol_count"},
+                }
+            },
+            {"$unwind": "$protocols"},
+            {
+                "$group": {
+                    "_id": {"module": "$module", "protocol": "$protocols.k"},
+                    "count": {"$sum": "$protocols.v"},
+                }
+            },
+        ]
+    ):
+        result[item["_id"]["module"]]["protocol_count"][
+            item["_id"]["protocol"]
+        ] = item["count"]
+
+    # 不同分钟的独立 IP 不能直接相加，需要将估计器寄存器逐位取最大值后再估计
+    for item in access_stats_db.aggregate(
+        [
+            match,
+            {"$unwind": {"path": "$ip_registers", "includeArrayIndex": "index"}},
+            {
+                "$group": {
+                    "_id": {"module": "$module", "index": "$index"},
+                    "register": {"$max": "$ip_registers"},
+                }
+            },
+            {"$sort": {"_id.index": 1}},
+            {"$group": {"_id": "$_id.module", "registers": {"$push": "$register"}}},
+        ]
+    ):
+        result[item["_id"]]["unique_ip_count"] = HyperLogLog(
+            registers=item["registers"]
+        ).count()
+
+    return sorted(result.values(), key=lambda x: x["count"], reverse=True)
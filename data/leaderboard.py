@@ -0,0 +1,262 @@
+"""交易排行榜：按时间范围内的交易量对用户排名
+
+每位用户最近若干天的交易量按天存放在内存中，每笔成交只更新该用户的数据与各时间范围的前 K 名，
+页面直接读取前 K 名，渲染耗时为 O(K)
+
+日期变化时过期的数据被丢弃，各时间范围的前 K 名根据剩余数据重新计算；
+内存数据定期与交易记录的完整聚合结果对账，修正增量更新中可能出现的偏差
+"""
+from datetime import date, datetime, timedelta
+from heapq import nlargest
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+
+from utils.db import trade_archive_db, trade_data_db, user_data_db
+
+# 排行榜展示的用户数量
+LEADERBOARD_SIZE = 20
+# 时间范围名称与天数，天数为 None 表示全部时间
+LEADERBOARD_WINDOWS: Dict[str, Optional[int]] = {
+    "7 天": 7,
+    "30 天": 30,
+    "全部": None,
+}
+# 内存中按天保留的最长天数
+MAX_WINDOW_DAYS = max(days for days in LEADERBOARD_WINDOWS.values() if days)
+
+# 对账期间记录的交易，元素为 (用户 ID, 用户昵称, 交易量, 交易时间)
+PendingRecord = Tuple[str, str, int, datetime]
+
+
+class Leaderboard:
+    def __init__(self, size: int = LEADERBOARD_SIZE) -> None:
+        self.size = size
+        self._daily_volume: Dict[str, Dict[date, int]] = {}
+        self._all_time_volume: Dict[str, int] = {}
+        self._user_names: Dict[str, str] = {}
+        # 各时间范围的前 K 名，按交易量降序排列，元素为 (用户 ID, 交易量)
+        self._top: Dict[str, List[Tuple[str, int]]] = {
+            window: [] for window in LEADERBOARD_WINDOWS
+        }
+        self._today: date = datetime.now().date()
+        self._lock = Lock()
+        # 对账期间记录的交易，替换为聚合结果后重新累加，为 None 时不在对账中
+        self._pending_records: Optional[List[PendingRecord]] = None
+        self.reconcile_time: Optional[datetime] = None
+
+    def _get_volume(self, user_id: str, days: Optional[int]) -> int:
+        if days is None:
+            return self._all_time_volume.get(user_id, 0)
+
+        start_date = self._today - timedelta(days=days - 1)
+        return sum(
+            volume
+            for day, volume in self._daily_volume.get(user_id, {}).items()
+            if day >= start_date
+        )
+
+    def _rebuild_top(self) -> None:
+        """根据每位用户的数据重新计算各时间范围的前 K 名"""
+        for window, days in LEADERBOARD_WINDOWS.items():
+            user_ids = (
+                self._all_time_volume.keys() if days is None else self._daily_volume
+            )
+            volumes = (
+                (user_id, self._get_volume(user_id, days)) for user_id in user_ids
+            )
+            self._top[window] = nlargest(
+                self.size,
+                (item for item in volumes if item[1] > 0),
+                key=lambda item: item[1],
+            )
+
+    def _roll_to(self, today: date) -> None:
+        """丢弃超出最长时间范围的数据，并重新计算前 K 名"""
+        self._today = today
+        start_date = today - timedelta(days=MAX_WINDOW_DAYS - 1)
+        for user_id in list(self._daily_volume):
+            days_volume = {
+                day: volume
+                for day, volume in self._daily_volume[user_id].items()
+                if day >= start_date
+            }
+            if days_volume:
+                self._daily_volume[user_id] = days_volume
+            else:
+                del self._daily_volume[user_id]
+        self._rebuild_top()
+
+    def record(
+        self, user_id: str, user_name: str, trade_amount: int, trade_time: datetime
+    ) -> None:
+        """将一笔交易累加到排行榜中
+
+        交易量只会增加，只需将该用户与各时间范围的第 K 名比较
+
+        Args:
+            user_id (str): 用户 ID
+            user_name (str): 用户昵称
+            trade_amount (int): 交易量
+            trade_time (datetime): 交易时间
+        """
+        with self._lock:
+            self._apply_record(user_id, user_name, trade_amount, trade_time)
+            if self._pending_records is not None:
+                self._pending_records.append(
+                    (user_id, user_name, trade_amount, trade_time)
+                )
+
+    def _apply_record(
+        self, user_id: str, user_name: str, trade_amount: int, trade_time: datetime
+    ) -> None:
+        """在持有锁时将一笔交易累加到内存数据中"""
+        if trade_time.date() > self._today:
+            self._roll_to(trade_time.date())
+
+        self._user_names[user_id] = user_name
+        days_volume = self._daily_volume.setdefault(user_id, {})
+        days_volume[trade_time.date()] = (
+            days_volume.get(trade_time.date(), 0) + trade_amount
+        )
+        self._all_time_volume[user_id] = (
+            self._all_time_volume.get(user_id, 0) + trade_amount
+        )
+
+        for window, days in LEADERBOARD_WINDOWS.items():
+            top = [item for item in self._top[window] if item[0] != user_id]
+            volume = self._get_volume(user_id, days)
+            if len(top) >= self.size and volume <= top[-1][1]:
+                continue
+            top.append((user_id, volume))
+            top.sort(key=lambda item: item[1], reverse=True)
+            self._top[window] = top[: self.size]
+
+    def get_top(self, window: str) -> List[Dict[str, Any]]:
+        """获取时间范围内的前 K 名
+
+        Args:
+            window (str): 时间范围名称，必须为 LEADERBOARD_WINDOWS 中的键
+
+        Returns:
+            List[Dict[str, Any]]: 包含 rank、user_id、user_name 与 trade_amount
+        """
+        with self._lock:
+            today = datetime.now().date()
+            if today > self._today:
+                self._roll_to(today)
+            top = list(self._top[window])
+            user_names = self._user_names
+
+        return [
+            {
+                "rank": rank,
+                "user_id": user_id,
+                "user_name": user_names.get(user_id, "未知用户"),
+                "trade_amount": volume,
+            }
+            for rank, (user_id, volume) in enumerate(top, start=1)
+        ]
+
+    def reconcile(self) -> int:
+        """使用交易记录（包括已归档的记录）的完整聚合结果替换内存数据
+
+        总交易量与按天交易量分别聚合，结果以游标逐批读取，不受单个文档大小的限制
+        聚合期间记录的交易在替换后重新累加，不会因替换而丢失；
+        恰在聚合读取前提交、读取后才记录的交易会被重复累加，由下一次对账修正
+
+        Returns:
+            int: 与聚合结果不一致的用户数量
+        """
+        today = datetime.now().date()
+        start_time = datetime.combine(
+            today - timedelta(days=MAX_WINDOW_DAYS - 1), datetime.min.time()
+        )
+
+        with self._lock:
+            self._pending_records = []
+        try:
+            all_time_volume: Dict[str, int] = {
+                item["_id"]: item["trade_amount"]
+                for item in trade_data_db.aggregate(
+                    [
+                        {"$unionWith": trade_archive_db.name},
+                        {
+                            "$group": {
+                                "_id": "$user.id",
+                                "trade_amount": {"$sum": "$trade_amount"},
+                            }
+                        },
+                    ],
+                    allowDiskUse=True,
+                )
+            }
+            daily_volume: Dict[str, Dict[date, int]] = {}
+            for item in trade_data_db.aggregate(
+                [
+                    {"$match": {"trade_time": {"$gte": start_time}}},
+                    {
+                        "$unionWith": {
+                            "coll": trade_archive_db.name,
+                            "pipeline": [
+                                {"$match": {"trade_time": {"$gte": start_time}}}
+                            ],
+                        }
+                    },
+                    {
+                        "$group": {
+                            "_id": {
+                                "user_id": "$user.id",
+                                "day": {
+                                    "$dateTrunc": {"date": "$trade_time", "unit": "day"}
+                                },
+                            },
+                            "trade_amount": {"$sum": "$trade_amount"},
+                        }
+                    },
+                ],
+                allowDiskUse=True,
+            ):
+                daily_volume.setdefault(item["_id"]["user_id"], {})[
+                    item["_id"]["day"].date()
+                ] = item["trade_amount"]
+        except Exception:
+            with self._lock:
+                self._pending_records = None
+            raise
+
+        with self._lock:
+            origin_all_time_volume = self._all_time_volume
+            self._all_time_volume = all_time_volume
+            self._daily_volume = daily_volume
+            # 对账期间日期可能已由新交易推进，不能回退
+            self._roll_to(max(today, self._today))
+            for pending_record in self._pending_records or []:
+                self._apply_record(*pending_record)
+            self._pending_records = None
+
+            user_ids = self._all_time_volume.keys() | origin_all_time_volume.keys()
+            mismatched_count = sum(
+                1
+                for user_id in user_ids
+                if self._all_time_volume.get(user_id)
+                != origin_all_time_volume.get(user_id)
+            )
+            top_user_ids = {
+                user_id for top in self._top.values() for user_id, _ in top
+            }
+
+        # 只查询排行榜中用户的昵称，同时更新已修改的昵称
+        if top_user_ids:
+            for item in user_data_db.find(
+                {"_id": {"$in": [ObjectId(user_id) for user_id in top_user_ids]}},
+                {"user_name": 1},
+            ):
+                self._user_names[str(item["_id"])] = item["user_name"]
+
+        self.reconcile_time = datetime.now()
+        return mismatched_count
+
+
+leaderboard = Leaderboard()
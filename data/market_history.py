@@ -0,0 +1,164 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Literal, Optional
+
+from utils.cache import timeout_cache
+from utils.db import (
+    rebuild_state_db,
+    trade_archive_db,
+    trade_data_db,
+    trade_rollup_daily_db,
+    trade_rollup_hourly_db,
+)
+from utils.time_helper import get_now_without_mileseconds
+
+# 各时间范围使用的汇总粒度与时长，时长为 None 表示全部数据
+# 长时间范围使用按天汇总的数据，查询的记录数与短时间范围相当
+HISTORY_RANGES: Dict[str, Dict[str, Any]] = {
+    "24 小时": {"unit": "hour", "duration": timedelta(hours=24)},
+    "7 天": {"unit": "hour", "duration": timedelta(days=7)},
+    "30 天": {"unit": "day", "duration": timedelta(days=30)},
+    "90 天": {"unit": "day", "duration": timedelta(days=90)},
+    "全部": {"unit": "day", "duration": None},
+}
+
+ROLLUP_COLLECTIONS = {
+    "hour": trade_rollup_hourly_db,
+    "day": trade_rollup_daily_db,
+}
+# 汇总数据在 rebuild_state 集合中的记录 ID
+REBUILD_STATE_ID = "trade_rollups"
+
+
+def _truncate_time(time: datetime, unit: Literal["hour", "day"]) -> datetime:
+    if unit == "hour":
+        return time.replace(minute=0, second=0, microsecond=0)
+    return time.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def record_trade_rollup(
+    trade_type: Literal["buy", "sell"],
+    trade_time: datetime,
+    unit_price: float,
+    trade_amount: int,
+    total_price: float,
+    session=None,
+) -> None:
+    """将一笔交易累加到按小时与按天汇总的数据中
+
+    Args:
+        trade_type (Literal["buy", "sell"]): 交易类型
+        trade_time (datetime): 交易时间
+        unit_price (float): 单价
+        trade_amount (int): 交易量
+        total_price (float): 总价
+        session (ClientSession, optional): 数据库会话. Defaults to None.
+    """
+    for unit, collection in ROLLUP_COLLECTIONS.items():
+        collection.update_one(
+            {"trade_type": trade_type, "time": _truncate_time(trade_time, unit)},
+            {
+                "$inc": {
+                    "count": 1,
+                    "unit_price_sum": unit_price,
+                    "trade_amount": trade_amount,
+                    "total_price": total_price,
+                }
+            },
+            upsert=True,
+            session=session,
+        )
+
+
+def rebuild_trade_rollups() -> None:
+    """根据交易记录（包括已归档的记录）重新生成全部汇总数据
+
+    重建期间产生的交易可能被覆盖，应在服务停止或汇总数据为空时执行
+    开始时清除重建完成记录，全部完成后再写入，重建中断时下次启动会重新执行
+    """
+    rebuild_state_db.delete_one({"_id": REBUILD_STATE_ID})
+    for unit, collection in ROLLUP_COLLECTIONS.items():
+        collection.delete_many({})
+        trade_data_db.aggregate(
+            [
+                {"$unionWith": trade_archive_db.name},
+                {
+                    "$group": {
+                        "_id": {
+                            "trade_type": "$trade_type",
+                            "time": {
+                                "$dateTrunc": {"date": "$trade_time", "unit": unit}
+                            },
+                        },
+                        "count": {"$sum": 1},
+                        "unit_price_sum": {"$sum": "$unit_price"},
+                        "trade_amount": {"$sum": "$trade_amount"},
+                        "total_price": {"$sum": "$total_price"},
+                    }
+                },
+                {
+                    "$project": {
+                        "_id": 0,
+                        "trade_type": "$_id.trade_type",
+                        "time": "$_id.time",
+                        "count": 1,
+                        "unit_price_sum": 1,
+                        "trade_amount": 1,
+                        "total_price": 1,
+                    }
+                },
+                {"$merge": {"into": collection.name}},
+            ]
+        )
+
+    rebuild_state_db.update_one(
+        {"_id": REBUILD_STATE_ID},
+        {"$set": {"rebuilt_at": get_now_without_mileseconds()}},
+        upsert=True,
+    )
+
+
+def ensure_trade_rollups() -> None:
+    """汇总数据未完成过重建时重新生成汇总数据，用于首次部署与重建失败后的恢复
+
+    以重建完成记录而非汇总集合是否为空作为判断依据，
+    重建失败后新交易写入的汇总数据不会使重建被跳过
+    由启动流程在启动服务前同步执行，重建期间不会有新的交易写入
+    """
+    if rebuild_state_db.find_one({"_id": REBUILD_STATE_ID}):
+        return
+    rebuild_trade_rollups()
+
+
+@timeout_cache(60)
+def get_market_history(
+    trade_type: Literal["buy", "sell"], range_name: str
+) -> List[Dict[str, Any]]:
+    """获取指定时间范围内每个时间段的平均价格与交易量
+
+    Args:
+        trade_type (Literal["buy", "sell"]): 交易类型
+        range_name (str): 时间范围名称，必须为 HISTORY_RANGES 中的键
+
+    Returns:
+        List[Dict[str, Any]]: 按时间升序排列，包含 time、avg_price、trade_amount 与 total_price
+    """
+    history_range = HISTORY_RANGES[range_name]
+    duration: Optional[timedelta] = history_range["duration"]
+
+    filter: Dict[str, Any] = {"trade_type": trade_type}
+    if duration:
+        filter["time"] = {
+            "$gte": _truncate_time(datetime.now() - duration, history_range["unit"])
+        }
+
+    return [
+        {
+            "time": item["time"],
+            "avg_price": round(item["unit_price_sum"] / item["count"], 3),
+            "trade_amount": item["trade_amount"],
+            "total_price": round(item["total_price"], 2),
+        }
+        for item in ROLLUP_COLLECTIONS[history_range["unit"]]
+        .find(filter)
+        .sort([("time", 1)])
+    ]
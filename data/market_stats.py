@@ -0,0 +1,141 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Literal, Optional
+
+from data.order import OrderStatus
+from utils.cache import timeout_cache
+from utils.db import order_data_db, trade_data_db
+
+# 意向单单价分布直方图的区间边界，单价范围为 (0.05, 0.2]
+# 最后一个区间的上界略大于 0.2，使单价为 0.2 的意向单落入 [0.19, 0.2] 区间
+PRICE_BUCKET_BOUNDARIES: List[float] = [round(0.05 + 0.01 * i, 2) for i in range(15)]
+PRICE_BUCKET_BOUNDARIES.append(0.201)
+# 少于该数量的成交时，统计结果仅供参考
+MIN_RELIABLE_TRADE_COUNT = 3
+
+
+def _get_percentile_expr(percentile: float) -> Dict[str, Any]:
+    """获取从已排序的 prices 数组中取出指定百分位数的表达式，使用最近秩方法"""
+    return {
+        "$arrayElemAt": [
+            "$prices",
+            {
+                "$toInt": {
+                    "$round": [
+                        {"$multiply": [percentile, {"$subtract": ["$count", 1]}]},
+                        0,
+                    ]
+                }
+            },
+        ]
+    }
+
+
+def _get_trade_price_stats(
+    trade_type: Literal["buy", "sell"], start_time: datetime
+) -> Optional[Dict[str, Any]]:
+    result = list(
+        trade_data_db.aggregate(
+            [
+                {
+                    "$match": {
+                        "trade_type": trade_type,
+                        "trade_time": {"$gte": start_time},
+                    }
+                },
+                {"$sort": {"unit_price": 1}},
+                {
+                    "$group": {
+                        "_id": None,
+                        "prices": {"$push": "$unit_price"},
+                        "count": {"$sum": 1},
+                        "avg": {"$avg": "$unit_price"},
+                        "std_dev": {"$stdDevPop": "$unit_price"},
+                        "trade_amount": {"$sum": "$trade_amount"},
+                    }
+                },
+                {
+                    "$project": {
+                        "_id": 0,
+                        "count": 1,
+                        "avg": 1,
+                        "std_dev": 1,
+                        "trade_amount": 1,
+                        "median": _get_percentile_expr(0.5),
+                        "p10": _get_percentile_expr(0.1),
+                        "p90": _get_percentile_expr(0.9),
+                    }
+                },
+            ]
+        )
+    )
+    return result[0] if result else None
+
+
+def _get_active_order_price_histogram(
+    order_type: Literal["buy", "sell"]
+) -> List[Dict[str, Any]]:
+    buckets: Dict[float, int] = {
+        item["_id"]: item["count"]
+        for item in order_data_db.aggregate(
+            [
+                {
+                    "$match": {
+                        "status": OrderStatus.TREADING,
+                        "order.type": order_type,
+                    }
+                },
+                {
+                    "$bucket": {
+                        "groupBy": "$order.price.unit",
+                        "boundaries": PRICE_BUCKET_BOUNDARIES,
+                        "default": "other",
+                        "output": {"count": {"$sum": 1}},
+                    }
+                },
+            ]
+        )
+    }
+    # 补全没有意向单的区间，便于展示
+    return [
+        {
+            "min": lower,
+            "max": min(upper, 0.2),
+            "count": buckets.get(lower, 0),
+        }
+        for lower, upper in zip(PRICE_BUCKET_BOUNDARIES, PRICE_BUCKET_BOUNDARIES[1:])
+    ]
+
+
+@timeout_cache(60)
+def get_market_stats(trade_type: Literal["buy", "sell"]) -> Dict[str, Any]:
+    """获取 24 小时成交价格统计与交易中意向单的单价分布
+
+    Args:
+        trade_type (Literal["buy", "sell"]): 交易类型
+
+    Returns:
+        Dict[str, Any]: 包含 count、avg、median、p10、p90、std_dev、trade_amount、
+            reliable 与 histogram，没有成交时价格统计字段为 None
+    """
+    trade_stats = _get_trade_price_stats(
+        trade_type, datetime.now() - timedelta(days=1)
+    )
+    result: Dict[str, Any] = {
+        "count": 0,
+        "avg": None,
+        "median": None,
+        "p10": None,
+        "p90": None,
+        "std_dev": None,
+        "trade_amount": 0,
+    }
+    if trade_stats:
+        result["count"] = trade_stats["count"]
+        result["trade_amount"] = trade_stats["trade_amount"]
+        result["std_dev"] = round(trade_stats["std_dev"], 4)
+        for key in ("avg", "median", "p10", "p90"):
+            result[key] = round(trade_stats[key], 3)
+
+    result["reliable"] = result["count"] >= MIN_RELIABLE_TRADE_COUNT
+    result["histogram"] = _get_active_order_price_histogram(trade_type)
+    return result
@@ -0,0 +1,69 @@
+"""撮合查询：查找与指定意向单价格交叉的对手方意向单
+
+大量交易中意向单下的查询耗时测试见 `utils/benchmark.py`
+"""
+from typing import Dict, List
+
+from data.order import Order, OrderStatus
+from utils.db import order_data_db
+
+# 返回的对手方意向单数量上限
+DEFAULT_MATCH_LIMIT = 5
+
+
+def get_crossing_query(order_type: str, unit_price: float, user_id: str) -> Dict:
+    """获取对手方意向单的过滤条件与排序方式
+
+    买单查找单价不高于买价的卖单，按单价升序排列；卖单查找单价不低于卖价的买单，按单价降序排列；
+    单价相同时剩余可交易数量多的优先
+
+    查询由 (status, order.type, order.price.unit, order.amount.remaining) 索引支持，
+    两种方向各需一个索引，只扫描价格交叉范围内排名靠前的记录
+
+    Returns:
+        Dict: 包含 filter 与 sort
+    """
+    if order_type == "buy":
+        opposite_type = "sell"
+        price_filter = {"$lte": unit_price}
+        price_direction = 1
+    else:
+        opposite_type = "buy"
+        price_filter = {"$gte": unit_price}
+        price_direction = -1
+
+    return {
+        "filter": {
+            "status": OrderStatus.TREADING,
+            "order.type": opposite_type,
+            "order.price.unit": price_filter,
+            # 排除自己的意向单
+            "user.id": {"$ne": user_id},
+        },
+        "sort": [
+            ("order.price.unit", price_direction),
+            ("order.amount.remaining", -1),
+        ],
+    }
+
+
+def find_crossing_orders(order: Order, limit: int = DEFAULT_MATCH_LIMIT) -> List[Order]:
+    """查找与指定意向单价格交叉的对手方意向单
+
+    Args:
+        order (Order): 意向单
+        limit (int, optional): 数量上限. Defaults to DEFAULT_MATCH_LIMIT.
+
+    Returns:
+        List[Order]: 对手方意向单，最优价格在前
+    """
+    if order.status != OrderStatus.TREADING:
+        return []
+
+    query = get_crossing_query(order.type, order.unit_price, order.user_id)
+    return [
+        Order.from_db_data(item)
+        for item in order_data_db.find(query["filter"])
+        .sort(query["sort"])
+        .limit(limit)
+    ]
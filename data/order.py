@@ -1,26 +1,49 @@
 from datetime import datetime
 from enum import IntEnum
-from typing import Any, Dict, List, Literal
+from typing import Any, Dict, List, Literal, Optional, Tuple
 
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 
 from data._base import DataModel
+from data.user_stats import record_user_order
+from utils.broadcast import broadcast_hub
 from utils.config import config
-from utils.db import order_data_db
+from utils.db import (
+    client,
+    order_archive_db,
+    order_data_db,
+    supports_transactions,
+    trade_timeseries_enabled,
+)
 from utils.dict_helper import get_reversed_dict
 from utils.exceptions import (
     AmountIlliegalError,
     DuplicatedOrderError,
     OrderIDNotExistError,
+    OrderModifiedError,
     OrderStatusError,
     PriceIlliegalError,
 )
+from utils.log import run_logger
+from utils.pagination import (
+    Cursor,
+    get_keyset_filter,
+    get_keyset_sort,
+    get_next_cursor,
+)
 from utils.time_helper import (
     get_nearest_expire_time,
     get_now_without_mileseconds,
 )
 
 
+# 意向单变化事件的主题，事件为 {"action": "create" | "update" | "delete", "order": Order}
+# 事件中的 Order 为每个订阅者独立的副本
+ORDER_EVENTS_TOPIC = "orders"
+
+
 class OrderStatus(IntEnum):
     TREADING = 0
     FINISHED = 1
@@ -47,6 +70,8 @@ class Order(DataModel):
         "remaining_amount": "order.amount.remaining",
         "user_id": "user.id",
         "user_name": "user.name",
+        "user_jianshu_url": "user.jianshu.url",
+        "user_jianshu_name": "user.jianshu.name",
     }
     db_key_attr_mapping = get_reversed_dict(attr_db_key_mapping)
 
@@ -67,6 +92,9 @@ class Order(DataModel):
         remaining_amount: int,
         user_id: str,
         user_name: str,
+        # 较早的订单中没有冗余存储简书账号信息，由后台任务补全
+        user_jianshu_url: Optional[str] = None,
+        user_jianshu_name: Optional[str] = None,
     ) -> None:
         self.id = id
         self.status = status
@@ -84,12 +112,17 @@ class Order(DataModel):
         self.remaining_amount = remaining_amount
         self.user_id = user_id
         self.user_name = user_name
+        self.user_jianshu_url = user_jianshu_url
+        self.user_jianshu_name = user_jianshu_name
 
         super().__init__()
 
     @classmethod
     def from_id(cls, id: str) -> "Order":
         db_data = cls.db.find_one({"_id": ObjectId(id)})
+        if not db_data:
+            # 较早的终态订单可能已被归档
+            db_data = order_archive_db.find_one({"_id": ObjectId(id)})
         if not db_data:
             raise OrderIDNotExistError
         return cls.from_db_data(db_data)
@@ -100,14 +133,34 @@ class Order(DataModel):
 
         return User.from_id(self.user_id)
 
+    def _publish_event(self, action: Literal["create", "update", "delete"]) -> None:
+        """发布意向单变化事件，订阅的会话使用事件中的对象更新页面，无需再次查询
+
+        每个会话收到发布时意向单的独立副本
+        """
+        broadcast_hub.publish(
+            ORDER_EVENTS_TOPIC,
+            {"action": action, "order": self},
+            copy_event=lambda event: {**event, "order": event["order"].copy()},
+        )
+
+    @property
+    def is_user_jianshu_binded(self) -> bool:
+        return bool(self.user_jianshu_url)
+
     @property
     def trade_list(self):
         from data.trade import Trade
-        from utils.db import trade_data_db
+        from utils.db import trade_archive_db, trade_data_db
 
-        db_data_list: List[Dict] = trade_data_db.find(
-            {"order.id": self.id},
+        db_data_list: List[Dict] = list(
+            trade_data_db.find(
+                {"order.id": self.id},
+            )
         )
+        # 同一订单的交易记录会与订单一同归档
+        if not db_data_list and self.status != OrderStatus.TREADING:
+            db_data_list = list(trade_archive_db.find({"order.id": self.id}))
         return [Trade.from_db_data(item) for item in db_data_list]
 
     @property
@@ -136,46 +189,51 @@ class Order(DataModel):
         if round(unit_price, 3) != unit_price:  # 大于三位小数
             raise PriceIlliegalError("价格只支持三位小数")
 
-        # 该用户已经有同种交易单
-        # user_obj 的 buy_order 和 sell_order 属性在没有交易单时返回 None
-        if (order_type == "buy" and user_obj.buy_order) or (
-            order_type == "sell" and user_obj.sell_order
-        ):
-            raise DuplicatedOrderError("该用户已存在该类型交易单")
-
         total_price = round(unit_price * total_amount, 2)
         now_time = get_now_without_mileseconds()
-        insert_result = cls.db.insert_one(
-            {
-                "publish_time": now_time,
-                "effective_hours": config.default_order_effective_hours,
-                "expire_time": get_nearest_expire_time(
-                    now_time, config.default_order_effective_hours
-                ),
-                "finish_time": None,
-                "delete_time": None,
-                "status": OrderStatus.TREADING,
-                "order": {
-                    "type": order_type,
-                    "price": {
-                        "unit": unit_price,
-                        "total": total_price,
+        # 同一用户同种类型的交易中交易单由部分唯一索引保证唯一，发布只需一次写入
+        try:
+            # 由写入的数据直接构建订单对象，无需再次查询
+            order = cls.insert(
+                {
+                    "publish_time": now_time,
+                    "effective_hours": config.default_order_effective_hours,
+                    "expire_time": get_nearest_expire_time(
+                        now_time, config.default_order_effective_hours
+                    ),
+                    "finish_time": None,
+                    "delete_time": None,
+                    "status": OrderStatus.TREADING,
+                    "order": {
+                        "type": order_type,
+                        "price": {
+                            "unit": unit_price,
+                            "total": total_price,
+                        },
+                        "amount": {
+                            "total": total_amount,
+                            "traded": 0,
+                            "remaining": total_amount,
+                        },
                     },
-                    "amount": {
-                        "total": total_amount,
-                        "traded": 0,
-                        "remaining": total_amount,
+                    # 冗余存储用户信息，列表页无需再查询用户数据
+                    "user": {
+                        "id": user_obj.id,
+                        "name": user_obj.name,
+                        "jianshu": {
+                            "url": user_obj.jianshu_url,
+                            "name": user_obj.jianshu_name,
+                        },
                     },
-                },
-                "user": {
-                    "id": user_obj.id,
-                    "name": user_obj.name,
-                },
-            }
-        )
+                }
+            )
+        except DuplicateKeyError:
+            raise DuplicatedOrderError("该用户已存在该类型交易单")
 
+        record_user_order(order.user_id, "published")
+        order._publish_event("create")
         # 返回新创建的订单对象
-        return cls.from_id(insert_result.inserted_id)
+        return order
 
     def change_unit_price(self, new_unit_price: float) -> None:
         if new_unit_price is None:
@@ -190,6 +248,85 @@ class Order(DataModel):
         self.unit_price = new_unit_price
         self.total_price = total_price
         self.sync()
+        self._publish_event("update")
+
+    def _apply_trade(self, trade_amount: int, session=None) -> Dict:
+        """在数据库中原子地增加已交易量，余量为 0 时将交易单状态置为已完成
+
+        仅当交易单仍在交易中、且已交易量与当前对象一致时才会更新，避免并发修改时丢失更新
+
+        Args:
+            trade_amount (int): 本次交易量
+            session (ClientSession, optional): 数据库会话. Defaults to None.
+
+        Raises:
+            OrderModifiedError: 交易单已被修改或状态不为交易中
+
+        Returns:
+            Dict: 更新后的交易单数据
+        """
+        is_finished = {"$eq": ["$order.amount.remaining", 0]}
+        db_data = self.db.find_one_and_update(
+            {
+                "_id": self.object_id,
+                "status": OrderStatus.TREADING,
+                "order.amount.traded": self.traded_amount,
+                "order.amount.remaining": {"$gte": trade_amount},
+            },
+            [
+                {
+                    "$set": {
+                        "order.amount.traded": {
+                            "$add": ["$order.amount.traded", trade_amount],
+                        },
+                        "order.amount.remaining": {
+                            "$subtract": ["$order.amount.remaining", trade_amount],
+                        },
+                    }
+                },
+                # 余量为 0 时将交易单状态置为已完成
+                {
+                    "$set": {
+                        "status": {
+                            "$cond": [is_finished, OrderStatus.FINISHED, "$status"],
+                        },
+                        "finish_time": {
+                            "$cond": [
+                                is_finished,
+                                get_now_without_mileseconds(),
+                                "$finish_time",
+                            ],
+                        },
+                    }
+                },
+            ],
+            return_document=ReturnDocument.AFTER,
+            session=session,
+        )
+        if not db_data:
+            raise OrderModifiedError("交易单已被修改或不在交易中")
+        return db_data
+
+    def _revert_trade(self, db_data: Dict) -> None:
+        """撤销 `_apply_trade` 对数据库的修改，用于不支持事务时的补偿操作
+
+        Args:
+            db_data (Dict): `_apply_trade` 返回的交易单数据
+        """
+        self.db.update_one(
+            {
+                "_id": self.object_id,
+                "order.amount.traded": db_data["order"]["amount"]["traded"],
+            },
+            {
+                "$set": {
+                    "status": self.status,
+                    "finish_time": self.finish_time,
+                    "order.amount.traded": self.traded_amount,
+                    "order.amount.remaining": self.remaining_amount,
+                }
+            },
+        )
 
     def change_traded_amount(self, new_traded_amount: int) -> None:
         if new_traded_amount is None:
@@ -204,26 +341,56 @@ class Order(DataModel):
         if trade_amount <= 0:
             raise AmountIlliegalError("不能将已交易量改为低于当前值的数值")
 
-        new_remaining_amount: int = self.total_amount - new_traded_amount
-
-        # 更新订单状态
-        self.traded_amount = new_traded_amount
-        self.remaining_amount = new_remaining_amount
-        # 创建交易
         from data.trade import Trade
 
-        Trade.create(
-            trade_type=self.type,
-            unit_price=self.unit_price,
-            trade_amount=trade_amount,
-            order_obj=self,
+        def create_trade(session=None) -> Trade:
+            return Trade.create(
+                trade_type=self.type,
+                unit_price=self.unit_price,
+                trade_amount=trade_amount,
+                order_obj=self,
+                session=session,
+            )
+
+        def record_trade_in_transaction(session) -> Dict:
+            db_data = self._apply_trade(trade_amount, session)
+            create_trade(session).record_summaries(session)
+            return db_data
+
+        # 时序集合不支持在事务中写入
+        if supports_transactions() and not trade_timeseries_enabled:
+            # 交易单更新、交易记录、汇总数据与用户统计写入在同一事务中完成
+            with client.start_session() as session:
+                db_data = session.with_transaction(record_trade_in_transaction)
+        else:
+            # 不支持事务时，先通过条件更新占用交易量，写入交易记录失败时再进行补偿
+            db_data = self._apply_trade(trade_amount)
+            try:
+                trade = create_trade()
+            except Exception:
+                self._revert_trade(db_data)
+                raise
+            # 交易单与交易记录均已写入，汇总数据与用户统计写入失败时不撤销交易，
+            # 可通过重建修正
+            try:
+                trade.record_summaries()
+            except Exception as e:
+                run_logger.error(f"写入交易 {trade.id} 的汇总数据失败：{e!r}")
+
+        # 使用数据库返回的数据更新对象，无需再次查询
+        self._update_from_db_data(db_data)
+        if self.status == OrderStatus.FINISHED:
+            record_user_order(self.user_id, "finished")
+        self._publish_event("update")
+
+        # 交易记录写入成功后再更新内存中的排行榜与价格提醒，事务回滚的交易不会计入
+        from data.leaderboard import leaderboard
+        from data.price_alert import check_price_alerts
+
+        leaderboard.record(
+            self.user_id, self.user_name, trade_amount, get_now_without_mileseconds()
         )
-        # 如果余量为 0，将交易单状态置为已完成
-        if new_remaining_amount == 0:
-            self.status = OrderStatus.FINISHED
-            self.finish_time = get_now_without_mileseconds()
-
-        self.sync()
+        check_price_alerts(self.type, self.unit_price)
 
     def set_all_traded(self) -> None:
         # 将已交易数量设为订单总量，即全部简书贝都已被交易
@@ -237,6 +404,15 @@ class Order(DataModel):
         self.status = OrderStatus.EXPIRED
         self.expire_time = get_now_without_mileseconds()
         self.sync()
+        record_user_order(self.user_id, "expired")
+        self._publish_event("update")
+
+    def delete(self) -> None:
+        super().delete()
+        # 被删除的意向单无法在重建统计数据时计入，此处撤销其发布计数以保持一致
+        if self.status == OrderStatus.TREADING:
+            record_user_order(self.user_id, "published", -1)
+        self._publish_event("delete")
 
 
 def get_active_orders_list(
@@ -271,3 +447,34 @@ def get_active_orders_list(
         ).limit(limit)
     )
     return [Order.from_db_data(item) for item in db_data_list]
+
+
+def get_active_orders_page(
+    order_type: Literal["buy", "sell"], limit: int, cursor: Optional[Cursor] = None
+) -> Tuple[List[Order], Optional[Cursor]]:
+    """使用键集分页获取交易中的订单列表
+
+    买单按价格降序排列，卖单按价格升序排列，价格相同时按 _id 排序
+
+    Args:
+        order_type (Literal["buy", "sell"]): 订单类型
+        limit (int): 每页数量
+        cursor (Optional[Cursor], optional): 上一页返回的游标，为 None 时返回第一页. Defaults to None.
+
+    Returns:
+        Tuple[List[Order], Optional[Cursor]]: 订单列表与下一页的游标，没有下一页时游标为 None
+    """
+    direction: Literal[1, -1] = -1 if order_type == "buy" else 1
+    filter: Dict[str, Any] = {
+        "status": OrderStatus.TREADING,
+        "order.type": order_type,
+        **get_keyset_filter("order.price.unit", direction, cursor),
+    }
+
+    db_data_list: List[Dict] = list(
+        order_data_db.find(filter)
+        .sort(get_keyset_sort("order.price.unit", direction))
+        .limit(limit + 1)
+    )
+    next_cursor = get_next_cursor(db_data_list, "order.price.unit", limit)
+    return ([Order.from_db_data(item) for item in db_data_list], next_cursor)
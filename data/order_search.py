@@ -0,0 +1,157 @@
+"""交易中意向单搜索：按单价、剩余数量与发布时间范围过滤，按指定字段排序
+
+每个查询根据排序字段映射到一个 (status, order.type, 排序字段, _id, 其余可过滤字段) 复合索引，
+并通过 hint 固定使用该索引：等值条件与排序字段上的范围条件作为索引扫描的边界，
+排序由索引顺序提供，无需在内存中排序；其余范围条件在索引项上过滤，只有是否绑定简书账号需要读取文档判断
+
+大量交易中意向单下的搜索耗时测试见 `utils/benchmark.py`
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+from pymongo.errors import OperationFailure
+
+from data.order import Order, OrderStatus
+from utils.db import get_order_search_index_keys, order_data_db
+from utils.log import run_logger
+from utils.pagination import (
+    Cursor,
+    get_keyset_filter,
+    get_keyset_sort,
+    get_next_cursor,
+)
+
+# 排序方式与对应的排序字段、方向
+SORT_KEYS: Dict[str, Tuple[str, Literal[1, -1]]] = {
+    "price_asc": ("order.price.unit", 1),
+    "price_desc": ("order.price.unit", -1),
+    "remaining_desc": ("order.amount.remaining", -1),
+    "publish_time_desc": ("publish_time", -1),
+}
+
+
+@dataclass
+class OrderSearchQuery:
+    order_type: Literal["buy", "sell"]
+    min_unit_price: Optional[float] = None
+    max_unit_price: Optional[float] = None
+    min_remaining_amount: Optional[int] = None
+    max_remaining_amount: Optional[int] = None
+    publish_time_start: Optional[datetime] = None
+    publish_time_end: Optional[datetime] = None
+    jianshu_binded_only: bool = False
+    sort_key: str = "price_asc"
+
+
+def _get_range_filter(min_value: Any, max_value: Any) -> Dict[str, Any]:
+    result: Dict[str, Any] = {}
+    if min_value is not None:
+        result["$gte"] = min_value
+    if max_value is not None:
+        result["$lte"] = max_value
+    return result
+
+
+def get_index_name(keys: List[Tuple[str, int]]) -> str:
+    """获取索引键对应的默认索引名，与 MongoDB 自动生成的名称相同"""
+    return "_".join(f"{field}_{direction}" for field, direction in keys)
+
+
+def plan_order_search(
+    query: OrderSearchQuery, cursor: Optional[Cursor] = None
+) -> Dict[str, Any]:
+    """为搜索条件生成查询计划
+
+    Args:
+        query (OrderSearchQuery): 搜索条件
+        cursor (Optional[Cursor], optional): 上一页返回的游标. Defaults to None.
+
+    Raises:
+        ValueError: 排序方式不存在
+
+    Returns:
+        Dict[str, Any]: 包含 filter、sort、hint 与 index_name
+    """
+    if query.sort_key not in SORT_KEYS:
+        raise ValueError(f"排序方式 {query.sort_key} 不存在")
+    sort_field, direction = SORT_KEYS[query.sort_key]
+
+    ranges: Dict[str, Dict[str, Any]] = {
+        "order.price.unit": _get_range_filter(
+            query.min_unit_price, query.max_unit_price
+        ),
+        "order.amount.remaining": _get_range_filter(
+            query.min_remaining_amount, query.max_remaining_amount
+        ),
+        "publish_time": _get_range_filter(
+            query.publish_time_start, query.publish_time_end
+        ),
+    }
+    if cursor:
+        # 将游标作为排序字段上的边界，索引扫描从上一页的末尾开始，
+        # 之后由键集分页条件排除边界上已返回的记录
+        bound_operator = "$gte" if direction == 1 else "$lte"
+        current_bound = ranges[sort_field].get(bound_operator)
+        cursor_value = cursor[0]
+        if current_bound is None or (
+            cursor_value > current_bound
+            if direction == 1
+            else cursor_value < current_bound
+        ):
+            ranges[sort_field][bound_operator] = cursor_value
+
+    filter: Dict[str, Any] = {
+        "status": OrderStatus.TREADING,
+        "order.type": query.order_type,
+        **{field: condition for field, condition in ranges.items() if condition},
+        **get_keyset_filter(sort_field, direction, cursor),
+    }
+    if query.jianshu_binded_only:
+        filter["user.jianshu.url"] = {"$nin": [None, ""]}
+
+    index_keys = get_order_search_index_keys(sort_field)
+    return {
+        "filter": filter,
+        "sort": get_keyset_sort(sort_field, direction),
+        "hint": index_keys,
+        "index_name": get_index_name(index_keys),
+    }
+
+
+def search_active_orders(
+    query: OrderSearchQuery, limit: int, cursor: Optional[Cursor] = None
+) -> Tuple[List[Order], Optional[Cursor], str]:
+    """使用键集分页搜索交易中的意向单
+
+    Args:
+        query (OrderSearchQuery): 搜索条件
+        limit (int): 每页数量
+        cursor (Optional[Cursor], optional): 上一页返回的游标，为 None 时返回第一页. Defaults to None.
+
+    Returns:
+        Tuple[List[Order], Optional[Cursor], str]: 意向单列表、下一页的游标与使用的索引名
+    """
+    plan = plan_order_search(query, cursor)
+    index_name: str = plan["index_name"]
+    try:
+        db_data_list: List[Dict] = list(
+            order_data_db.find(plan["filter"])
+            .sort(plan["sort"])
+            .hint(plan["hint"])
+            .limit(limit + 1)
+        )
+    except OperationFailure as e:
+        # 索引在启动前创建，此处只在其被手动删除等情况下发生，由数据库自行选择索引
+        run_logger.warning(f"意向单搜索无法使用索引 {index_name}：{e}")
+        db_data_list = list(
+            order_data_db.find(plan["filter"]).sort(plan["sort"]).limit(limit + 1)
+        )
+        index_name = "未使用指定索引"
+    next_cursor = get_next_cursor(db_data_list, SORT_KEYS[query.sort_key][0], limit)
+    return (
+        [Order.from_db_data(item) for item in db_data_list],
+        next_cursor,
+        index_name,
+    )
+
@@ -3,7 +3,7 @@ from typing import Any, Dict, List, Literal, Union
 
 from data.order import OrderStatus
 from utils.cache import timeout_cache
-from utils.db import order_data_db, trade_data_db
+from utils.db import order_data_db, trade_archive_db, trade_data_db
 
 
 def get_in_trading_orders_count(order_type: Literal["buy", "sell", "all"]) -> int:
@@ -56,6 +56,8 @@ def get_total_traded_amount() -> int:
     result = list(
         trade_data_db.aggregate(
             [
+                # 总计包括已归档的交易记录
+                {"$unionWith": trade_archive_db.name},
                 {
                     "$group": {
                         "_id": None,
@@ -77,6 +79,8 @@ def get_total_traded_price() -> float:
     result = list(
         trade_data_db.aggregate(
             [
+                # 总计包括已归档的交易记录
+                {"$unionWith": trade_archive_db.name},
                 {
                     "$group": {
                         "_id": None,
@@ -202,150 +206,117 @@ def get_24h_traded_FTN_avg_price(
     )
 
 
+def get_per_time_unit_pipeline(
+    trade_type: Literal["buy", "sell"],
+    start_time: datetime,
+    unit: Literal["hour", "day"],
+    result_field: str,
+    accumulator: Dict[str, Any],
+) -> List[Dict]:
+    """构建按时间单位分组统计交易数据的聚合管道
+
+    Args:
+        trade_type (Literal["buy", "sell"]): 交易类型
+        start_time (datetime): 统计开始时间
+        unit (Literal["hour", "day"]): 分组时间单位
+        result_field (str): 结果字段名
+        accumulator (Dict[str, Any]): 分组累加器，如 {"$sum": "$trade_amount"}
+
+    Returns:
+        List[Dict]: 聚合管道
+    """
+    return [
+        {
+            "$match": {
+                "trade_time": {
+                    "$gte": start_time,
+                },
+                "trade_type": trade_type,
+            }
+        },
+        {
+            "$group": {
+                "_id": {
+                    "$dateTrunc": {
+                        "date": "$trade_time",
+                        "unit": unit,
+                    },
+                },
+                result_field: accumulator,
+            }
+        },
+        {
+            "$sort": {
+                "_id": 1,
+            },
+        },
+    ]
+
+
+@timeout_cache(60)
 def get_per_hour_trade_amount(
     trade_type: Literal["buy", "sell"], hours: int
 ) -> List[Dict]:
     return list(
         trade_data_db.aggregate(
-            [
-                {
-                    "$match": {
-                        "trade_time": {
-                            "$gte": datetime.now() - timedelta(hours=hours),
-                        },
-                        "trade_type": trade_type,
-                    }
-                },
-                {
-                    "$group": {
-                        "_id": {
-                            "$dateTrunc": {
-                                "date": "$trade_time",
-                                "unit": "hour",
-                            },
-                        },
-                        "traded_amount": {
-                            "$sum": "$trade_amount",
-                        },
-                    }
-                },
-                {
-                    "$sort": {
-                        "_id": 1,
-                    }
-                },
-            ]
+            get_per_time_unit_pipeline(
+                trade_type,
+                datetime.now() - timedelta(hours=hours),
+                "hour",
+                "traded_amount",
+                {"$sum": "$trade_amount"},
+            )
         )
     )
 
 
+@timeout_cache(60)
 def get_per_day_trade_amount(
     trade_type: Literal["buy", "sell"], days: int
 ) -> List[Dict]:
     return list(
         trade_data_db.aggregate(
-            [
-                {
-                    "$match": {
-                        "trade_time": {
-                            "$gte": datetime.now() - timedelta(days=days),
-                        },
-                        "trade_type": trade_type,
-                    }
-                },
-                {
-                    "$group": {
-                        "_id": {
-                            "$dateTrunc": {
-                                "date": "$trade_time",
-                                "unit": "day",
-                            },
-                        },
-                        "traded_amount": {
-                            "$sum": "$trade_amount",
-                        },
-                    }
-                },
-                {
-                    "$sort": {
-                        "_id": 1,
-                    },
-                },
-            ]
+            get_per_time_unit_pipeline(
+                trade_type,
+                datetime.now() - timedelta(days=days),
+                "day",
+                "traded_amount",
+                {"$sum": "$trade_amount"},
+            )
         )
     )
 
 
+@timeout_cache(60)
 def get_per_hour_trade_avg_price(
     trade_type: Literal["buy", "sell"], hours: int
 ) -> List[Dict]:
     return list(
         trade_data_db.aggregate(
-            [
-                {
-                    "$match": {
-                        "trade_time": {
-                            "$gte": datetime.now() - timedelta(hours=hours),
-                        },
-                        "trade_type": trade_type,
-                    }
-                },
-                {
-                    "$group": {
-                        "_id": {
-                            "$dateTrunc": {
-                                "date": "$trade_time",
-                                "unit": "hour",
-                            },
-                        },
-                        "avg_price": {
-                            "$avg": "$unit_price",
-                        },
-                    }
-                },
-                {
-                    "$sort": {
-                        "_id": 1,
-                    },
-                },
-            ]
+            get_per_time_unit_pipeline(
+                trade_type,
+                datetime.now() - timedelta(hours=hours),
+                "hour",
+                "avg_price",
+                {"$avg": "$unit_price"},
+            )
         )
     )
 
 
+@timeout_cache(60)
 def get_per_day_trade_avg_price(
     trade_type: Literal["buy", "sell"], days: int
 ) -> List[Dict]:
     return list(
-        trade_data_db.aggretgate(
-            [
-                {
-                    "$match": {
-                        "trade_time": {
-                            "$gte": datetime.now() - timedelta(days=days),
-                        },
-                        "trade_type": trade_type,
-                    }
-                },
-                {
-                    "$group": {
-                        "_id": {
-                            "$dateTrunc": {
-                                "date": "$trade_time",
-                                "unit": "day",
-                            },
-                        },
-                        "avg_price": {
-                            "$avg": "$unit_price",
-                        },
-                    }
-                },
-                {
-                    "$sort": {
-                        "_id": 1,
-                    },
-                },
-            ]
+        trade_data_db.aggregate(
+            get_per_time_unit_pipeline(
+                trade_type,
+                datetime.now() - timedelta(days=days),
+                "day",
+                "avg_price",
+                {"$avg": "$unit_price"},
+            )
         )
     )
 
@@ -0,0 +1,296 @@
+"""价格提醒：成交价达到用户设定的阈值时，向用户推送站内提醒
+
+交易中的提醒在启动时加载到内存，按交易类型与方向分别存放在堆中，每笔成交只弹出被触发的提醒，
+检查耗时为 O(k log n)，与提醒总数无关
+"""
+from datetime import datetime
+from enum import IntEnum
+from heapq import heappop, heappush
+from threading import Lock
+from typing import Dict, List, Literal, Optional, Set, Tuple
+
+from bson import ObjectId
+
+from data._base import DataModel
+from utils.broadcast import broadcast_hub
+from utils.db import price_alert_data_db
+from utils.dict_helper import get_reversed_dict
+from utils.exceptions import (
+    PriceAlertIDNotExistError,
+    PriceIlliegalError,
+    TooManyPriceAlertsError,
+)
+from utils.log import run_logger
+from utils.time_helper import get_now_without_mileseconds
+
+# 每个用户最多同时设置的提醒数量
+MAX_ACTIVE_ALERTS_PER_USER = 10
+
+
+class PriceAlertStatus(IntEnum):
+    ACTIVE = 0
+    TRIGGERED = 1
+    CANCELED = 2
+
+
+def get_price_alert_topic(user_id: str) -> str:
+    """获取用户价格提醒事件的主题，事件为被触发的 PriceAlert 对象"""
+    return f"price_alerts_{user_id}"
+
+
+class PriceAlert(DataModel):
+    db = price_alert_data_db
+    attr_db_key_mapping: Dict[str, str] = {
+        "id": "_id",
+        "status": "status",
+        "trade_type": "trade_type",
+        "direction": "direction",
+        "threshold": "threshold",
+        "create_time": "create_time",
+        "trigger_time": "trigger.time",
+        "trigger_price": "trigger.price",
+        "user_id": "user.id",
+    }
+    db_key_attr_mapping = get_reversed_dict(attr_db_key_mapping)
+
+    def __init__(
+        self,
+        id: str,
+        status: int,
+        trade_type: Literal["buy", "sell"],
+        direction: Literal["above", "below"],
+        threshold: float,
+        create_time: datetime,
+        user_id: str,
+        trigger_time: Optional[datetime] = None,
+        trigger_price: Optional[float] = None,
+    ) -> None:
+        self.id = id
+        self.status = status
+        self.trade_type = trade_type
+        # above：成交价不低于阈值时触发，below：成交价不高于阈值时触发
+        self.direction = direction
+        self.threshold = threshold
+        self.create_time = create_time
+        self.user_id = user_id
+        self.trigger_time = trigger_time
+        self.trigger_price = trigger_price
+
+        super().__init__()
+
+    @classmethod
+    def from_id(cls, id: str) -> "PriceAlert":
+        db_data = cls.db.find_one({"_id": ObjectId(id)})
+        if not db_data:
+            raise PriceAlertIDNotExistError
+        return cls.from_db_data(db_data)
+
+    @property
+    def description(self) -> str:
+        return (
+            f"{'买单' if self.trade_type == 'buy' else '卖单'}成交价"
+            f"{'不低于' if self.direction == 'above' else '不高于'} {self.threshold}"
+        )
+
+    @classmethod
+    def create(
+        cls,
+        trade_type: Literal["buy", "sell"],
+        direction: Literal["above", "below"],
+        threshold: float,
+        user_obj,
+    ) -> "PriceAlert":
+        if trade_type not in {"buy", "sell"}:
+            raise TypeError("参数 trade_type 必须为 buy 或 sell")
+        if direction not in {"above", "below"}:
+            raise TypeError("参数 direction 必须为 above 或 below")
+        if threshold is None:
+            raise PriceIlliegalError("阈值不能为空")
+        if not 0.05 < threshold <= 0.2:
+            raise PriceIlliegalError("阈值必须在 0.05 - 0.2 之间")
+        if round(threshold, 3) != threshold:  # 大于三位小数
+            raise PriceIlliegalError("阈值只支持三位小数")
+
+        # 数量检查与写入不是原子操作，同一用户并发添加时可能略微超出上限，
+        # 提醒只由用户本人添加，不做额外处理
+        active_count = cls.db.count_documents(
+            {"user.id": user_obj.id, "status": PriceAlertStatus.ACTIVE}
+        )
+        if active_count >= MAX_ACTIVE_ALERTS_PER_USER:
+            raise TooManyPriceAlertsError(
+                f"最多只能同时设置 {MAX_ACTIVE_ALERTS_PER_USER} 条价格提醒"
+            )
+
+        alert = cls.insert(
+            {
+                "status": PriceAlertStatus.ACTIVE,
+                "trade_type": trade_type,
+                "direction": direction,
+                "threshold": threshold,
+                "create_time": get_now_without_mileseconds(),
+                "trigger": {
+                    "time": None,
+                    "price": None,
+                },
+                "user": {
+                    "id": user_obj.id,
+                },
+            }
+        )
+        price_alert_index.add(alert)
+        return alert
+
+    def cancel(self) -> bool:
+        """取消交易中的提醒
+
+        对象中的状态可能已过时，仅当数据库中的提醒仍在交易中时才会取消，
+        避免覆盖期间已写入的触发记录
+
+        Returns:
+            bool: 是否取消成功，提醒已被触发或取消时为 False
+        """
+        update_result = self.db.update_one(
+            {"_id": self.object_id, "status": PriceAlertStatus.ACTIVE},
+            {"$set": {"status": PriceAlertStatus.CANCELED}},
+        )
+        if not update_result.modified_count:
+            return False
+
+        self._update_from_db_data({"status": PriceAlertStatus.CANCELED})
+        price_alert_index.remove(self.id)
+        return True
+
+
+# 堆中的元素为 (排序键, 提醒 ID)
+# above 堆以阈值为键，堆顶为最低阈值；below 堆以阈值的相反数为键，堆顶为最高阈值
+HeapItem = Tuple[float, str]
+
+
+class PriceAlertIndex:
+    """交易中价格提醒的内存索引
+
+    取消的提醒只记录 ID，在其到达堆顶时再丢弃，取消操作无需在堆中查找
+    """
+
+    def __init__(self) -> None:
+        self._heaps: Dict[Tuple[str, str], List[HeapItem]] = {
+            (trade_type, direction): []
+            for trade_type in ("buy", "sell")
+            for direction in ("above", "below")
+        }
+        self._alerts: Dict[str, PriceAlert] = {}
+        self._removed_ids: Set[str] = set()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._alerts)
+
+    def load(self) -> None:
+        """从数据库加载所有交易中的价格提醒"""
+        with self._lock:
+            for heap in self._heaps.values():
+                heap.clear()
+            self._alerts.clear()
+            self._removed_ids.clear()
+
+        for db_data in price_alert_data_db.find({"status": PriceAlertStatus.ACTIVE}):
+            self.add(PriceAlert.from_db_data(db_data))
+
+    def add(self, alert: PriceAlert) -> None:
+        key = alert.threshold if alert.direction == "above" else -alert.threshold
+        with self._lock:
+            self._alerts[alert.id] = alert
+            self._removed_ids.discard(alert.id)
+            heappush(self._heaps[(alert.trade_type, alert.direction)], (key, alert.id))
+
+    def remove(self, alert_id: str) -> None:
+        with self._lock:
+            if self._alerts.pop(alert_id, None):
+                self._removed_ids.add(alert_id)
+
+    def pop_triggered(
+        self, trade_type: Literal["buy", "sell"], unit_price: float
+    ) -> List[PriceAlert]:
+        """弹出被该成交价触发的提醒
+
+        Args:
+            trade_type (Literal["buy", "sell"]): 交易类型
+            unit_price (float): 成交单价
+
+        Returns:
+            List[PriceAlert]: 被触发的提醒
+        """
+        result: List[PriceAlert] = []
+        with self._lock:
+            for direction, limit in (("above", unit_price), ("below", -unit_price)):
+                heap = self._heaps[(trade_type, direction)]
+                while heap and heap[0][0] <= limit:
+                    _, alert_id = heappop(heap)
+                    if alert_id in self._removed_ids:
+                        self._removed_ids.discard(alert_id)
+                        continue
+                    result.append(self._alerts.pop(alert_id))
+        return result
+
+
+price_alert_index = PriceAlertIndex()
+
+
+def check_price_alerts(trade_type: Literal["buy", "sell"], unit_price: float) -> int:
+    """检查成交价触发的提醒，更新提醒状态并推送给对应用户
+
+    Args:
+        trade_type (Literal["buy", "sell"]): 交易类型
+        unit_price (float): 成交单价
+
+    Returns:
+        int: 被触发的提醒数量
+    """
+    triggered_alerts = price_alert_index.pop_triggered(trade_type, unit_price)
+    if not triggered_alerts:
+        return 0
+
+    now_time = get_now_without_mileseconds()
+    triggered_count = 0
+    for alert in triggered_alerts:
+        # 逐条条件更新，弹出后被取消的提醒不会被改为已触发，也不会推送
+        try:
+            update_result = price_alert_data_db.update_one(
+                {"_id": alert.object_id, "status": PriceAlertStatus.ACTIVE},
+                {
+                    "$set": {
+                        "status": PriceAlertStatus.TRIGGERED,
+                        "trigger.time": now_time,
+                        "trigger.price": unit_price,
+                    }
+                },
+            )
+        except Exception as e:
+            # 写入失败时放回索引，等待下一笔成交再次触发
+            price_alert_index.add(alert)
+            run_logger.error(f"更新价格提醒状态失败：{type(e).__name__}")
+            continue
+        if not update_result.modified_count:
+            continue
+
+        alert._update_from_db_data(
+            {
+                "status": PriceAlertStatus.TRIGGERED,
+                "trigger": {"time": now_time, "price": unit_price},
+            }
+        )
+        broadcast_hub.publish(get_price_alert_topic(alert.user_id), alert)
+        triggered_count += 1
+    return triggered_count
+
+
+def get_user_price_alerts(user_id: str, limit: int = 50) -> List[PriceAlert]:
+    """获取用户未取消的价格提醒，交易中的在前，其余按创建时间由近到远排列"""
+    return [
+        PriceAlert.from_db_data(item)
+        for item in price_alert_data_db.find(
+            {"user.id": user_id, "status": {"$ne": PriceAlertStatus.CANCELED}}
+        )
+        .sort([("status", 1), ("create_time", -1)])
+        .limit(limit)
+    ]
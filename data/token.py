@@ -1,6 +1,8 @@
+from collections import OrderedDict
 from datetime import datetime
+from threading import Lock
 from time import time
-from typing import Dict, List
+from typing import Dict, List, Optional, Set, Tuple
 
 from bson import ObjectId
 
@@ -20,6 +22,74 @@ def generate_token(uid: str) -> str:
     return get_hash(str(time()) + uid)
 
 
+class TokenCache:
+    """进程内 Token 缓存，避免每次访问页面都查询数据库
+
+    Token 被撤销时必须调用对应的失效方法，以保持缓存与数据库一致
+    """
+
+    def __init__(self, max_size: int, lifetime: int) -> None:
+        self._max_size = max_size
+        self._lifetime = lifetime
+        self._lock = Lock()
+        # Token 值 -> (缓存时间, 数据库数据)
+        self._data: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        # UID -> Token 值集合，用于批量失效
+        self._user_tokens: Dict[str, Set[str]] = {}
+
+    def get(self, token_value: str) -> Optional[Dict]:
+        with self._lock:
+            item = self._data.get(token_value)
+            if not item:
+                return None
+            cached_time, db_data = item
+            if time() - cached_time > self._lifetime:  # 缓存已过期
+                self._remove(token_value)
+                return None
+            self._data.move_to_end(token_value)
+            return db_data
+
+    def set(self, token_value: str, db_data: Dict) -> None:
+        with self._lock:
+            self._data[token_value] = (time(), db_data)
+            self._data.move_to_end(token_value)
+            self._user_tokens.setdefault(db_data["user"]["id"], set()).add(token_value)
+            while len(self._data) > self._max_size:  # 淘汰最久未使用的缓存
+                self._remove(next(iter(self._data)))
+
+    def update(self, token_value: str, data: Dict) -> None:
+        """更新已缓存的 Token 数据，Token 未被缓存时不做处理"""
+        with self._lock:
+            item = self._data.get(token_value)
+            if not item:
+                return
+            cached_time, db_data = item
+            self._data[token_value] = (cached_time, {**db_data, **data})
+
+    def _remove(self, token_value: str) -> None:
+        item = self._data.pop(token_value, None)
+        if not item:
+            return
+        user_id: str = item[1]["user"]["id"]
+        user_tokens = self._user_tokens.get(user_id)
+        if user_tokens is not None:
+            user_tokens.discard(token_value)
+            if not user_tokens:
+                del self._user_tokens[user_id]
+
+    def invalidate(self, token_value: str) -> None:
+        with self._lock:
+            self._remove(token_value)
+
+    def invalidate_user(self, user_id: str) -> None:
+        with self._lock:
+            for token_value in list(self._user_tokens.get(user_id, ())):
+                self._remove(token_value)
+
+
+token_cache = TokenCache(max_size=10000, lifetime=60)
+
+
 class Token(DataModel):
     db = token_data_db
     attr_db_key_mapping: Dict[str, str] = {
@@ -71,17 +141,25 @@ class Token(DataModel):
         if not token_value:
             raise TokenNotExistError
 
-        db_data = cls.db.find_one({"token": token_value})
+        db_data = token_cache.get(token_value)
         if not db_data:
+            db_data = cls.db.find_one({"token": token_value})
+            if not db_data:
+                raise TokenNotExistError("Token 不存在或已过期")
+            token_cache.set(token_value, db_data)
+
+        token = cls.from_db_data(db_data)
+        # 过期索引的清理存在延迟，此处需要再次判断
+        if token.is_expired:
+            token_cache.invalidate(token_value)
             raise TokenNotExistError("Token 不存在或已过期")
-
-        return cls.from_db_data(db_data)
+        return token
 
     @classmethod
     def create(cls, user_obj) -> "Token":
         now_time: datetime = get_now_without_mileseconds()
         token: str = generate_token(user_obj.id)
-        insert_result = cls.db.insert_one(
+        new_obj = cls.insert(
             {
                 "create_time": now_time,
                 "expire_time": get_datetime_after_hours(
@@ -94,8 +172,49 @@ class Token(DataModel):
             }
         )
 
-        # 返回新创建的 Token 对象
-        return cls.from_id(insert_result.inserted_id)
+        # 超出单用户 Token 数量上限时，淘汰最早创建的 Token
+        cls.evict_oldest(user_obj.id, config.max_tokens_per_user)
+
+        # 返回新创建的 Token 对象，由写入的数据直接构建，无需再次查询
+        return new_obj
+
+    @classmethod
+    def evict_oldest(cls, user_id: str, keep: int) -> int:
+        """只保留用户最新创建的若干个 Token，其余 Token 将被删除
+
+        Args:
+            user_id (str): UID
+            keep (int): 保留的 Token 数量
+
+        Returns:
+            int: 被删除的 Token 数量
+        """
+        db_data_list: List[Dict] = list(
+            cls.db.find({"user.id": user_id}, {"_id": 1, "token": 1})
+            .sort([("create_time", -1)])
+            .skip(keep)
+        )
+        if not db_data_list:
+            return 0
+
+        cls.db.delete_many({"_id": {"$in": [item["_id"] for item in db_data_list]}})
+        for item in db_data_list:
+            token_cache.invalidate(item["token"])
+        return len(db_data_list)
+
+    @classmethod
+    def revoke_all(cls, user_id: str) -> int:
+        """撤销用户的全部 Token
+
+        Args:
+            user_id (str): UID
+
+        Returns:
+            int: 被撤销的 Token 数量
+        """
+        delete_result = cls.db.delete_many({"user.id": user_id})
+        token_cache.invalidate_user(user_id)
+        return delete_result.deleted_count
 
     def update_expire_time(self) -> None:
         if self.is_expired:
@@ -105,7 +224,10 @@ class Token(DataModel):
             get_now_without_mileseconds(),
             config.token_expire_hours,
         )
-        self.sync()
+        # 过期时间写入频繁，交由延迟写入缓冲区合并后批量写入
+        # 数据库中的值会延迟更新，因此同时更新缓存中的值
+        self.sync_deferred(["expire_time"])
+        token_cache.update(self.value, {"expire_time": self.expire_time})
 
     def expire(self) -> None:
         # 将过期时间设为现在，不会更新到数据库，
@@ -113,3 +235,4 @@ class Token(DataModel):
         self.expire_time = get_now_without_mileseconds()
 
         self.db.delete_one({"token": self.value})
+        token_cache.invalidate(self.value)
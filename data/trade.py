@@ -4,6 +4,8 @@ from typing import Dict, List, Literal
 from bson import ObjectId
 
 from data._base import DataModel
+from data.market_history import record_trade_rollup
+from data.user_stats import record_user_trade
 from utils.db import trade_data_db
 from utils.dict_helper import get_reversed_dict
 from utils.exceptions import (
@@ -77,6 +79,7 @@ class Trade(DataModel):
         unit_price: float,
         trade_amount: int,
         order_obj,
+        session=None,
     ) -> "Trade":
         # 调用方有责任保证 Order ID 和 UID 存在，此函数不会进行校验
         if trade_type not in {"buy", "sell"}:
@@ -89,7 +92,9 @@ class Trade(DataModel):
             raise PriceIlliegalError("单价必须在 0.05 - 0.2 之间")
 
         total_price: float = round(unit_price * trade_amount, 2)
-        insert_result = cls.db.insert_one(
+
+        # 事务中的记录在提交前无法被会话外的查询读取，此处直接使用写入的数据构建
+        trade = cls.insert(
             {
                 "trade_time": get_now_without_mileseconds(),
                 "trade_type": trade_type,
@@ -102,8 +107,33 @@ class Trade(DataModel):
                 "user": {
                     "id": order_obj.user_id,
                 },
-            }
+            },
+            session=session,
         )
-
         # 返回新创建的交易对象
-        return cls.from_id(insert_result.inserted_id)
+        return trade
+
+    def record_summaries(self, session=None) -> None:
+        """将交易累加到市场历史汇总数据与用户交易统计中
+
+        两者均可由交易记录重新生成，支持事务时与交易记录在同一事务中写入，
+        不支持事务时在交易记录写入成功后写入，失败时不撤销交易
+
+        Args:
+            session (ClientSession, optional): 数据库会话. Defaults to None.
+        """
+        record_trade_rollup(
+            trade_type=self.type,
+            trade_time=self.trade_time,
+            unit_price=self.unit_price,
+            trade_amount=self.trade_amount,
+            total_price=self.total_price,
+            session=session,
+        )
+        record_user_trade(
+            user_id=self.user_id,
+            trade_type=self.type,
+            trade_amount=self.trade_amount,
+            total_price=self.total_price,
+            session=session,
+        )
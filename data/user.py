@@ -1,8 +1,7 @@
 from datetime import datetime
-from typing import Dict, List, Literal, Optional
+from typing import Any, Dict, List, Literal, Optional, Tuple
 
 from bson import ObjectId
-from httpx import get as httpx_get
 
 from data._base import DataModel
 from utils.db import user_data_db
@@ -21,6 +20,8 @@ from utils.exceptions import (
     WeakPasswordError,
 )
 from utils.hash import check_password, encrypt_password
+from utils.jianshu import jianshu_client
+from utils.pagination import Cursor, get_keyset_filter, get_keyset_sort, get_next_cursor
 from utils.text_filter import (
     is_illiegal_password,
     is_illiegal_user_name,
@@ -48,15 +49,13 @@ def is_jianshu_url_exist(jianshu_url: str) -> bool:
 
 
 def get_user_jianshu_name(user_url: str) -> str:
-    if not user_url.startswith("https://www.jianshu.com/u/"):
-        raise UserURLIlliegalError("用户个人主页 URL 格式错误")
-    try:
-        data = httpx_get(
-            "https://www.jianshu.com/asimov/users/slug/" + user_url.split("/")[4]
-        ).json()
-        return data["nickname"]
-    except Exception:
-        raise UserURLIlliegalError("获取数据时出现异常")
+    """获取简书用户昵称，请求使用共享连接池、超时与重试，结果会被缓存
+
+    Raises:
+        UserURLIlliegalError: URL 格式错误或用户不存在
+        JianshuAPIError: 简书接口请求失败
+    """
+    return jianshu_client.get_user_name(user_url)
 
 
 class User(DataModel):
@@ -136,22 +135,44 @@ class User(DataModel):
             return Order.from_db_data(db_data)
 
     def finished_orders(self, order_type: Literal["buy", "sell"], limit: int) -> List:
-        from data.order import OrderStatus
-        from utils.db import order_data_db
+        return self.finished_orders_page(order_type, limit)[0]
 
-        data_list: List[Dict] = order_data_db.find(
-            {
-                "status": OrderStatus.FINISHED,
-                "order.type": order_type,
-                "user.id": self.id,
-            }
-        ).limit(limit)
-        if not data_list:
-            return []
-
-        from data.order import Order
-
-        return [Order.from_db_data(item) for item in data_list]
+    def finished_orders_page(
+        self,
+        order_type: Literal["buy", "sell"],
+        limit: int,
+        cursor: Optional[Cursor] = None,
+    ) -> Tuple[List, Optional[Cursor]]:
+        """使用键集分页获取已完成的订单列表，按完成时间由近到远排列
+
+        Args:
+            order_type (Literal["buy", "sell"]): 订单类型
+            limit (int): 每页数量
+            cursor (Optional[Cursor], optional): 上一页返回的游标，为 None 时返回第一页. Defaults to None.
+
+        Returns:
+            Tuple[List[Order], Optional[Cursor]]: 订单列表与下一页的游标，没有下一页时游标为 None
+        """
+        from data.order import Order, OrderStatus
+        from utils.db import order_archive_db, order_data_db
+
+        filter: Dict[str, Any] = {
+            "user.id": self.id,
+            "status": OrderStatus.FINISHED,
+            "order.type": order_type,
+            **get_keyset_filter("finish_time", -1, cursor),
+        }
+        sort = get_keyset_sort("finish_time", -1)
+
+        # 较早的订单可能已被归档，分别查询后合并
+        data_list: List[Dict] = []
+        for collection in (order_data_db, order_archive_db):
+            data_list.extend(collection.find(filter).sort(sort).limit(limit + 1))
+        data_list.sort(key=lambda x: (x["finish_time"], x["_id"]), reverse=True)
+        del data_list[limit + 1 :]
+
+        next_cursor = get_next_cursor(data_list, "finish_time", limit)
+        return ([Order.from_db_data(item) for item in data_list], next_cursor)
 
     @property
     def tokens(self):
@@ -167,11 +188,11 @@ class User(DataModel):
 
         return [Token.from_db_data(item) for item in data_list]
 
-    def expire_all_tokens(self) -> None:
-        tokens: List = self.tokens
+    def expire_all_tokens(self) -> int:
+        from data.token import Token
 
-        for token in tokens:
-            token.expire()
+        # 使用一次批量删除撤销全部 Token，无需逐个查询
+        return Token.revoke_all(self.id)
 
     @property
     def is_jianshu_binded(self) -> bool:
@@ -179,7 +200,8 @@ class User(DataModel):
 
     def update_last_active_time(self) -> None:
         self.last_active_time = get_now_without_mileseconds()
-        self.sync_only(["last_active_time"])
+        # 最后活跃时间写入频繁，交由延迟写入缓冲区合并后批量写入
+        self.sync_deferred(["last_active_time"])
 
     @classmethod
     def signup(
@@ -213,7 +235,8 @@ class User(DataModel):
 
         now_time = get_now_without_mileseconds()
         encrypted_password: str = encrypt_password(password)
-        insert_result = cls.db.insert_one(
+        # 返回新注册的用户对象，由写入的数据直接构建，无需再次查询
+        return cls.insert(
             {
                 "signup_time": now_time,
                 "last_active_time": now_time,
@@ -230,9 +253,6 @@ class User(DataModel):
             }
         )
 
-        # 返回新注册的用户对象
-        return cls.from_id(insert_result.inserted_id)
-
     @classmethod
     def login(cls, user_name: str, password: str) -> "User":
         if not user_name:
@@ -266,6 +286,7 @@ class User(DataModel):
 
         self.name = new_name
         self.sync()
+        self.sync_to_active_orders()
 
     def change_password(
         self, old_password: str, new_password: str, new_password_again: str
@@ -308,9 +329,34 @@ class User(DataModel):
         self.jianshu_url = jianshu_url
         self.jianshu_name = jianshu_name
         self.sync()
+        self.sync_to_active_orders()
 
         return jianshu_name
 
+    def sync_to_active_orders(self) -> int:
+        """将用户昵称与简书账号信息同步到交易中的意向单
+
+        已完成的意向单保留发布时的信息
+
+        Returns:
+            int: 更新的意向单数量
+        """
+        from data.order import OrderStatus
+        from utils.db import order_data_db
+
+        return order_data_db.update_many(
+            {"user.id": self.id, "status": OrderStatus.TREADING},
+            {
+                "$set": {
+                    "user.name": self.name,
+                    "user.jianshu": {
+                        "url": self.jianshu_url,
+                        "name": self.jianshu_name,
+                    },
+                }
+            },
+        ).modified_count
+
     def generate_token(self):
         from data.token import Token
 
@@ -0,0 +1,231 @@
+"""用户交易统计
+
+每个用户一条统计记录，在写入交易记录与意向单状态变化时使用 $inc 原子地累加，
+个人中心只需一次查询即可展示
+
+根据历史数据重新生成全部用户统计数据的工具见 `utils/user_stats_rebuild.py`
+"""
+from typing import Any, Dict, List, Literal
+
+from utils.db import (
+    db,
+    order_archive_db,
+    order_data_db,
+    rebuild_state_db,
+    trade_archive_db,
+    trade_data_db,
+    user_stats_db,
+)
+from utils.time_helper import get_now_without_mileseconds
+
+TRADE_TYPES = ("buy", "sell")
+TRADE_FIELDS = ("count", "amount", "total_price")
+# 被删除的意向单不保留记录，重建时无法统计，实时累加时同样不计入
+ORDER_FIELDS = ("published", "finished", "expired")
+# 统计数据在 rebuild_state 集合中的记录 ID
+REBUILD_STATE_ID = "user_stats"
+
+OrderStatsField = Literal["published", "finished", "expired"]
+
+
+def _inc_user_stats(user_id: str, fields: Dict[str, Any], session=None) -> None:
+    user_stats_db.update_one(
+        {"user.id": user_id},
+        {
+            "$inc": fields,
+            "$set": {"update_time": get_now_without_mileseconds()},
+        },
+        upsert=True,
+        session=session,
+    )
+
+
+def record_user_trade(
+    user_id: str,
+    trade_type: Literal["buy", "sell"],
+    trade_amount: int,
+    total_price: float,
+    session=None,
+) -> None:
+    """将一笔交易累加到用户统计数据中
+
+    Args:
+        user_id (str): 用户 ID
+        trade_type (Literal["buy", "sell"]): 交易类型
+        trade_amount (int): 交易量
+        total_price (float): 总价
+        session (ClientSession, optional): 数据库会话，与交易记录在同一事务中写入. Defaults to None.
+    """
+    _inc_user_stats(
+        user_id,
+        {
+            f"trade.{trade_type}.count": 1,
+            f"trade.{trade_type}.amount": trade_amount,
+            f"trade.{trade_type}.total_price": total_price,
+        },
+        session=session,
+    )
+
+
+def record_user_order(user_id: str, field: OrderStatsField, count: int = 1) -> None:
+    """将一次意向单发布或状态变化累加到用户统计数据中
+
+    Args:
+        user_id (str): 用户 ID
+        field (OrderStatsField): 统计项
+        count (int, optional): 累加值，删除意向单时为 -1 以撤销发布计数. Defaults to 1.
+    """
+    _inc_user_stats(user_id, {f"order.{field}": count})
+
+
+def get_user_stats(user_id: str) -> Dict[str, Any]:
+    """获取用户交易统计，没有统计记录时各项均为 0
+
+    Args:
+        user_id (str): 用户 ID
+
+    Returns:
+        Dict[str, Any]: 包含 trade 与 order，trade 中每种交易类型另有 avg_price，
+            order 中另有 completion_rate，没有数据时为 None
+    """
+    db_data = user_stats_db.find_one({"user.id": user_id}, {"_id": 0}) or {}
+
+    trade: Dict[str, Dict[str, Any]] = {}
+    for trade_type in TRADE_TYPES:
+        item = db_data.get("trade", {}).get(trade_type, {})
+        trade[trade_type] = {key: item.get(key, 0) for key in TRADE_FIELDS}
+        trade[trade_type]["total_price"] = round(trade[trade_type]["total_price"], 2)
+        trade[trade_type]["avg_price"] = (
+            round(trade[trade_type]["total_price"] / trade[trade_type]["amount"], 3)
+            if trade[trade_type]["amount"]
+            else None
+        )
+
+    order: Dict[str, Any] = {
+        key: db_data.get("order", {}).get(key, 0) for key in ORDER_FIELDS
+    }
+    # 完成率为已完成意向单在所有已结束（完成、过期）意向单中的占比
+    ended_count = order["finished"] + order["expired"]
+    order["completion_rate"] = (
+        round(order["finished"] / ended_count * 100, 1) if ended_count else None
+    )
+
+    return {"trade": trade, "order": order}
+
+
+def _sum_if(condition: Dict[str, Any], value: Any = 1) -> Dict[str, Any]:
+    return {"$sum": {"$cond": [condition, value, 0]}}
+
+
+def get_rebuild_pipeline(target_collection_name: str) -> List[Dict[str, Any]]:
+    """根据意向单与交易记录（包括已归档的记录）生成全部用户统计数据的聚合管道
+
+    四个集合的数据统一为相同的结构后，在一次分组中计算出每个用户的所有统计项
+    """
+    from data.order import OrderStatus
+
+    is_order = {"$eq": ["$kind", "order"]}
+    is_trade = {"$eq": ["$kind", "trade"]}
+    order_projection = {
+        "$project": {
+            "_id": 0,
+            "kind": {"$literal": "order"},
+            "user_id": "$user.id",
+            "status": 1,
+        }
+    }
+    trade_projection = {
+        "$project": {
+            "_id": 0,
+            "kind": {"$literal": "trade"},
+            "user_id": "$user.id",
+            "trade_type": 1,
+            "trade_amount": 1,
+            "total_price": 1,
+        }
+    }
+
+    group: Dict[str, Any] = {
+        "_id": "$user_id",
+        # 与实时累加一致，早期以状态标记删除的意向单不计入
+        "order_published": _sum_if(
+            {"$and": [is_order, {"$ne": ["$status", int(OrderStatus.DELETED)]}]}
+        ),
+    }
+    for field, status in (
+        ("finished", OrderStatus.FINISHED),
+        ("expired", OrderStatus.EXPIRED),
+    ):
+        group[f"order_{field}"] = _sum_if(
+            {"$and": [is_order, {"$eq": ["$status", int(status)]}]}
+        )
+    for trade_type in TRADE_TYPES:
+        is_trade_type = {"$and": [is_trade, {"$eq": ["$trade_type", trade_type]}]}
+        group[f"trade_{trade_type}_count"] = _sum_if(is_trade_type)
+        group[f"trade_{trade_type}_amount"] = _sum_if(is_trade_type, "$trade_amount")
+        group[f"trade_{trade_type}_total_price"] = _sum_if(
+            is_trade_type, "$total_price"
+        )
+
+    return [
+        order_projection,
+        {"$unionWith": {"coll": order_archive_db.name, "pipeline": [order_projection]}},
+        {"$unionWith": {"coll": trade_data_db.name, "pipeline": [trade_projection]}},
+        {
+            "$unionWith": {
+                "coll": trade_archive_db.name,
+                "pipeline": [trade_projection],
+            }
+        },
+        {"$group": group},
+        {
+            "$project": {
+                "_id": 0,
+                "user": {"id": "$_id"},
+                "trade": {
+                    trade_type: {
+                        field: f"$trade_{trade_type}_{field}" for field in TRADE_FIELDS
+                    }
+                    for trade_type in TRADE_TYPES
+                },
+                "order": {field: f"$order_{field}" for field in ORDER_FIELDS},
+                "update_time": "$$NOW",
+            }
+        },
+        {"$merge": {"into": target_collection_name, "whenNotMatched": "insert"}},
+    ]
+
+
+def rebuild_user_stats() -> None:
+    """根据历史数据重新生成全部用户的统计数据
+
+    先在临时集合中一次性生成，再替换原集合，重建过程中个人中心仍可读取旧数据
+    替换集合时会丢弃重建期间产生的累加，只能在服务启动前或停止服务后执行
+    开始时清除重建完成记录，全部完成后再写入，重建中断时下次启动会重新执行
+    """
+    rebuild_state_db.delete_one({"_id": REBUILD_STATE_ID})
+    temp_collection = db[user_stats_db.name + "_rebuild"]
+    temp_collection.drop()
+    temp_collection.create_index([("user.id", 1)], unique=True)
+
+    order_data_db.aggregate(get_rebuild_pipeline(temp_collection.name))
+    temp_collection.rename(user_stats_db.name, dropTarget=True)
+
+    rebuild_state_db.update_one(
+        {"_id": REBUILD_STATE_ID},
+        {"$set": {"rebuilt_at": get_now_without_mileseconds()}},
+        upsert=True,
+    )
+
+
+def ensure_user_stats() -> None:
+    """统计数据未完成过重建时重新生成统计数据，用于首次部署与重建失败后的恢复
+
+    以重建完成记录而非统计集合是否为空作为判断依据，
+    重建失败后新写入的累加不会使重建被跳过，意向单全部归档时同样会重建
+    需在启动服务前同步调用，原因见 rebuild_user_stats
+    """
+    if rebuild_state_db.find_one({"_id": REBUILD_STATE_ID}):
+        return
+    rebuild_user_stats()
+
@@ -1,24 +1,66 @@
+from utils.startup_timer import startup_timer  # isort: skip 需最先导入以开始计时
 from signal import SIGTERM, signal
+from threading import Thread
 from typing import Callable, List
 
 from pywebio import start_server
 from pywebio.output import put_markdown
 
+from data.market_history import ensure_trade_rollups
 from data.overview import get_24h_traded_FTN_avg_price
+from data.price_alert import price_alert_index
+from data.user_stats import ensure_user_stats
+from utils.archive import scheduler as archive_scheduler
 from utils.config import config
+from utils.db import create_indexes, create_required_indexes
 from utils.expire_check import scheduler as expire_check_scheduler
+from utils.leaderboard_reconcile import scheduler as leaderboard_reconcile_scheduler
 from utils.log import access_logger, run_logger
+from utils.log_retention import scheduler as log_retention_scheduler
 from utils.module_finder import Module, get_all_modules_info
 from utils.page import get_url_to_module
 from utils.patch import patch_all
+from utils.user_info_refresh import scheduler as user_info_refresh_scheduler
+from utils.write_behind import write_behind_buffer
 from widgets.card import put_app_card
 
-modules_list = get_all_modules_info(config.base_path)
+startup_timer.mark("导入依赖")
+
+# 延迟加载模式下仅读取模块清单，模块在页面首次被访问时导入
+modules_list = get_all_modules_info(
+    config.base_path, lazy=config.deploy.lazy_load_modules
+)
+startup_timer.mark("加载模块信息")
+
+
+def on_sigterm(*_) -> None:
+    # 同一信号只能注册一个回调，所有需要强制刷新的缓冲区都在此处理
+    try:
+        write_behind_buffer.force_refresh()
+    except Exception as e:
+        run_logger.error(f"延迟写入缓冲区刷新失败：{e!r}")
+    run_logger.info(f"延迟写入缓冲区统计：{write_behind_buffer.stats}")
+    access_logger.force_refresh()
+    run_logger.force_refresh()
+
+
+def create_indexes_in_background() -> None:
+    # 后台线程中的异常不会被输出，在此记录创建失败的集合
+    try:
+        failures = create_indexes()
+    except Exception as e:
+        run_logger.error(f"创建索引失败：{e!r}")
+        return
+
+    for collection_name, e in failures:
+        run_logger.error(f"创建集合 {collection_name} 的索引失败：{e!r}")
+    if not failures:
+        run_logger.info("索引创建完成")
+
 
 # 注册信号事件回调
-# 在收到 SIGTERM 时执行访问日志强制刷新，之后退出
-signal(SIGTERM, lambda _, __: run_logger.force_refresh())
-signal(SIGTERM, lambda _, __: access_logger.force_refresh())
+# 在收到 SIGTERM 时执行日志与延迟写入缓冲区强制刷新，之后退出
+signal(SIGTERM, on_sigterm)
 run_logger.debug("已注册事件回调")
 
 
@@ -32,7 +74,6 @@ def index() -> None:
         **24 小时平均买 / 卖价：{get_24h_traded_FTN_avg_price("buy", missing="ignore")} / {get_24h_traded_FTN_avg_price("sell", missing="ignore")}**
         """
     )
-    config.refresh()  # 刷新配置文件
 
     for module in modules_list:
         if not module.page_visibility:  # 模块被设为首页不可见
@@ -65,11 +106,75 @@ modules_list.append(
 patched_modules_list: List[Module] = [patch_all(module) for module in modules_list]
 func_list: List[Callable[[], None]] = [x.page_func for x in patched_modules_list]
 run_logger.info(f"已加载 {len(func_list)} 个视图函数")
+startup_timer.mark("应用补丁")
+
+# 交易数据时序集合与服务依赖其存在的索引必须在启动服务前创建，创建失败时终止启动
+try:
+    create_required_indexes()
+except Exception as e:
+    run_logger.critical(f"创建必需的集合与索引失败，服务无法启动：{e!r}")
+    run_logger.force_refresh()
+    raise
+run_logger.info("必需的集合与索引已创建")
+startup_timer.mark("创建必需的集合与索引")
+
+# 在后台创建其余索引，不阻塞服务监听
+Thread(target=create_indexes_in_background, daemon=True).start()
+run_logger.info("索引创建任务已在后台启动")
+
+# 首次部署时根据已有交易记录生成市场历史汇总数据
+# 需在启动服务前完成，否则重建会与新交易的累加互相覆盖，生成失败时终止启动
+try:
+    ensure_trade_rollups()
+except Exception as e:
+    run_logger.critical(f"生成市场历史汇总数据失败，服务无法启动：{e!r}")
+    run_logger.force_refresh()
+    raise
+startup_timer.mark("生成市场历史汇总数据")
+
+# 首次部署时根据历史数据生成用户交易统计
+# 需在启动服务前完成，否则替换集合时会丢弃新产生的累加，生成失败时终止启动
+try:
+    ensure_user_stats()
+except Exception as e:
+    run_logger.critical(f"生成用户交易统计失败，服务无法启动：{e!r}")
+    run_logger.force_refresh()
+    raise
+startup_timer.mark("生成用户交易统计")
+
+# 加载交易中的价格提醒，之后的成交只在内存中检查
+price_alert_index.load()
+run_logger.info(f"已加载 {len(price_alert_index)} 条价格提醒")
+
+# 启动配置文件变化检查线程，配置文件变化时自动重新加载
+config.start_watcher()
+run_logger.info("配置文件变化检查线程已启动")
 
 # 启动意向单过期检查任务
 expire_check_scheduler.start()
 run_logger.info("意向单过期检查任务已启动")
 
+# 启动终态意向单归档任务
+archive_scheduler.start()
+run_logger.info("意向单归档任务已启动")
+
+# 启动日志保留与汇总任务
+log_retention_scheduler.start()
+run_logger.info("日志保留与汇总任务已启动")
+
+# 启动用户信息刷新任务
+user_info_refresh_scheduler.start()
+run_logger.info("用户信息刷新任务已启动")
+
+# 启动排行榜对账任务
+leaderboard_reconcile_scheduler.start()
+run_logger.info("排行榜对账任务已启动")
+startup_timer.mark("启动后台任务")
+
+# 输出启动耗时报告，用于观察启动速度
+for line in startup_timer.report():
+    run_logger.info(line)
+
 run_logger.info("启动网页服务......")
 start_server(
     func_list,
@@ -0,0 +1,35 @@
+"""测试共用的辅助函数"""
+import json
+import os
+from tempfile import TemporaryDirectory
+
+TEST_DB_HOST = os.environ.get("TEST_MONGODB_HOST", "localhost")
+TEST_DB_PORT = int(os.environ.get("TEST_MONGODB_PORT", "27017"))
+TEST_DB_NAME = "FTNInfoPlatformTest"
+
+
+def load_test_config() -> None:
+    """加载指向测试数据库的配置，需在导入其它项目模块前调用
+
+    配置文件从工作目录中读取，在临时目录中写入配置后加载，不会修改项目根目录下的配置文件
+    配置对象为单例，各测试模块均通过此函数加载，避免先导入的模块使用了默认配置
+    """
+    origin_cwd = os.getcwd()
+    with TemporaryDirectory() as temp_dir:
+        # JSON 是 YAML 的子集，可直接作为配置文件
+        with open(os.path.join(temp_dir, "config.yaml"), "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "db": {
+                        "host": TEST_DB_HOST,
+                        "port": TEST_DB_PORT,
+                        "main_database": TEST_DB_NAME,
+                    }
+                },
+                f,
+            )
+        os.chdir(temp_dir)
+        try:
+            from utils.config import config  # noqa: F401
+        finally:
+            os.chdir(origin_cwd)
@@ -0,0 +1,125 @@
+"""简书接口客户端测试
+
+使用 utils/jianshu_fake_server.py 中的模拟服务，无需访问网络，在项目根目录下运行：
+
+    python -m unittest discover tests
+"""
+import unittest
+from http.server import ThreadingHTTPServer
+from threading import Thread
+from time import perf_counter
+from unittest import mock
+
+from helpers import load_test_config
+
+
+def setUpModule() -> None:
+    try:
+        import httpx  # noqa: F401
+    except ImportError:
+        raise unittest.SkipTest("未安装 httpx")
+
+    load_test_config()
+    global FakeJianshuHandler, JianshuAPIError, JianshuClient, NameCache
+    global UserURLIlliegalError
+    from utils.exceptions import JianshuAPIError, UserURLIlliegalError
+    from utils.jianshu import JianshuClient, NameCache
+    from utils.jianshu_fake_server import FakeJianshuHandler
+
+
+class JianshuClientTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.server = ThreadingHTTPServer(("localhost", 0), FakeJianshuHandler)
+        Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://localhost:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self) -> None:
+        FakeJianshuHandler.delay = 0
+        FakeJianshuHandler.failure_rate = 0
+        # 模拟服务每处理一个用户请求调用一次 random，同时用于统计请求次数
+        patcher = mock.patch("utils.jianshu_fake_server.random", return_value=1.0)
+        self.fake_random = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _create_client(
+        self, read_timeout: float = 1, max_retries: int = 2
+    ) -> "JianshuClient":
+        client = JianshuClient(
+            base_url=self.base_url,
+            connect_timeout=1,
+            read_timeout=read_timeout,
+            max_retries=max_retries,
+            name_cache=NameCache(max_size=10, lifetime=3600),
+        )
+        self.addCleanup(client.close)
+        return client
+
+    def test_get_user_name(self) -> None:
+        client = self._create_client()
+        self.assertEqual(
+            client.get_user_name("https://www.jianshu.com/u/abc123"), "测试用户_abc123"
+        )
+
+    def test_illegal_url(self) -> None:
+        client = self._create_client()
+        with self.assertRaises(UserURLIlliegalError):
+            client.get_user_name("https://example.com/u/abc123")
+        self.assertEqual(self.fake_random.call_count, 0)
+
+    def test_user_not_found(self) -> None:
+        client = self._create_client()
+        with self.assertRaises(UserURLIlliegalError):
+            client.get_user_name("https://www.jianshu.com/u/notfound1")
+        # 404 不重试
+        self.assertEqual(self.fake_random.call_count, 1)
+
+    def test_retry_then_success(self) -> None:
+        FakeJianshuHandler.failure_rate = 0.5
+        # 前两次请求返回 503，第三次成功
+        self.fake_random.side_effect = [0.0, 0.0, 1.0]
+        client = self._create_client(max_retries=2)
+
+        self.assertEqual(
+            client.get_user_name("https://www.jianshu.com/u/abc123"), "测试用户_abc123"
+        )
+        self.assertEqual(self.fake_random.call_count, 3)
+
+    def test_retry_exhausted(self) -> None:
+        FakeJianshuHandler.failure_rate = 1
+        self.fake_random.return_value = 0.0
+        client = self._create_client(max_retries=2)
+
+        with self.assertRaises(JianshuAPIError):
+            client.get_user_name("https://www.jianshu.com/u/abc123")
+        self.assertEqual(self.fake_random.call_count, 3)
+
+    def test_timeout(self) -> None:
+        client = self._create_client(read_timeout=0.2, max_retries=1)
+
+        start = perf_counter()
+        with self.assertRaises(JianshuAPIError):
+            client.get_user_name("https://www.jianshu.com/u/slow1")
+        # 两次请求均在读取超时后放弃，不会等待模拟服务的 10 秒响应
+        self.assertLess(perf_counter() - start, 2)
+
+    def test_cache(self) -> None:
+        client = self._create_client()
+        user_url = "https://www.jianshu.com/u/abc123"
+
+        client.get_user_name(user_url)
+        client.get_user_name(user_url)
+        self.assertEqual(self.fake_random.call_count, 1)
+
+        # 不使用缓存时重新请求
+        client.get_user_name(user_url, use_cache=False)
+        self.assertEqual(self.fake_random.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+"""交易单并发成交测试
+
+需要一个本地单节点副本集作为测试数据库，例如：
+
+    mongod --replSet rs0 --port 27017 --dbpath /tmp/ftn-test-db
+    mongosh --eval "rs.initiate()"
+
+之后在项目根目录下运行：
+
+    python -m unittest discover tests
+
+可通过环境变量 TEST_MONGODB_HOST 与 TEST_MONGODB_PORT 指定数据库地址，
+测试使用独立的数据库，数据库不可用时跳过全部测试
+"""
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest import mock
+
+from helpers import TEST_DB_HOST, TEST_DB_NAME, TEST_DB_PORT, load_test_config
+
+# 并发执行成交的线程数
+WORKERS_COUNT = 8
+
+
+def _is_db_available() -> bool:
+    try:
+        from pymongo import MongoClient
+    except ImportError:
+        return False
+
+    client = MongoClient(TEST_DB_HOST, TEST_DB_PORT, serverSelectionTimeoutMS=2000)
+    try:
+        client.admin.command("ping")
+    except Exception:
+        return False
+    finally:
+        client.close()
+    return True
+
+
+def setUpModule() -> None:
+    if not _is_db_available():
+        raise unittest.SkipTest("测试数据库不可用")
+
+    load_test_config()
+    global Order, OrderStatus, OrderModifiedError, client, trade_data_db
+    global supports_transactions
+    from data.order import Order, OrderStatus
+    from utils.db import client, supports_transactions, trade_data_db
+    from utils.exceptions import OrderModifiedError
+
+
+class ChangeTradedAmountConcurrencyTest(unittest.TestCase):
+    def setUp(self) -> None:
+        client.drop_database(TEST_DB_NAME)
+
+    def tearDown(self) -> None:
+        client.drop_database(TEST_DB_NAME)
+
+    def _create_order(self, total_amount: int):
+        from bson import ObjectId
+
+        user = SimpleNamespace(
+            id=str(ObjectId()), name="测试用户", jianshu_url=None, jianshu_name=None
+        )
+        return Order.create("buy", 0.1, total_amount, user)
+
+    def _trade_with_retry(self, order_id: str, trade_amount: int) -> bool:
+        """读取最新的交易单并成交，交易单被并发修改时重试，余量不足时返回 False"""
+        while True:
+            order = Order.from_id(order_id)
+            if order.remaining_amount < trade_amount:
+                return False
+            try:
+                order.change_traded_amount(order.traded_amount + trade_amount)
+            except OrderModifiedError:
+                continue
+            return True
+
+    def _trade_with_stale_order(self, order) -> bool:
+        """使用并发开始前读取的交易单成交，交易单已被修改时返回 False"""
+        try:
+            order.change_traded_amount(order.traded_amount + 10)
+        except OrderModifiedError:
+            return False
+        return True
+
+    def _assert_order_consistent(self, order_id: str, traded_amount: int) -> None:
+        order = Order.from_id(order_id)
+        trades = list(trade_data_db.find({"order.id": order_id}))
+
+        self.assertEqual(order.traded_amount, traded_amount)
+        self.assertEqual(order.remaining_amount, order.total_amount - traded_amount)
+        self.assertEqual(sum(item["trade_amount"] for item in trades), traded_amount)
+        self.assertEqual(
+            order.status,
+            OrderStatus.FINISHED
+            if order.remaining_amount == 0
+            else OrderStatus.TREADING,
+        )
+
+    def _check_concurrent_trades(self) -> None:
+        # 40 次成交请求中只有 30 次能够成交，之后交易单余量为 0
+        order = self._create_order(300)
+        with ThreadPoolExecutor(WORKERS_COUNT) as executor:
+            results = list(
+                executor.map(lambda _: self._trade_with_retry(order.id, 10), range(40))
+            )
+
+        self.assertEqual(results.count(True), 30)
+        self._assert_order_consistent(order.id, 300)
+
+    def _check_stale_orders(self) -> None:
+        # 各线程使用相同的旧数据成交，只有一次能够成交，其余不会覆盖已写入的数据
+        order = self._create_order(1000)
+        stale_orders = [Order.from_id(order.id) for _ in range(WORKERS_COUNT)]
+        with ThreadPoolExecutor(WORKERS_COUNT) as executor:
+            results = list(executor.map(self._trade_with_stale_order, stale_orders))
+
+        self.assertEqual(results.count(True), 1)
+        self._assert_order_consistent(order.id, 10)
+
+    def test_concurrent_trades_in_transaction(self) -> None:
+        if not supports_transactions():
+            self.skipTest("测试数据库不是副本集，不支持事务")
+        self._check_concurrent_trades()
+
+    def test_stale_orders_in_transaction(self) -> None:
+        if not supports_transactions():
+            self.skipTest("测试数据库不是副本集，不支持事务")
+        self._check_stale_orders()
+
+    def test_concurrent_trades_without_transaction(self) -> None:
+        with mock.patch("data.order.supports_transactions", return_value=False):
+            self._check_concurrent_trades()
+
+    def test_stale_orders_without_transaction(self) -> None:
+        with mock.patch("data.order.supports_transactions", return_value=False):
+            self._check_stale_orders()
+
+
+if __name__ == "__main__":
+    unittest.main()
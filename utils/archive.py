@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+from time import sleep
+from typing import Dict, List
+
+from apscheduler.schedulers.background import BackgroundScheduler
+from pymongo.errors import BulkWriteError
+
+from data.order import OrderStatus
+from utils.config import config
+from utils.db import (
+    order_archive_db,
+    order_data_db,
+    trade_archive_db,
+    trade_data_db,
+    trade_timeseries_enabled,
+)
+from utils.log import run_logger
+
+TERMINAL_ORDER_STATUSES: List[int] = [
+    OrderStatus.FINISHED,
+    OrderStatus.DELETED,
+    OrderStatus.EXPIRED,
+    OrderStatus.BANNED,
+]
+
+
+def _insert_many_ignore_duplicated(collection, db_data_list: List[Dict]) -> None:
+    """批量写入数据，忽略已存在的记录
+
+    归档过程可能在复制完成、删除之前中断，重新执行时需要跳过已复制的记录
+    """
+    try:
+        collection.insert_many(db_data_list, ordered=False)
+    except BulkWriteError as e:
+        # 11000 为重复键错误
+        if any(item["code"] != 11000 for item in e.details["writeErrors"]):
+            raise
+
+
+def archive_orders_batch(
+    cutoff_time: datetime, batch_size: int, include_trades: bool
+) -> int:
+    """归档一批终态订单，先复制到归档集合，再从原集合删除，可重复执行
+
+    终态订单的完成、删除时间均不晚于过期时间，因此使用过期时间判断订单是否足够旧
+
+    Args:
+        cutoff_time (datetime): 过期时间早于该时间的订单将被归档
+        batch_size (int): 批次大小
+        include_trades (bool): 是否同时归档订单对应的交易记录
+
+    Returns:
+        int: 本批次归档的订单数量
+    """
+    db_data_list: List[Dict] = list(
+        order_data_db.find(
+            {
+                "status": {"$in": TERMINAL_ORDER_STATUSES},
+                "expire_time": {"$lt": cutoff_time},
+            }
+        )
+        .sort([("_id", 1)])
+        .limit(batch_size)
+    )
+    if not db_data_list:
+        return 0
+
+    order_ids = [item["_id"] for item in db_data_list]
+    _insert_many_ignore_duplicated(order_archive_db, db_data_list)
+
+    # 先处理交易记录，中断时订单仍在原集合中，下次执行会重新处理
+    # 时序集合本身已按时间分桶压缩存储，且旧版本 MongoDB 不支持按非元数据字段删除，不进行归档
+    if include_trades and not trade_timeseries_enabled:
+        trade_data_list: List[Dict] = list(
+            trade_data_db.find(
+                {"order.id": {"$in": [str(order_id) for order_id in order_ids]}}
+            )
+        )
+        if trade_data_list:
+            _insert_many_ignore_duplicated(trade_archive_db, trade_data_list)
+            trade_data_db.delete_many(
+                {"_id": {"$in": [item["_id"] for item in trade_data_list]}}
+            )
+
+    order_data_db.delete_many({"_id": {"$in": order_ids}})
+    return len(db_data_list)
+
+
+def archive_job() -> None:
+    if not config.archive.enable:
+        return
+
+    cutoff_time = datetime.now() - timedelta(days=config.archive.order_age_days)
+    batch_size: int = config.archive.batch_size
+
+    archived_count = 0
+    while True:
+        count = archive_orders_batch(
+            cutoff_time, batch_size, config.archive.include_trades
+        )
+        archived_count += count
+        if count < batch_size:  # 没有更多待归档的订单
+            break
+        # 限制归档速度，避免影响正常请求
+        sleep(config.archive.batch_interval_seconds)
+
+    if archived_count:
+        run_logger.info(f"已归档 {archived_count} 条意向单")
+
+
+scheduler = BackgroundScheduler()
+# 每天凌晨 4 点执行一次
+scheduler.add_job(archive_job, "cron", hour=4)
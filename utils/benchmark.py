@@ -0,0 +1,303 @@
+"""性能测试工具
+
+测试数据写入独立的 `<main_database>_benchmark` 数据库，不影响业务数据，在项目根目录下运行：
+
+    python -m utils.benchmark ohlc --trades 1000000  # 对比 NumPy 与 MongoDB 聚合计算 K 线的耗时
+    python -m utils.benchmark matcher --orders 50000  # 测试撮合查询耗时
+    python -m utils.benchmark order_search --orders 100000  # 测试意向单搜索翻页耗时
+"""
+from argparse import ArgumentParser
+from collections import defaultdict
+from datetime import datetime, timedelta
+from random import choice, randint, random
+from statistics import median
+from time import perf_counter
+from typing import Any, Dict, List, Literal, Optional
+
+import numpy as np
+from bson import ObjectId
+
+from data.matcher import DEFAULT_MATCH_LIMIT, get_crossing_query
+from data.ohlc import LOAD_BATCH_SIZE, compute_ohlc, load_trade_columns
+from data.order import OrderStatus
+from data.order_search import SORT_KEYS, OrderSearchQuery, plan_order_search
+from utils.config import config
+from utils.db import client, get_order_crossing_indexes, get_order_search_indexes
+from utils.pagination import Cursor, get_next_cursor
+
+
+def get_benchmark_db():
+    return client[config.db.main_database + "_benchmark"]
+
+
+def get_ohlc_pipeline(
+    filter: Dict[str, Any], interval_seconds: int
+) -> List[Dict[str, Any]]:
+    """与 compute_ohlc 等价的聚合管道，用于性能对比"""
+    interval_ms = interval_seconds * 1000
+    return [
+        {"$match": filter},
+        {"$sort": {"trade_time": 1}},
+        {
+            "$group": {
+                "_id": {
+                    "$subtract": [
+                        {"$toLong": "$trade_time"},
+                        {"$mod": [{"$toLong": "$trade_time"}, interval_ms]},
+                    ]
+                },
+                "open": {"$first": "$unit_price"},
+                "high": {"$max": "$unit_price"},
+                "low": {"$min": "$unit_price"},
+                "close": {"$last": "$unit_price"},
+                "volume": {"$sum": "$trade_amount"},
+                "turnover": {"$sum": {"$multiply": ["$unit_price", "$trade_amount"]}},
+                "count": {"$sum": 1},
+            }
+        },
+        {"$addFields": {"vwap": {"$divide": ["$turnover", "$volume"]}}},
+        {"$sort": {"_id": 1}},
+    ]
+
+
+def benchmark_ohlc(trades_count: int, interval_seconds: int, repeat: int) -> None:
+    """在独立的测试数据库中生成交易记录，对比 NumPy 与 MongoDB 聚合的耗时
+
+    Args:
+        trades_count (int): 生成的交易记录数
+        interval_seconds (int): K 线时间间隔秒数
+        repeat (int): 每种方式的执行次数
+    """
+    collection = get_benchmark_db().ohlc_trades
+    if collection.estimated_document_count() != trades_count:
+        collection.drop()
+        rng = np.random.default_rng(0)
+        start_time = datetime.now() - timedelta(days=365)
+        offsets = np.sort(rng.integers(0, 365 * 24 * 3600, trades_count))
+        prices = np.round(rng.uniform(0.08, 0.12, trades_count), 3)
+        amounts = rng.integers(1, 10000, trades_count)
+        for batch_start in range(0, trades_count, LOAD_BATCH_SIZE):
+            batch_end = min(batch_start + LOAD_BATCH_SIZE, trades_count)
+            collection.insert_many(
+                [
+                    {
+                        "trade_time": start_time + timedelta(seconds=int(offsets[i])),
+                        "trade_type": "buy",
+                        "unit_price": float(prices[i]),
+                        "trade_amount": int(amounts[i]),
+                    }
+                    for i in range(batch_start, batch_end)
+                ]
+            )
+        collection.create_index([("trade_type", 1), ("trade_time", 1)])
+        print(f"已生成 {trades_count} 条交易记录")
+
+    filter: Dict[str, Any] = {"trade_type": "buy"}
+    durations: Dict[str, List[float]] = {"load": [], "compute": [], "mongo": []}
+    ohlc: Optional[Dict[str, np.ndarray]] = None
+    for _ in range(repeat):
+        start = perf_counter()
+        times, prices, amounts = load_trade_columns(collection, filter)
+        durations["load"].append(perf_counter() - start)
+
+        start = perf_counter()
+        ohlc = compute_ohlc(times, prices, amounts, interval_seconds)
+        durations["compute"].append(perf_counter() - start)
+
+        start = perf_counter()
+        mongo_result = list(
+            collection.aggregate(
+                get_ohlc_pipeline(filter, interval_seconds), allowDiskUse=True
+            )
+        )
+        durations["mongo"].append(perf_counter() - start)
+
+    assert ohlc is not None
+    print(f"K 线数量：NumPy {ohlc['time'].size} / MongoDB {len(mongo_result)}")
+    print(f"NumPy 读取：{median(durations['load']) * 1000:.1f} ms")
+    print(f"NumPy 计算：{median(durations['compute']) * 1000:.1f} ms")
+    print(
+        "NumPy 合计："
+        f"{(median(durations['load']) + median(durations['compute'])) * 1000:.1f} ms"
+    )
+    print(f"MongoDB 聚合：{median(durations['mongo']) * 1000:.1f} ms")
+
+
+def benchmark_matcher(orders_count: int, repeat: int) -> None:
+    """在独立的测试数据库中生成交易中意向单，测试撮合查询耗时
+
+    Args:
+        orders_count (int): 生成的意向单数量
+        repeat (int): 查询次数
+    """
+    collection = get_benchmark_db().matcher_orders
+    if collection.estimated_document_count() != orders_count:
+        collection.drop()
+        collection.create_indexes(get_order_crossing_indexes())
+        documents: List[Dict[str, Any]] = []
+        for _ in range(orders_count):
+            total_amount = randint(100, 100000)
+            documents.append(
+                {
+                    "status": OrderStatus.TREADING,
+                    "order": {
+                        "type": choice(["buy", "sell"]),
+                        "price": {"unit": randint(51, 200) / 1000},
+                        "amount": {"remaining": randint(1, total_amount)},
+                    },
+                    "user": {"id": str(ObjectId())},
+                }
+            )
+        collection.insert_many(documents)
+        print(f"已生成 {orders_count} 条意向单")
+
+    durations: List[float] = []
+    for _ in range(repeat):
+        query = get_crossing_query(
+            choice(["buy", "sell"]), randint(51, 200) / 1000, str(ObjectId())
+        )
+        start = perf_counter()
+        list(
+            collection.find(query["filter"])
+            .sort(query["sort"])
+            .limit(DEFAULT_MATCH_LIMIT)
+        )
+        durations.append((perf_counter() - start) * 1000)
+
+    durations.sort()
+    print(f"查询次数：{repeat}")
+    print(f"中位数：{median(durations):.3f} ms")
+    print(f"P99：{durations[int(len(durations) * 0.99) - 1]:.3f} ms")
+
+    explain = (
+        collection.find(query["filter"])
+        .sort(query["sort"])
+        .limit(DEFAULT_MATCH_LIMIT)
+        .explain()
+    )
+    stats = explain["executionStats"]
+    print(
+        f"最后一次查询扫描索引项 {stats['totalKeysExamined']} 个，"
+        f"文档 {stats['totalDocsExamined']} 个"
+    )
+
+
+def get_random_search_query(order_type: Literal["buy", "sell"]) -> OrderSearchQuery:
+    query = OrderSearchQuery(order_type=order_type, sort_key=choice(list(SORT_KEYS)))
+    if random() < 0.5:
+        query.min_unit_price = randint(51, 150) / 1000
+        query.max_unit_price = query.min_unit_price + randint(10, 50) / 1000
+    if random() < 0.5:
+        query.min_remaining_amount = randint(1, 50000)
+    if random() < 0.3:
+        query.publish_time_start = datetime.now() - timedelta(hours=randint(1, 72))
+    query.jianshu_binded_only = random() < 0.3
+    return query
+
+
+def benchmark_order_search(orders_count: int, repeat: int, pages: int) -> None:
+    """在独立的测试数据库中生成交易中意向单，测试随机搜索条件下的翻页耗时
+
+    Args:
+        orders_count (int): 生成的意向单数量
+        repeat (int): 搜索次数
+        pages (int): 每次搜索读取的页数
+    """
+    collection = get_benchmark_db().search_orders
+    if collection.estimated_document_count() != orders_count:
+        collection.drop()
+        collection.create_indexes(get_order_search_indexes())
+        documents: List[Dict[str, Any]] = []
+        now = datetime.now()
+        for _ in range(orders_count):
+            total_amount = randint(100, 100000)
+            documents.append(
+                {
+                    "status": OrderStatus.TREADING,
+                    "publish_time": now - timedelta(seconds=randint(0, 7 * 24 * 3600)),
+                    "order": {
+                        "type": choice(["buy", "sell"]),
+                        "price": {"unit": randint(51, 200) / 1000},
+                        "amount": {"remaining": randint(1, total_amount)},
+                    },
+                    "user": {
+                        "id": str(ObjectId()),
+                        "jianshu": {
+                            "url": "https://www.jianshu.com/u/benchmark"
+                            if random() < 0.7
+                            else None
+                        },
+                    },
+                }
+            )
+        collection.insert_many(documents)
+        print(f"已生成 {orders_count} 条意向单")
+
+    durations: Dict[str, List[float]] = defaultdict(list)
+    max_docs_examined = 0
+    for _ in range(repeat):
+        query = get_random_search_query(choice(["buy", "sell"]))
+        cursor: Optional[Cursor] = None
+        for _ in range(pages):
+            plan = plan_order_search(query, cursor)
+            start = perf_counter()
+            db_data_list = list(
+                collection.find(plan["filter"])
+                .sort(plan["sort"])
+                .hint(plan["hint"])
+                .limit(21)
+            )
+            durations[query.sort_key].append((perf_counter() - start) * 1000)
+            cursor = get_next_cursor(db_data_list, SORT_KEYS[query.sort_key][0], 20)
+            if not cursor:
+                break
+
+        stats = (
+            collection.find(plan["filter"])
+            .sort(plan["sort"])
+            .hint(plan["hint"])
+            .limit(21)
+            .explain()["executionStats"]
+        )
+        max_docs_examined = max(max_docs_examined, stats["totalDocsExamined"])
+
+    print(f"搜索次数：{repeat}，每次最多 {pages} 页")
+    for sort_key, items in durations.items():
+        items.sort()
+        print(
+            f"{sort_key}：{len(items)} 次查询，"
+            f"P50 {items[len(items) // 2]:.3f} ms，"
+            f"P95 {items[int(len(items) * 0.95) - 1]:.3f} ms"
+        )
+    print(f"单次查询最多读取文档 {max_docs_examined} 个")
+
+
+def main() -> None:
+    parser = ArgumentParser(description="性能测试工具")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    ohlc_parser = subparsers.add_parser("ohlc", help="K 线计算耗时对比")
+    ohlc_parser.add_argument("--trades", type=int, default=1000000)
+    ohlc_parser.add_argument("--interval", type=int, default=3600, help="K 线时间间隔秒数")
+    ohlc_parser.add_argument("--repeat", type=int, default=3)
+
+    matcher_parser = subparsers.add_parser("matcher", help="撮合查询耗时")
+    matcher_parser.add_argument("--orders", type=int, default=50000)
+    matcher_parser.add_argument("--repeat", type=int, default=1000)
+
+    order_search_parser = subparsers.add_parser("order_search", help="意向单搜索翻页耗时")
+    order_search_parser.add_argument("--orders", type=int, default=100000)
+    order_search_parser.add_argument("--repeat", type=int, default=500)
+    order_search_parser.add_argument("--pages", type=int, default=3)
+
+    args = parser.parse_args()
+    if args.command == "ohlc":
+        benchmark_ohlc(args.trades, args.interval, args.repeat)
+    elif args.command == "matcher":
+        benchmark_matcher(args.orders, args.repeat)
+    elif args.command == "order_search":
+        benchmark_order_search(args.orders, args.repeat, args.pages)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+from queue import Full, Queue
+from threading import Lock, Thread
+from typing import Any, Callable, Dict, Optional, Set
+
+from utils.log import run_logger
+
+# 每个订阅者最多缓存的事件数量，会话处理过慢时丢弃新事件，避免占用过多内存
+SUBSCRIBER_QUEUE_SIZE = 100
+# 放入队列后使会话线程退出的标记
+_STOP = object()
+
+
+class BroadcastHub:
+    """进程内的发布订阅中心
+
+    发布方将事件放入各订阅者的队列后立即返回，不会等待订阅者处理
+    """
+
+    def __init__(self) -> None:
+        self._subscribers: Dict[str, Set[Queue]] = {}
+        self._lock = Lock()
+        self.dropped_count = 0
+
+    def subscribe(self, topic: str) -> Queue:
+        queue: Queue = Queue(SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(topic, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, topic: str, queue: Queue) -> None:
+        with self._lock:
+            queues = self._subscribers.get(topic)
+            if queues is not None:
+                queues.discard(queue)
+                # 按用户划分的主题数量随用户增长，没有订阅者时移除主题
+                if not queues:
+                    del self._subscribers[topic]
+        try:
+            queue.put_nowait(_STOP)
+        except Full:
+            pass
+
+    def publish(
+        self,
+        topic: str,
+        event: Any,
+        copy_event: Optional[Callable[[Any], Any]] = None,
+    ) -> None:
+        """向主题的所有订阅者发布事件
+
+        Args:
+            topic (str): 主题
+            event (Any): 事件
+            copy_event (Optional[Callable[[Any], Any]], optional): 事件复制函数，
+                不为 None 时在发布时为每个订阅者生成独立的副本，
+                发布方之后对事件的修改与各订阅者之间的修改互不影响. Defaults to None.
+        """
+        with self._lock:
+            queues = list(self._subscribers.get(topic, ()))
+        dropped_count = 0
+        for queue in queues:
+            try:
+                queue.put_nowait(copy_event(event) if copy_event else event)
+            except Full:
+                dropped_count += 1
+        if dropped_count:
+            # 多个会话线程同时发布，计数需在锁内累加
+            with self._lock:
+                self.dropped_count += dropped_count
+
+    def subscriber_count(self, topic: str) -> int:
+        with self._lock:
+            return len(self._subscribers.get(topic, ()))
+
+
+broadcast_hub = BroadcastHub()
+
+
+def subscribe_in_session(topic: str, handler: Callable[[Any], None]) -> None:
+    """在当前 PyWebIO 会话中订阅事件，事件在会话线程中交由 handler 处理
+
+    会话关闭时自动取消订阅
+
+    Args:
+        topic (str): 主题
+        handler (Callable[[Any], None]): 事件处理函数，可以在其中更新页面
+    """
+    from pywebio.session import defer_call, register_thread
+
+    queue = broadcast_hub.subscribe(topic)
+
+    def handle_events() -> None:
+        while True:
+            event = queue.get()
+            if event is _STOP:
+                return
+            try:
+                handler(event)
+            except Exception as e:
+                # 会话已关闭时更新页面会抛出异常
+                run_logger.debug(f"处理 {topic} 事件时发生异常：{type(e).__name__}")
+                broadcast_hub.unsubscribe(topic, queue)
+                return
+
+    thread = Thread(target=handle_events, daemon=True)
+    register_thread(thread)
+    defer_call(lambda: broadcast_hub.unsubscribe(topic, queue))
+    thread.start()
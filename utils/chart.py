@@ -1,72 +1,330 @@
-from typing import Any, Dict, List
+from datetime import datetime
+from json import dumps
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from uuid import uuid4
 
-import pyecharts.options as opts
-from pyecharts.charts import Line, Pie
-from pyecharts.globals import CurrentConfig
+from pywebio.session import local, run_js
 
 from utils.config import config
-from utils.page import get_chart_height, get_chart_width
 
-# 设置 PyEcharts CDN
-CurrentConfig.ONLINE_HOST = config.deploy.PyEcharts_CDN
+DEFAULT_ECHARTS_HOST = "https://assets.pyecharts.org/assets/"
+# 数据点数量超过该值时使用 LTTB 算法降采样
+MAX_POINTS = 300
+# 数值保留的小数位数，减小传输数据量
+VALUE_PRECISION = 4
+
+# 图表运行时，每个会话只注入一次
+# 图表 HTML 只包含容器与压缩后的序列数据，由运行时在浏览器中构建 ECharts 配置并渲染
+# 图表宽度跟随容器，高度为宽度的一半，容器尺寸变化时自动重绘，无需查询浏览器宽度
+CHART_RUNTIME_JS = """
+(function () {
+    if (window.FTNChart) return;
+    var queue = (window.FTNChartQueue = window.FTNChartQueue || []);
+
+    function merge(target, source) {
+        Object.keys(source).forEach(function (key) {
+            var value = source[key];
+            if (value && typeof value === "object" && !Array.isArray(value)
+                && target[key] && typeof target[key] === "object") {
+                merge(target[key], value);
+            } else {
+                target[key] = value;
+            }
+        });
+        return target;
+    }
+
+    function buildOption(spec) {
+        if (spec.type === "pie") {
+            return {
+                tooltip: {trigger: "item"},
+                series: [{
+                    type: "pie",
+                    name: spec.series[0].name,
+                    data: spec.series[0].data.map(function (item) {
+                        return {name: item[0], value: item[1]};
+                    }),
+                }],
+            };
+        }
+        var isTime = spec.x_type === "time";
+        if (spec.type === "candlestick") {
+            return {
+                tooltip: {trigger: "axis", axisPointer: {type: "cross"}},
+                legend: {},
+                xAxis: {type: "time"},
+                yAxis: {type: "value", scale: true},
+                series: [{
+                    type: "candlestick",
+                    name: spec.series[0].name,
+                    // 压缩数据为 [开, 高, 低, 收]，ECharts 需要 [时间, 开, 收, 低, 高]
+                    data: spec.series[0].data.map(function (item, i) {
+                        return [spec.x[i] * 1000, item[0], item[3], item[2], item[1]];
+                    }),
+                }].concat(spec.series.slice(1).map(function (series) {
+                    return {
+                        type: "line",
+                        showSymbol: false,
+                        name: series.name,
+                        data: series.data.map(function (value, i) {
+                            return [spec.x[i] * 1000, value];
+                        }),
+                    };
+                })),
+            };
+        }
+        return {
+            tooltip: {trigger: "axis"},
+            legend: {},
+            xAxis: {type: isTime ? "time" : "category", data: isTime ? undefined : spec.x},
+            yAxis: {type: "value"},
+            series: spec.series.map(function (series) {
+                return {
+                    type: "line",
+                    smooth: true,
+                    showSymbol: false,
+                    name: series.name,
+                    data: isTime
+                        ? series.data.map(function (value, i) {
+                            return [spec.x[i] * 1000, value];
+                        })
+                        : series.data,
+                };
+            }),
+        };
+    }
+
+    function render(spec) {
+        var element = document.getElementById(spec.id);
+        if (!element) return;
+        var chart = echarts.init(element);
+        chart.setOption(merge(buildOption(spec), spec.options || {}));
+        new ResizeObserver(function () {
+            chart.resize();
+        }).observe(element);
+    }
+
+    window.FTNChart = {render: render};
+    var script = document.createElement("script");
+    script.src = "%s";
+    script.onload = function () {
+        window.FTNChartQueue = {push: render};
+        queue.forEach(render);
+    };
+    document.head.appendChild(script);
+})();
+"""
+
+XValue = Union[datetime, str, int, float]
+
+
+def _inject_chart_runtime() -> None:
+    """为当前会话注入图表运行时，同一会话中只注入一次"""
+    if local.chart_runtime_injected:
+        return
+
+    echarts_host: str = config.deploy.PyEcharts_CDN or DEFAULT_ECHARTS_HOST
+    run_js(CHART_RUNTIME_JS % (echarts_host + "echarts.min.js"))
+    local.chart_runtime_injected = True
+
+
+def lttb_downsample(
+    x: Sequence[float], y: Sequence[float], threshold: int
+) -> Tuple[List[float], List[float]]:
+    """使用 Largest-Triangle-Three-Buckets 算法对折线数据降采样，保留走势特征
+
+    Args:
+        x (Sequence[float]): 横坐标，需单调递增
+        y (Sequence[float]): 纵坐标
+        threshold (int): 降采样后的数据点数量
+
+    Returns:
+        Tuple[List[float], List[float]]: 降采样后的横纵坐标
+    """
+    length = len(x)
+    if threshold >= length or threshold < 3:
+        return list(x), list(y)
+
+    result_x: List[float] = [x[0]]
+    result_y: List[float] = [y[0]]
+    # 首尾两点固定保留，其余点分入 threshold - 2 个桶中
+    bucket_size = (length - 2) / (threshold - 2)
+    selected = 0
+    for i in range(threshold - 2):
+        # 下一个桶的平均点
+        next_start = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, length)
+        next_count = next_end - next_start
+        avg_x = sum(x[next_start:next_end]) / next_count
+        avg_y = sum(y[next_start:next_end]) / next_count
+
+        # 当前桶中与上一个选中点、下一个桶平均点构成三角形面积最大的点
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        max_area = -1.0
+        next_selected = start
+        for j in range(start, end):
+            area = abs(
+                (x[selected] - avg_x) * (y[j] - y[selected])
+                - (x[selected] - x[j]) * (avg_y - y[selected])
+            )
+            if area > max_area:
+                max_area = area
+                next_selected = j
+        result_x.append(x[next_selected])
+        result_y.append(y[next_selected])
+        selected = next_selected
+
+    result_x.append(x[-1])
+    result_y.append(y[-1])
+    return result_x, result_y
+
+
+def _get_line_series(
+    x: List[XValue], y_list: List[List]
+) -> Tuple[str, List, List[List]]:
+    """将横纵坐标转换为压缩格式，时间横坐标转换为秒级时间戳，数据点过多时降采样
+
+    Returns:
+        Tuple[str, List, List[List]]: 横坐标类型、横坐标与各条折线的纵坐标
+    """
+    y_list = [[round(float(value), VALUE_PRECISION) for value in y] for y in y_list]
+    if not x or not isinstance(x[0], datetime):
+        return "category", x, y_list
+
+    timestamps: List[float] = [int(item.timestamp()) for item in x]  # type: ignore
+    if len(timestamps) > MAX_POINTS:
+        # 多条折线分别降采样后横坐标不再一致，仅对单条折线降采样
+        if len(y_list) == 1:
+            timestamps, y = lttb_downsample(timestamps, y_list[0], MAX_POINTS)
+            y_list = [y]
+    return "time", timestamps, y_list
+
+
+def _render_chart(
+    chart_type: str,
+    x: Optional[List],
+    x_type: str,
+    series: List[Dict[str, Any]],
+    options: Dict[str, Any],
+) -> str:
+    _inject_chart_runtime()
+
+    chart_id = f"chart-{uuid4().hex[:12]}"
+    spec = dumps(
+        {
+            "id": chart_id,
+            "type": chart_type,
+            "x": x,
+            "x_type": x_type,
+            "series": series,
+            "options": options,
+        },
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).replace("</", "<\\/")  # 避免数据中的字符串提前闭合 script 标签
+    return (
+        f'<div id="{chart_id}" style="width: 100%; aspect-ratio: 2 / 1;"></div>'
+        f"<script>(window.FTNChartQueue = window.FTNChartQueue || []).push({spec});"
+        "</script>"
+    )
 
 
 def single_line_chart(
-    x: List,
+    x: List[XValue],
     y: List,
     y_name: str,
-    global_opts: List[Dict[str, Any]],
+    global_opts: Dict[str, Any],
     in_tab: bool = False,
-):
-    return (
-        Line(
-            init_opts=opts.InitOpts(
-                width=f"{get_chart_width(in_tab=in_tab)}px",
-                height=f"{get_chart_height()}px",
-            )
-        )
-        .add_xaxis(x)
-        .add_yaxis(y_name, y, is_smooth=True)
-        .set_global_opts(**global_opts)
-    ).render_notebook()
+) -> str:
+    """单折线图
+
+    Args:
+        x (List[XValue]): 横坐标，为 datetime 时使用时间轴，数据点过多时自动降采样
+        y (List): 纵坐标
+        y_name (str): 折线名称
+        global_opts (Dict[str, Any]): 合并到 ECharts 配置中的选项，如 {"legend": {"show": False}}
+        in_tab (bool, optional): 是否位于 Tab 中，图表宽度跟随容器，仅为兼容保留. Defaults to False.
+
+    Returns:
+        str: 图表 HTML
+    """
+    x_type, x, (y,) = _get_line_series(x, [y])
+    return _render_chart("line", x, x_type, [{"name": y_name, "data": y}], global_opts)
 
 
 def double_line_chart(
-    x: List,
+    x: List[XValue],
     y1: List,
     y1_name: str,
     y2: List,
     y2_name: str,
-    global_opts: List[Dict[str, Any]],
+    global_opts: Dict[str, Any],
     in_tab: bool = False,
-):
-    return (
-        Line(
-            init_opts=opts.InitOpts(
-                width=f"{get_chart_width(in_tab=in_tab)}px",
-                height=f"{get_chart_height()}px",
-            )
-        )
-        .add_xaxis(x)
-        .add_yaxis(y1_name, y1, is_smooth=True)
-        .add_yaxis(y2_name, y2, is_smooth=True)
-        .set_global_opts(**global_opts)
-    ).render_notebook()
+) -> str:
+    x_type, x, (y1, y2) = _get_line_series(x, [y1, y2])
+    return _render_chart(
+        "line",
+        x,
+        x_type,
+        [{"name": y1_name, "data": y1}, {"name": y2_name, "data": y2}],
+        global_opts,
+    )
 
 
 def pie_chart(
     series_name: str,
     data_pair: List,
-    global_opts: List[Dict[str, Any]],
+    global_opts: Dict[str, Any],
     in_tab: bool = False,
-):
-    return (
-        Pie(
-            init_opts=opts.InitOpts(
-                width=f"{get_chart_width(in_tab=in_tab)}px",
-                height=f"{get_chart_height()}px",
-            )
-        )
-        .add(series_name, data_pair)
-        .set_global_opts(**global_opts)
-    ).render_notebook()
+) -> str:
+    return _render_chart(
+        "pie",
+        None,
+        "category",
+        [{"name": series_name, "data": [list(item) for item in data_pair]}],
+        global_opts,
+    )
+
+
+def candlestick_chart(
+    x: List[datetime],
+    ohlc: List[List[float]],
+    ohlc_name: str,
+    line: List[float],
+    line_name: str,
+    global_opts: Dict[str, Any],
+    in_tab: bool = False,
+) -> str:
+    """K 线图，可叠加一条折线
+
+    Args:
+        x (List[datetime]): 每根 K 线的开始时间
+        ohlc (List[List[float]]): 每根 K 线的开、高、低、收
+        ohlc_name (str): K 线名称
+        line (List[float]): 叠加的折线，如成交量加权平均价
+        line_name (str): 折线名称
+        global_opts (Dict[str, Any]): 合并到 ECharts 配置中的选项
+        in_tab (bool, optional): 是否位于 Tab 中，仅为兼容保留. Defaults to False.
+
+    Returns:
+        str: 图表 HTML
+    """
+    return _render_chart(
+        "candlestick",
+        [int(item.timestamp()) for item in x],
+        "time",
+        [
+            {
+                "name": ohlc_name,
+                "data": [
+                    [round(value, VALUE_PRECISION) for value in item] for item in ohlc
+                ],
+            },
+            {
+                "name": line_name,
+                "data": [round(value, VALUE_PRECISION) for value in line],
+            },
+        ],
+        global_opts,
+    )
@@ -1,10 +1,16 @@
+from copy import deepcopy
 from os import path as os_path
-from typing import Any, Dict
+from os import stat
+from threading import Event, Lock, Thread
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
 
 from yaml import SafeLoader
 from yaml import dump as yaml_dump
 from yaml import load as yaml_load
 
+CONFIG_FILE_PATH = "config.yaml"
+
 _DEFAULT_CONFIG = {
     "version": "v0.1.0",
     "deploy": {
@@ -12,23 +18,96 @@ _DEFAULT_CONFIG = {
         "PyWebIO_CDN": "",
         "PyEcharts_CDN": "",
         "port": 8080,
+        "lazy_load_modules": True,
     },
     "base_path": "./app",
     "footer": "",
     "token_expire_hours": 24,
+    "max_tokens_per_user": 10,
     "default_order_effective_hours": 48,
+    "config_check_interval": 5,
     "db": {
         "host": "localhost",
         "port": 27017,
         "main_database": "FTNInfoPlatformData",
+        "write_behind_save_interval": 30,
+        "enable_trade_timeseries": False,
+    },
+    "jianshu": {
+        "api_base_url": "https://www.jianshu.com",
+        "connect_timeout": 2,
+        "read_timeout": 3,
+        "max_retries": 2,
+        "name_cache_size": 1000,
+        "name_cache_lifetime": 3600,
+        "refresh_batch_size": 50,
+        "refresh_request_interval_seconds": 1,
+    },
+    "archive": {
+        "enable": True,
+        "order_age_days": 90,
+        "include_trades": True,
+        "batch_size": 500,
+        "batch_interval_seconds": 1,
     },
     "log": {
         "minimum_record_level": "DEBUG",
         "minimum_print_level": "INFO",
+        "retention": {
+            "run_log_days": 30,
+            "access_log_days": 30,
+            # 每分钟访问统计的保留天数，需大于访问统计页面的最长查询范围 30 天
+            "access_stats_days": 35,
+            # 大于 0 时将 run_log 转换为固定大小集合，此时不再使用过期索引
+            "run_log_capped_size_mb": 0,
+        },
     },
 }
 
 
+def _merge_with_default(
+    default: Dict[str, Any], data: Dict[str, Any]
+) -> Dict[str, Any]:
+    """将配置文件中的数据合并到默认配置上，使旧配置文件缺少的新配置项取默认值
+
+    Args:
+        default (Dict[str, Any]): 默认配置
+        data (Dict[str, Any]): 配置文件中的数据
+
+    Returns:
+        Dict[str, Any]: 合并后的配置
+    """
+    result = deepcopy(default)
+    for key, value in data.items():
+        if isinstance(value, dict) and isinstance(result.get(key), dict):
+            result[key] = _merge_with_default(result[key], value)
+        else:
+            result[key] = value
+    return result
+
+
+class ConfigNode:
+    """不可变的配置节点，子节点在构建时一次性生成"""
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data: Mapping[str, Any]) -> None:
+        built: Dict[str, Any] = {
+            key: ConfigNode(value) if isinstance(value, dict) else value
+            for key, value in data.items()
+        }
+        object.__setattr__(self, "_data", MappingProxyType(built))
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self._data[name]
+        except KeyError:
+            raise AttributeError(f"配置项 {name} 不存在") from None
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("配置快照不可修改")
+
+
 class Config:
     def __new__(cls) -> "Config":
         # 单例模式
@@ -37,31 +116,97 @@ class Config:
         return cls._instance
 
     def __init__(self) -> None:
-        if not os_path.exists("config.yaml"):  # 没有配置文件
-            with open("config.yaml", "w", encoding="utf-8") as f:
+        # 单例只初始化一次
+        if hasattr(self, "_snapshot"):
+            return
+
+        self._lock = Lock()
+        self._subscribers: List[Callable[["Config"], None]] = []
+        self._file_id: Optional[Tuple[int, int]] = None
+        self._watcher_stop_event = Event()
+        self._watcher_thread: Optional[Thread] = None
+        self._snapshot: ConfigNode = self._load()
+
+    def _get_file_id(self) -> Optional[Tuple[int, int]]:
+        """获取配置文件的 inode 与修改时间，用于判断文件是否发生变化"""
+        try:
+            file_stat = stat(CONFIG_FILE_PATH)
+        except OSError:
+            return None
+        return (file_stat.st_ino, file_stat.st_mtime_ns)
+
+    def _load(self) -> ConfigNode:
+        if not os_path.exists(CONFIG_FILE_PATH):  # 没有配置文件
+            with open(CONFIG_FILE_PATH, "w", encoding="utf-8") as f:
                 yaml_dump(_DEFAULT_CONFIG, f, allow_unicode=True, indent=4)
-            self._data = _DEFAULT_CONFIG
+            data: Dict[str, Any] = _DEFAULT_CONFIG
         else:  # 有配置文件
-            with open("config.yaml", "r", encoding="utf-8") as f:
-                self._data = yaml_load(f, Loader=SafeLoader)
+            with open(CONFIG_FILE_PATH, "r", encoding="utf-8") as f:
+                data = yaml_load(f, Loader=SafeLoader) or {}
+
+        self._file_id = self._get_file_id()
+        return ConfigNode(_merge_with_default(_DEFAULT_CONFIG, data))
 
     def __getattr__(self, name: str) -> Any:
-        result: Any = self._data[name]
-        if isinstance(result, dict):
-            return ConfigNode(result)
-        else:
-            return result
+        # 仅在实例属性中找不到时调用，此时从快照中读取
+        # 私有属性不从快照中查找，避免初始化完成前递归调用
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._snapshot, name)
 
-    def refresh(self):
-        self.__init__()
+    def subscribe(self, callback: Callable[["Config"], None]) -> None:
+        """注册配置重载回调，配置文件变化并重新加载后将以 Config 对象为参数调用
 
+        Args:
+            callback (Callable[[Config], None]): 回调函数
+        """
+        self._subscribers.append(callback)
 
-class ConfigNode:
-    def __init__(self, data: Dict[str, Any]) -> None:
-        self._data: Dict[str, Any] = data
+    def refresh(self) -> bool:
+        """检查配置文件是否变化，如有变化则重新加载并通知订阅者
 
-    def __getattr__(self, name: str) -> Any:
-        return self._data[name]
+        Returns:
+            bool: 是否进行了重新加载
+        """
+        with self._lock:
+            if self._get_file_id() == self._file_id:  # 配置文件未变化
+                return False
+            try:
+                self._snapshot = self._load()
+            except Exception as e:
+                load_error = e
+            else:
+                load_error = None
+
+        # utils.log 依赖本模块，在此处导入以避免循环导入
+        from utils.log import run_logger
+
+        if load_error:
+            # 配置文件正在写入或格式错误时保留旧快照
+            run_logger.error(f"重新加载配置文件失败：{load_error!r}")
+            return False
+
+        for callback in self._subscribers:
+            try:
+                callback(self)
+            except Exception as e:
+                run_logger.error(f"执行配置重载回调 {callback!r} 时出现异常：{e!r}")
+        return True
+
+    def _watch(self) -> None:
+        while not self._watcher_stop_event.wait(self._snapshot.config_check_interval):
+            self.refresh()
+
+    def start_watcher(self) -> None:
+        """启动后台线程，定期检查配置文件变化"""
+        if self._watcher_thread and self._watcher_thread.is_alive():
+            return
+        self._watcher_stop_event.clear()
+        self._watcher_thread = Thread(target=self._watch, daemon=True)
+        self._watcher_thread.start()
+
+    def stop_watcher(self) -> None:
+        self._watcher_stop_event.set()
 
 
 def init_config() -> Config:
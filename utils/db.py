@@ -1,58 +1,334 @@
+from typing import List, Optional, Tuple
+
 from pymongo import IndexModel, MongoClient
+from pymongo.collection import Collection
+from pymongo.errors import OperationFailure
 
 from utils.config import config
+from utils.db_metrics import query_counter
 
 
 def init_DB(db_name: str):
-    connection: MongoClient = MongoClient(config.db.host, config.db.port)
+    connection: MongoClient = MongoClient(
+        config.db.host, config.db.port, event_listeners=[query_counter]
+    )
     db = connection[db_name]
     return db
 
 
 db = init_DB(config.db.main_database)
+client: MongoClient = db.client
 
 
 def get_collection(collection_name: str):
     return db[collection_name]
 
 
+# 探测成功后缓存结果，探测失败时不缓存，下次调用重新探测
+_supports_transactions: Optional[bool] = None
+
+
+def supports_transactions() -> bool:
+    """判断数据库是否支持多文档事务，只有副本集与分片集群支持事务
+
+    Returns:
+        bool: 是否支持事务，探测失败时返回 False
+    """
+    global _supports_transactions
+    if _supports_transactions is not None:
+        return _supports_transactions
+
+    try:
+        hello_result = client.admin.command("hello")
+    except Exception:
+        return False
+    # 副本集成员返回 setName，分片集群的 mongos 返回 msg: isdbgrid
+    _supports_transactions = (
+        bool(hello_result.get("setName")) or hello_result.get("msg") == "isdbgrid"
+    )
+    return _supports_transactions
+
+
+TRADE_TIMESERIES_COLLECTION_NAME = "trade_data_ts"
+TRADE_TIMESERIES_OPTIONS = {
+    "timeField": "trade_time",
+    "metaField": "trade_type",
+    "granularity": "hours",
+}
+# 交易数据存储方式在启动时确定，修改后需要重启服务
+trade_timeseries_enabled: bool = config.db.enable_trade_timeseries
+
+
+def create_trade_timeseries_collection():
+    """创建以时序集合存储的交易数据集合，集合已存在时直接返回
+
+    时序集合需要 MongoDB 6.0 及以上版本，以支持对非元数据字段建立二级索引
+
+    Returns:
+        Collection: 交易数据时序集合
+    """
+    if TRADE_TIMESERIES_COLLECTION_NAME not in db.list_collection_names(
+        filter={"name": TRADE_TIMESERIES_COLLECTION_NAME}
+    ):
+        db.create_collection(
+            TRADE_TIMESERIES_COLLECTION_NAME, timeseries=TRADE_TIMESERIES_OPTIONS
+        )
+    return db[TRADE_TIMESERIES_COLLECTION_NAME]
+
+
 order_data_db = db.order_data
-trade_data_db = db.trade_data
+trade_data_db = (
+    db[TRADE_TIMESERIES_COLLECTION_NAME] if trade_timeseries_enabled else db.trade_data
+)
 user_data_db = db.user_data
 token_data_db = db.token_data
 run_log_db = db.run_log
 access_log_db = db.access_log
+run_log_summary_db = db.run_log_summary
+access_log_summary_db = db.access_log_summary
+log_rollup_state_db = db.log_rollup_state
+access_stats_db = db.access_stats
+order_archive_db = db.order_archive
+trade_archive_db = db.trade_archive
+trade_rollup_hourly_db = db.trade_rollup_hourly
+trade_rollup_daily_db = db.trade_rollup_daily
+price_alert_data_db = db.price_alert_data
+user_stats_db = db.user_stats
+# 由历史数据重新生成的数据的重建状态，每种数据一条记录，_id 为数据名称
+rebuild_state_db = db.rebuild_state
 
-# 创建索引
 
-order_data_db.create_indexes(
-    [
-        IndexModel([("status", 1)]),
-        IndexModel([("order.type", 1)]),
-        IndexModel([("user.id", 1)]),
-        IndexModel([("order.price.unit", 1)]),
+def get_order_crossing_indexes() -> List[IndexModel]:
+    """撮合查询使用的索引，价格升序与降序两个方向上剩余可交易数量均为降序，各需一个索引"""
+    return [
+        IndexModel(
+            [
+                ("status", 1),
+                ("order.type", 1),
+                ("order.price.unit", direction),
+                ("order.amount.remaining", -1),
+            ]
+        )
+        for direction in (1, -1)
     ]
+
+
+# 意向单搜索支持的排序字段，同时也是可以设置范围条件的字段，每个排序字段对应一个索引
+ORDER_SEARCH_SORT_FIELDS = (
+    "order.price.unit",
+    "order.amount.remaining",
+    "publish_time",
 )
 
-trade_data_db.create_indexes(
-    [
-        IndexModel([("trade_type", 1)]),
-        IndexModel([("unit_price", 1)]),
-        IndexModel([("order.id", 1)]),
-        IndexModel([("user.id", 1)]),
+
+def get_order_search_index_keys(sort_field: str) -> List[Tuple[str, int]]:
+    """获取意向单搜索使用的索引键，等值条件在前，排序字段与 _id 在后，最后为其余可过滤字段
+
+    索引正向与反向遍历分别支持升序与降序排序，排序字段上的范围条件直接作为索引扫描的边界；
+    其余字段上的范围条件在索引项上过滤，只读取满足条件的文档
+    """
+    return [
+        ("status", 1),
+        ("order.type", 1),
+        (sort_field, 1),
+        ("_id", 1),
+        *(
+            (field, 1)
+            for field in ORDER_SEARCH_SORT_FIELDS
+            if field != sort_field
+        ),
     ]
-)
 
-user_data_db.create_indexes(
-    [
-        IndexModel([("user_name", 1)]),
-        IndexModel([("jianshu.url", 1)]),
+
+def get_order_search_indexes() -> List[IndexModel]:
+    """意向单搜索使用的索引，其中按单价排序的索引同时用于意向单列表的键集分页"""
+    return [
+        IndexModel(get_order_search_index_keys(sort_field))
+        for sort_field in ORDER_SEARCH_SORT_FIELDS
     ]
-)
-token_data_db.create_indexes(
-    [
-        IndexModel([("token", 1)]),
-        # 过期索引
-        IndexModel([("expire_time", 1)], expireAfterSeconds=0)
+
+
+def get_required_indexes() -> List[Tuple[Collection, List[IndexModel]]]:
+    """获取服务依赖其存在的索引，按集合分组
+
+    这些索引承担数据约束或被查询通过 hint 指定，缺失时服务无法正确运行，需在启动服务前创建
+    """
+    return [
+        (
+            order_data_db,
+            [
+                # 交易中订单列表的键集分页与意向单搜索
+                *get_order_search_indexes(),
+                # 每个用户同种类型的交易中交易单只能有一个，发布时不再另行检查
+                # 0 即 OrderStatus.TREADING，此处导入 data.order 会造成循环导入
+                IndexModel(
+                    [("user.id", 1), ("order.type", 1)],
+                    unique=True,
+                    partialFilterExpression={"status": 0},
+                ),
+            ],
+        ),
     ]
-)
+
+
+def create_required_indexes() -> None:
+    """创建服务依赖其存在的集合与索引，在启动服务前同步执行
+
+    已存在的数据违反约束或索引选项冲突时直接抛出异常，由启动流程终止服务
+    """
+    if trade_timeseries_enabled:
+        # 时序集合必须在第一笔交易写入前显式创建，写入时自动创建的是普通集合
+        create_trade_timeseries_collection()
+
+    for collection, indexes in get_required_indexes():
+        collection.create_indexes(indexes)
+
+    drop_obsolete_indexes()
+
+
+def get_obsolete_indexes() -> List[Tuple[Collection, str]]:
+    """获取已被替代的索引，按集合与索引名列出"""
+    return [
+        # 交易中订单列表原有的键集分页索引，是按单价排序的意向单搜索索引的前缀
+        (order_data_db, "status_1_order.type_1_order.price.unit_1__id_1"),
+    ]
+
+
+def drop_obsolete_indexes() -> None:
+    """删除已被替代的索引，需在替代它们的索引创建完成后执行，索引不存在时跳过"""
+    for collection, index_name in get_obsolete_indexes():
+        try:
+            collection.drop_index(index_name)
+        except OperationFailure as e:
+            # 26：集合不存在，27：索引不存在
+            if e.code not in {26, 27}:
+                raise
+
+
+def get_indexes() -> List[Tuple[Collection, List[IndexModel]]]:
+    """获取用于加速查询的索引，按集合分组
+
+    Returns:
+        List[Tuple[Collection, List[IndexModel]]]: 集合与该集合上的索引
+    """
+    return [
+        (
+            order_data_db,
+            [
+                IndexModel([("status", 1)]),
+                IndexModel([("order.type", 1)]),
+                IndexModel([("user.id", 1)]),
+                IndexModel([("order.price.unit", 1)]),
+                # 用户已完成订单列表的键集分页
+                IndexModel(
+                    [
+                        ("user.id", 1),
+                        ("status", 1),
+                        ("order.type", 1),
+                        ("finish_time", -1),
+                        ("_id", -1),
+                    ]
+                ),
+                # 查找待归档的订单
+                IndexModel([("status", 1), ("expire_time", 1)]),
+                *get_order_crossing_indexes(),
+            ],
+        ),
+        (
+            trade_data_db,
+            [
+                IndexModel([("trade_type", 1)]),
+                IndexModel([("unit_price", 1)]),
+                IndexModel([("order.id", 1)]),
+                IndexModel([("user.id", 1)]),
+            ],
+        ),
+        (
+            user_data_db,
+            [
+                IndexModel([("user_name", 1)]),
+                IndexModel([("jianshu.url", 1)]),
+            ],
+        ),
+        (
+            token_data_db,
+            [
+                IndexModel([("token", 1)]),
+                # 用于按用户批量撤销 Token 与淘汰最早创建的 Token
+                IndexModel([("user.id", 1), ("create_time", -1)]),
+                # 过期索引
+                IndexModel([("expire_time", 1)], expireAfterSeconds=0),
+            ],
+        ),
+        (
+            order_archive_db,
+            [
+                # 与 order_data 相同的用户已完成订单键集分页索引
+                IndexModel(
+                    [
+                        ("user.id", 1),
+                        ("status", 1),
+                        ("order.type", 1),
+                        ("finish_time", -1),
+                        ("_id", -1),
+                    ]
+                ),
+            ],
+        ),
+        (
+            trade_archive_db,
+            [
+                IndexModel([("order.id", 1)]),
+                IndexModel([("user.id", 1)]),
+            ],
+        ),
+        (
+            access_stats_db,
+            [
+                IndexModel([("time", 1), ("module", 1)], unique=True),
+            ],
+        ),
+        *(
+            (
+                trade_rollup_db,
+                [
+                    IndexModel([("trade_type", 1), ("time", 1)], unique=True),
+                ],
+            )
+            for trade_rollup_db in (trade_rollup_hourly_db, trade_rollup_daily_db)
+        ),
+        (
+            price_alert_data_db,
+            [
+                # 启动时加载交易中的提醒
+                IndexModel([("status", 1)]),
+                # 用户的提醒列表
+                IndexModel([("user.id", 1), ("status", 1), ("create_time", -1)]),
+            ],
+        ),
+        (
+            user_stats_db,
+            [
+                IndexModel([("user.id", 1)], unique=True),
+            ],
+        ),
+    ]
+
+
+def create_indexes() -> List[Tuple[str, Exception]]:
+    """创建索引
+
+    索引创建可能耗时较长，由启动流程放入后台线程执行，不阻塞服务监听
+    各集合的索引分别创建，一个集合创建失败不影响其余集合
+
+    Returns:
+        List[Tuple[str, Exception]]: 创建失败的集合名与对应的异常
+    """
+    failures: List[Tuple[str, Exception]] = []
+    for collection, indexes in get_indexes():
+        try:
+            collection.create_indexes(indexes)
+        except Exception as e:
+            failures.append((collection.name, e))
+
+    return failures
@@ -0,0 +1,80 @@
+from contextlib import contextmanager
+from threading import local
+from time import perf_counter
+from typing import Iterator, Optional
+
+from pymongo import monitoring
+
+
+class QueryStats:
+    def __init__(self) -> None:
+        self.count = 0
+        self.db_time_ms = 0.0
+
+
+class QueryCounter(monitoring.CommandListener):
+    """统计当前线程执行的数据库命令数量与耗时
+
+    PyMongo 在执行命令的线程中同步调用监听器，每个 PyWebIO 会话的操作都在各自的线程中执行，
+    因此可以使用线程局部变量区分不同会话的统计数据
+    """
+
+    def __init__(self) -> None:
+        self._local = local()
+
+    @property
+    def stats(self) -> Optional[QueryStats]:
+        return getattr(self._local, "stats", None)
+
+    @stats.setter
+    def stats(self, value: Optional[QueryStats]) -> None:
+        self._local.stats = value
+
+    def _record(self, event) -> None:
+        stats = self.stats
+        if stats is None:  # 当前线程没有进行统计
+            return
+        stats.count += 1
+        stats.db_time_ms += event.duration_micros / 1000
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._record(event)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._record(event)
+
+
+query_counter = QueryCounter()
+
+
+@contextmanager
+def measure_queries(action: str) -> Iterator[QueryStats]:
+    """统计代码块中执行的数据库命令数量、数据库耗时与总耗时，结束后记录调试日志
+
+    Args:
+        action (str): 操作名称，用于日志
+
+    Yields:
+        QueryStats: 统计数据
+    """
+    from utils.log import run_logger
+
+    outer_stats = query_counter.stats
+    stats = QueryStats()
+    query_counter.stats = stats
+    start = perf_counter()
+    try:
+        yield stats
+    finally:
+        total_time_ms = (perf_counter() - start) * 1000
+        query_counter.stats = outer_stats
+        if outer_stats is not None:  # 嵌套统计时计入外层
+            outer_stats.count += stats.count
+            outer_stats.db_time_ms += stats.db_time_ms
+        run_logger.debug(
+            f"{action}：数据库命令 {stats.count} 次，"
+            f"数据库耗时 {stats.db_time_ms:.1f} ms，总耗时 {total_time_ms:.1f} ms"
+        )
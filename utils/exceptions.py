@@ -58,6 +58,10 @@ class OrderStatusError(Exception):
     pass
 
 
+class OrderModifiedError(Exception):
+    pass
+
+
 class UserURLIlliegalError(Exception):
     pass
 
@@ -70,5 +74,17 @@ class JianshuAlreadyBindedError(Exception):
     pass
 
 
+class JianshuAPIError(Exception):
+    pass
+
+
 class TradeNotExistError(Exception):
     pass
+
+
+class PriceAlertIDNotExistError(Exception):
+    pass
+
+
+class TooManyPriceAlertsError(Exception):
+    pass
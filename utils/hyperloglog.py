@@ -0,0 +1,47 @@
+from hashlib import sha1
+from math import log
+from typing import Iterable, List, Optional
+
+HASH_BITS = 64
+
+
+class HyperLogLog:
+    """HyperLogLog 基数估计
+
+    使用 2 ^ p 个寄存器估计不重复元素的数量，p = 8 时仅需 256 个寄存器，标准误差约为 6.5%
+
+    两个估计器合并时对寄存器逐位取最大值即可，因此可以分别统计后在数据库中合并
+    """
+
+    def __init__(self, p: int = 8, registers: Optional[Iterable[int]] = None) -> None:
+        self.p = p
+        self.m = 1 << p
+        self.registers: List[int] = list(registers) if registers else [0] * self.m
+        if len(self.registers) != self.m:
+            raise ValueError(f"寄存器数量必须为 {self.m}")
+
+    def add(self, value: str) -> None:
+        hash_value = int.from_bytes(sha1(value.encode()).digest()[:8], "big")
+        index = hash_value >> (HASH_BITS - self.p)
+        remaining = hash_value & ((1 << (HASH_BITS - self.p)) - 1)
+        # 剩余位中第一个 1 出现的位置
+        rank = HASH_BITS - self.p - remaining.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> None:
+        if other.m != self.m:
+            raise ValueError("寄存器数量不同的估计器无法合并")
+        self.registers = [max(a, b) for a, b in zip(self.registers, other.registers)]
+
+    def count(self) -> int:
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = (
+            alpha * self.m**2 / sum(2.0**-register for register in self.registers)
+        )
+
+        zero_count = self.registers.count(0)
+        # 基数较小时使用线性计数修正
+        if estimate <= 2.5 * self.m and zero_count:
+            estimate = self.m * log(self.m / zero_count)
+        return round(estimate)
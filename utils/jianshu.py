@@ -0,0 +1,168 @@
+from collections import OrderedDict
+from random import uniform
+from threading import Lock
+from time import sleep, time
+from typing import Any, Dict, Optional, Tuple
+
+from utils.config import config
+from utils.exceptions import JianshuAPIError, UserURLIlliegalError
+
+JIANSHU_USER_URL_PREFIX = "https://www.jianshu.com/u/"
+# 需要重试的 HTTP 状态码
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+RETRY_BASE_DELAY = 0.2
+
+
+def get_user_slug(user_url: str) -> str:
+    if not user_url.startswith(JIANSHU_USER_URL_PREFIX):
+        raise UserURLIlliegalError("用户个人主页 URL 格式错误")
+
+    slug = user_url[len(JIANSHU_USER_URL_PREFIX) :].split("/")[0].split("?")[0]
+    if not slug:
+        raise UserURLIlliegalError("用户个人主页 URL 格式错误")
+    return slug
+
+
+class NameCache:
+    """带过期时间的 LRU 缓存，用于缓存简书用户 slug 对应的昵称"""
+
+    def __init__(self, max_size: int, lifetime: int) -> None:
+        self._max_size = max_size
+        self._lifetime = lifetime
+        self._data: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, slug: str) -> Optional[str]:
+        with self._lock:
+            item = self._data.get(slug)
+            if not item:
+                return None
+            name, expire_time = item
+            if time() >= expire_time:
+                del self._data[slug]
+                return None
+            self._data.move_to_end(slug)
+            return name
+
+    def set(self, slug: str, name: str) -> None:
+        with self._lock:
+            self._data[slug] = (name, time() + self._lifetime)
+            self._data.move_to_end(slug)
+            while len(self._data) > self._max_size:
+                self._data.popitem(last=False)
+
+
+class JianshuClient:
+    """简书接口客户端
+
+    所有请求共用同一个连接池，每次请求均有连接与读取超时，临时性错误会带随机抖动地重试，
+    总耗时不超过 (连接超时 + 读取超时) * (重试次数 + 1) 加上重试等待时间
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        connect_timeout: float,
+        read_timeout: float,
+        max_retries: int,
+        name_cache: NameCache,
+    ) -> None:
+        self._base_url = base_url.rstrip("/")
+        self._connect_timeout = connect_timeout
+        self._read_timeout = read_timeout
+        self._max_retries = max_retries
+        self._name_cache = name_cache
+        self._client: Any = None
+        self._client_lock = Lock()
+
+    def _get_client(self) -> Any:
+        # 仅在绑定简书账号等场景下使用，延迟导入以加快启动速度
+        with self._client_lock:
+            if not self._client:
+                from httpx import Client, Limits, Timeout
+
+                self._client = Client(
+                    base_url=self._base_url,
+                    timeout=Timeout(self._read_timeout, connect=self._connect_timeout),
+                    limits=Limits(max_connections=20, max_keepalive_connections=5),
+                )
+            return self._client
+
+    def _get_json(self, path: str) -> Optional[Dict[str, Any]]:
+        """发送 GET 请求，资源不存在时返回 None
+
+        Raises:
+            JianshuAPIError: 重试后请求仍然失败
+        """
+        from httpx import HTTPError
+
+        client = self._get_client()
+        attempt = 0
+        while True:
+            try:
+                response = client.get(path)
+            except HTTPError as e:
+                error = type(e).__name__
+            else:
+                if response.status_code == 404:
+                    return None
+                if response.status_code not in RETRY_STATUS_CODES:
+                    if response.status_code != 200:
+                        raise JianshuAPIError(f"请求失败，状态码 {response.status_code}")
+                    try:
+                        return response.json()
+                    except ValueError:
+                        raise JianshuAPIError("响应数据格式错误")
+                error = f"状态码 {response.status_code}"
+
+            if attempt >= self._max_retries:
+                raise JianshuAPIError(f"请求失败（{error}），已重试 {attempt} 次")
+            # 指数退避并加入随机抖动，避免多个会话同时重试
+            sleep(uniform(0, RETRY_BASE_DELAY * 2**attempt))
+            attempt += 1
+
+    def get_user_name(self, user_url: str, use_cache: bool = True) -> str:
+        """获取简书用户昵称
+
+        Args:
+            user_url (str): 用户个人主页 URL
+            use_cache (bool, optional): 是否使用缓存，不使用时仍会更新缓存. Defaults to True.
+
+        Raises:
+            UserURLIlliegalError: URL 格式错误或用户不存在
+            JianshuAPIError: 简书接口请求失败
+
+        Returns:
+            str: 用户昵称
+        """
+        slug = get_user_slug(user_url)
+
+        name = self._name_cache.get(slug) if use_cache else None
+        if name:
+            return name
+
+        data = self._get_json(f"/asimov/users/slug/{slug}")
+        if not data or "nickname" not in data:
+            raise UserURLIlliegalError("用户不存在")
+
+        name = data["nickname"]
+        self._name_cache.set(slug, name)
+        return name
+
+    def close(self) -> None:
+        with self._client_lock:
+            if self._client:
+                self._client.close()
+                self._client = None
+
+
+jianshu_client = JianshuClient(
+    base_url=config.jianshu.api_base_url,
+    connect_timeout=config.jianshu.connect_timeout,
+    read_timeout=config.jianshu.read_timeout,
+    max_retries=config.jianshu.max_retries,
+    name_cache=NameCache(
+        max_size=config.jianshu.name_cache_size,
+        lifetime=config.jianshu.name_cache_lifetime,
+    ),
+)
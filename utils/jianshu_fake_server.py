@@ -0,0 +1,71 @@
+"""用于离线测试的简书接口模拟服务
+
+在项目根目录下运行：
+
+    python -m utils.jianshu_fake_server --port 8081 --delay 0.5 --failure-rate 0.3
+
+然后将配置文件中的 `jianshu.api_base_url` 设为 `http://localhost:8081`
+
+slug 以 `notfound` 开头的用户不存在，以 `slow` 开头的用户响应时间为 10 秒，用于测试超时，
+其余用户的昵称为 `测试用户_<slug>`
+"""
+from argparse import ArgumentParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from json import dumps
+from random import random
+from time import sleep
+
+USER_PATH_PREFIX = "/asimov/users/slug/"
+
+
+class FakeJianshuHandler(BaseHTTPRequestHandler):
+    delay: float = 0
+    failure_rate: float = 0
+
+    def _send_json(self, status_code: int, data: dict) -> None:
+        body = dumps(data, ensure_ascii=False).encode()
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:  # noqa: N802
+        if not self.path.startswith(USER_PATH_PREFIX):
+            self._send_json(404, {"error": "not found"})
+            return
+        slug = self.path[len(USER_PATH_PREFIX) :]
+
+        sleep(self.delay)
+        if slug.startswith("slow"):
+            sleep(10)
+        if random() < self.failure_rate:
+            self._send_json(503, {"error": "service unavailable"})
+            return
+        if slug.startswith("notfound"):
+            self._send_json(404, {"error": "user not found"})
+            return
+
+        self._send_json(200, {"slug": slug, "nickname": f"测试用户_{slug}"})
+
+
+def main() -> None:
+    parser = ArgumentParser(description="简书接口模拟服务")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--delay", type=float, default=0, help="每个请求的延迟秒数")
+    parser.add_argument(
+        "--failure-rate", type=float, default=0, help="返回 503 错误的概率"
+    )
+    args = parser.parse_args()
+
+    FakeJianshuHandler.delay = args.delay
+    FakeJianshuHandler.failure_rate = args.failure_rate
+
+    server = ThreadingHTTPServer((args.host, args.port), FakeJianshuHandler)
+    print(f"简书接口模拟服务已启动：http://{args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
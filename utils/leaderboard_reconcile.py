@@ -0,0 +1,24 @@
+from datetime import datetime
+
+from apscheduler.schedulers.background import BackgroundScheduler
+
+from data.leaderboard import leaderboard
+from utils.log import run_logger
+
+
+def leaderboard_reconcile_job() -> None:
+    is_first_load = leaderboard.reconcile_time is None
+    mismatched_count = leaderboard.reconcile()
+    if is_first_load:
+        run_logger.info("排行榜数据已加载")
+    elif mismatched_count:
+        run_logger.warning(f"排行榜对账完成，{mismatched_count} 位用户的交易量已修正")
+    else:
+        run_logger.debug("排行榜对账完成，数据一致")
+
+
+scheduler = BackgroundScheduler()
+# 启动时立即执行一次以加载数据，之后每小时对账一次
+scheduler.add_job(
+    leaderboard_reconcile_job, "cron", minute=30, next_run_time=datetime.now()
+)
@@ -4,10 +4,13 @@ from os import listdir
 from queue import Queue
 from threading import Thread
 from time import sleep
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
 
 from utils.config import config
-from utils.db import access_log_db, run_log_db
+from utils.db import access_log_db, access_stats_db, run_log_db
+from utils.hyperloglog import HyperLogLog
 
 RUN_LOG_LEVELS = {
     "DEBUG": 0,
@@ -38,6 +41,50 @@ def _get_base_dir() -> str:
 BASE_DIR: str = _get_base_dir() + "/"
 
 
+def _get_access_stats_update(
+    count: int,
+    logged_in_count: int,
+    protocol_count: Dict[str, int],
+    ip_registers: List[int],
+) -> List[Dict[str, Any]]:
+    """获取合并一分钟访问统计的更新管道
+
+    计数直接累加，独立 IP 估计器的寄存器逐位取最大值
+    """
+    registers_literal: Dict[str, Any] = {"$literal": ip_registers}
+    update: Dict[str, Any] = {
+        "count": {"$add": [{"$ifNull": ["$count", 0]}, count]},
+        "logged_in_count": {
+            "$add": [{"$ifNull": ["$logged_in_count", 0]}, logged_in_count]
+        },
+        "anonymous_count": {
+            "$add": [{"$ifNull": ["$anonymous_count", 0]}, count - logged_in_count]
+        },
+        "ip_registers": {
+            "$cond": [
+                {"$isArray": "$ip_registers"},
+                {
+                    "$map": {
+                        "input": {"$range": [0, len(ip_registers)]},
+                        "as": "i",
+                        "in": {
+                            "$max": [
+                                {"$arrayElemAt": ["$ip_registers", "$$i"]},
+                                {"$arrayElemAt": [registers_literal, "$$i"]},
+                            ]
+                        },
+                    }
+                },
+                registers_literal,
+            ]
+        },
+    }
+    for protocol, value in protocol_count.items():
+        field_name = f"protocol_count.{protocol}"
+        update[field_name] = {"$add": [{"$ifNull": [f"${field_name}", 0]}, value]}
+    return [{"$set": update}]
+
+
 def _get_filename() -> Optional[str]:
     try:
         result: str = currentframe().f_back.f_back.f_back.f_code.co_filename  # type: ignore [union-attr]
@@ -88,6 +135,12 @@ class RunLogger:
             data_to_save.append(self._data_queue.get())
         self._db.insert_many(data_to_save)
 
+    def set_minimum_levels(
+        self, minimum_record_level: str, minimum_print_level: str
+    ) -> None:
+        self._minimum_record_level = minimum_record_level
+        self._minimum_print_level = minimum_print_level
+
     def _log(self, level: str, content: str) -> None:
         if RUN_LOG_LEVELS[level] < RUN_LOG_LEVELS[self._minimum_record_level]:
             return
@@ -128,8 +181,9 @@ class RunLogger:
 
 
 class AccessLogger:
-    def __init__(self, db, save_interval: int) -> None:
+    def __init__(self, db, stats_db, save_interval: int) -> None:
         self._db = db
+        self._stats_db = stats_db
         self._save_interval = save_interval
         self._data_queue: Queue = Queue()
         self._save_thread = Thread(target=self._save_to_db)
@@ -168,9 +222,52 @@ class AccessLogger:
                 while not self._data_queue.empty():
                     data_to_save.append(self._data_queue.get())
                 self._db.insert_many(data_to_save)
+                self._save_stats(data_to_save)
                 data_to_save.clear()
             sleep(self._save_interval)
 
+    def _save_stats(self, data_list: List[Dict]) -> None:
+        """按模块与分钟统计本批访问记录，并合并到统计集合中
+
+        统计在保存日志时顺带完成，查看访问统计时无需聚合原始日志
+        """
+        stats: Dict[Tuple[str, datetime], Dict[str, Any]] = {}
+        for item in data_list:
+            key = (item["module"], item["time"].replace(second=0, microsecond=0))
+            if key not in stats:
+                stats[key] = {
+                    "count": 0,
+                    "logged_in_count": 0,
+                    "protocol_count": {},
+                    "ip_sketch": HyperLogLog(),
+                }
+            stat = stats[key]
+
+            stat["count"] += 1
+            if item["token"]:
+                stat["logged_in_count"] += 1
+            protocol = str(item["protocol"])
+            protocol_count: Dict[str, int] = stat["protocol_count"]
+            protocol_count[protocol] = protocol_count.get(protocol, 0) + 1
+            stat["ip_sketch"].add(str(item["ip"]))
+
+        self._stats_db.bulk_write(
+            [
+                UpdateOne(
+                    {"module": module, "time": minute},
+                    _get_access_stats_update(
+                        stat["count"],
+                        stat["logged_in_count"],
+                        stat["protocol_count"],
+                        stat["ip_sketch"].registers,
+                    ),
+                    upsert=True,
+                )
+                for (module, minute), stat in stats.items()
+            ],
+            ordered=False,
+        )
+
     def force_refresh(self):
         if self._data_queue.empty():  # 没有要保存的数据
             return
@@ -178,6 +275,7 @@ class AccessLogger:
         while not self._data_queue.empty():
             data_to_save.append(self._data_queue.get())
         self._db.insert_many(data_to_save)
+        self._save_stats(data_to_save)
 
 
 run_logger: RunLogger = RunLogger(
@@ -188,5 +286,14 @@ run_logger: RunLogger = RunLogger(
 )
 access_logger: AccessLogger = AccessLogger(
     db=access_log_db,
+    stats_db=access_stats_db,
     save_interval=30,
 )
+
+# 配置文件重载后同步更新日志等级
+config.subscribe(
+    lambda new_config: run_logger.set_minimum_levels(
+        new_config.log.minimum_record_level,
+        new_config.log.minimum_print_level,
+    )
+)
@@ -0,0 +1,185 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from apscheduler.schedulers.background import BackgroundScheduler
+
+from utils.config import config
+from utils.db import (
+    access_log_db,
+    access_log_summary_db,
+    access_stats_db,
+    db,
+    log_rollup_state_db,
+    run_log_db,
+    run_log_summary_db,
+)
+from utils.log import run_logger
+
+TTL_INDEX_NAME = "time_ttl"
+# 单次汇总的最大时间范围，避免首次运行时一次处理过多历史数据
+MAX_ROLLUP_RANGE = timedelta(days=7)
+
+RUN_LOG_SUMMARY_GROUP: Dict[str, Any] = {
+    "_id": {
+        "hour": {"$dateTrunc": {"date": "$time", "unit": "hour"}},
+        "level": "$level",
+        "file_name": "$file_name",
+    },
+    "count": {"$sum": 1},
+}
+ACCESS_LOG_SUMMARY_GROUP: Dict[str, Any] = {
+    "_id": {
+        "hour": {"$dateTrunc": {"date": "$time", "unit": "hour"}},
+        "module": "$module",
+    },
+    "count": {"$sum": 1},
+    "ips": {"$addToSet": "$ip"},
+    "logged_in_count": {"$sum": {"$cond": [{"$ifNull": ["$token", False]}, 1, 0]}},
+}
+ACCESS_LOG_SUMMARY_PROJECT: Dict[str, Any] = {
+    "count": 1,
+    "logged_in_count": 1,
+    "unique_ip_count": {"$size": "$ips"},
+}
+
+
+def _ensure_ttl_index(collection, expire_seconds: int) -> None:
+    """创建或更新日志集合的过期索引"""
+    index_info: Optional[Dict] = collection.index_information().get(TTL_INDEX_NAME)
+    if not index_info:
+        collection.create_index(
+            [("time", 1)], name=TTL_INDEX_NAME, expireAfterSeconds=expire_seconds
+        )
+    elif index_info.get("expireAfterSeconds") != expire_seconds:
+        # 已存在的索引不能直接修改选项，需要通过 collMod 命令修改
+        db.command(
+            "collMod",
+            collection.name,
+            index={"name": TTL_INDEX_NAME, "expireAfterSeconds": expire_seconds},
+        )
+
+
+def ensure_log_retention() -> None:
+    """根据配置文件为日志与访问统计集合设置过期索引或固定大小集合"""
+    retention = config.log.retention
+
+    capped_size_mb: int = retention.run_log_capped_size_mb
+    if capped_size_mb > 0:
+        if not run_log_db.options().get("capped"):
+            # 转换后除 _id 外的索引都会被删除
+            db.command(
+                "convertToCapped", run_log_db.name, size=capped_size_mb * 1024 * 1024
+            )
+            run_logger.info(f"已将 run_log 转换为 {capped_size_mb} MB 固定大小集合")
+    else:
+        _ensure_ttl_index(run_log_db, retention.run_log_days * 24 * 3600)
+
+    _ensure_ttl_index(access_log_db, retention.access_log_days * 24 * 3600)
+    _ensure_ttl_index(access_stats_db, retention.access_stats_days * 24 * 3600)
+
+
+def rollup_log(
+    collection,
+    summary_collection,
+    group: Dict[str, Any],
+    project: Optional[Dict[str, Any]] = None,
+) -> int:
+    """将已结束的整点小时内的原始日志汇总为每小时汇总记录
+
+    汇总进度保存在 log_rollup_state 集合中，汇总结果按 _id 合并写入，重复执行不会产生重复数据
+
+    Args:
+        collection (Collection): 原始日志集合
+        summary_collection (Collection): 汇总集合
+        group (Dict[str, Any]): $group 阶段，_id 中必须包含 hour 字段
+        project (Optional[Dict[str, Any]], optional): 汇总后的 $project 阶段. Defaults to None.
+
+    Returns:
+        int: 本次汇总的小时数
+    """
+    state: Optional[Dict] = log_rollup_state_db.find_one({"_id": collection.name})
+    if state:
+        start_time: datetime = state["rolled_up_until"]
+    else:
+        first_record: Optional[Dict] = collection.find_one(sort=[("time", 1)])
+        if not first_record:  # 没有日志数据
+            return 0
+        start_time = first_record["time"].replace(minute=0, second=0, microsecond=0)
+
+    end_time = min(
+        datetime.now().replace(minute=0, second=0, microsecond=0),
+        start_time + MAX_ROLLUP_RANGE,
+    )
+    if end_time <= start_time:  # 当前小时尚未结束
+        return 0
+
+    pipeline: List[Dict[str, Any]] = [
+        {"$match": {"time": {"$gte": start_time, "$lt": end_time}}},
+        {"$group": group},
+    ]
+    if project:
+        pipeline.append({"$project": project})
+    pipeline.append(
+        {
+            "$merge": {
+                "into": summary_collection.name,
+                "on": "_id",
+                "whenMatched": "replace",
+                "whenNotMatched": "insert",
+            }
+        }
+    )
+    collection.aggregate(pipeline)
+
+    log_rollup_state_db.update_one(
+        {"_id": collection.name},
+        {"$set": {"rolled_up_until": end_time}},
+        upsert=True,
+    )
+    return int((end_time - start_time) / timedelta(hours=1))
+
+
+def rollup_log_until_caught_up(
+    collection,
+    summary_collection,
+    group: Dict[str, Any],
+    project: Optional[Dict[str, Any]] = None,
+) -> int:
+    """重复汇总直到所有已结束的整点小时都已汇总
+
+    单次汇总最多处理 MAX_ROLLUP_RANGE 的数据，首次运行或长时间停机后需要多次汇总
+
+    Returns:
+        int: 汇总的总小时数
+    """
+    total_hours = 0
+    while True:
+        hours = rollup_log(collection, summary_collection, group, project)
+        if not hours:
+            return total_hours
+        total_hours += hours
+
+
+def log_retention_job() -> None:
+    # 先汇总到当前小时，再设置过期索引或固定大小集合，保证原始日志被删除前均已汇总
+    # 汇总出现异常时不会执行后续步骤，过期设置在下一次执行时再处理
+    run_log_hours = rollup_log_until_caught_up(
+        run_log_db, run_log_summary_db, RUN_LOG_SUMMARY_GROUP
+    )
+    access_log_hours = rollup_log_until_caught_up(
+        access_log_db,
+        access_log_summary_db,
+        ACCESS_LOG_SUMMARY_GROUP,
+        ACCESS_LOG_SUMMARY_PROJECT,
+    )
+    if run_log_hours or access_log_hours:
+        run_logger.debug(
+            f"已汇总 {run_log_hours} 小时运行日志与 {access_log_hours} 小时访问日志"
+        )
+
+    ensure_log_retention()
+
+
+scheduler = BackgroundScheduler()
+# 每小时执行一次，启动时立即执行一次
+scheduler.add_job(log_retention_job, "cron", minute=5, next_run_time=datetime.now())
@@ -1,7 +1,13 @@
+from ast import AnnAssign, Assign, Constant, Name, parse
 from dataclasses import dataclass
 from importlib import import_module
 from os import listdir
-from typing import Callable, List
+from os import path as os_path
+from threading import Lock
+from time import perf_counter
+from typing import Any, Callable, Dict, List
+
+MANIFEST_KEYS = ("NAME", "DESC", "VISIBILITY")
 
 
 @dataclass
@@ -17,8 +23,12 @@ def get_all_modules(base_path: str) -> List[str]:
     return [x for x in listdir(base_path) if x.endswith(".py")]
 
 
+def _get_import_path(base_path: str, module_name: str) -> str:
+    return f"{base_path.split('/')[-1]}.{module_name}"
+
+
 def get_module_info(base_path: str, module_name: str) -> Module:
-    module_obj = import_module(f"{base_path.split('/')[-1]}.{module_name}")
+    module_obj = import_module(_get_import_path(base_path, module_name))
     page_func: Callable[[], None] = getattr(module_obj, module_name)  # 页面函数名与模块名相同
     page_name: str = getattr(module_obj, "NAME")
     page_desc: str = getattr(module_obj, "DESC")
@@ -33,7 +43,91 @@ def get_module_info(base_path: str, module_name: str) -> Module:
     )
 
 
-def get_all_modules_info(base_path: str) -> List[Module]:
-    return [
-        get_module_info(base_path, x.split(".")[0]) for x in get_all_modules(base_path)
-    ]
+def get_module_manifest(base_path: str, module_name: str) -> Dict[str, Any]:
+    """在不导入模块的情况下，从源码中读取模块的 NAME、DESC 和 VISIBILITY 常量
+
+    Args:
+        base_path (str): 模块所在目录
+        module_name (str): 模块名
+
+    Raises:
+        ValueError: 模块中缺少清单常量，或清单常量不是字面量
+
+    Returns:
+        Dict[str, Any]: 清单常量字典
+    """
+    with open(os_path.join(base_path, f"{module_name}.py"), encoding="utf-8") as f:
+        tree = parse(f.read())
+
+    result: Dict[str, Any] = {}
+    for node in tree.body:
+        if isinstance(node, Assign) and len(node.targets) == 1:
+            target = node.targets[0]
+        elif isinstance(node, AnnAssign):
+            target = node.target
+        else:
+            continue
+
+        if not isinstance(target, Name) or target.id not in MANIFEST_KEYS:
+            continue
+        if not isinstance(node.value, Constant):
+            raise ValueError(f"模块 {module_name} 的 {target.id} 必须为字面量")
+        result[target.id] = node.value.value
+
+    missing_keys = set(MANIFEST_KEYS) - set(result)
+    if missing_keys:
+        raise ValueError(f"模块 {module_name} 缺少清单常量 {', '.join(missing_keys)}")
+    return result
+
+
+def get_lazy_page_func(base_path: str, module_name: str) -> Callable[[], None]:
+    """构建延迟导入的页面函数，模块在页面首次被访问时才会被导入
+
+    Args:
+        base_path (str): 模块所在目录
+        module_name (str): 模块名
+
+    Returns:
+        Callable[[], None]: 页面函数
+    """
+    lock = Lock()
+    loaded_func: List[Callable[[], None]] = []
+
+    def lazy_page_func() -> None:
+        if not loaded_func:
+            with lock:
+                if not loaded_func:  # 其它会话可能已经完成导入
+                    start_time = perf_counter()
+                    module_obj = import_module(_get_import_path(base_path, module_name))
+                    loaded_func.append(getattr(module_obj, module_name))
+
+                    from utils.log import run_logger
+
+                    run_logger.debug(
+                        f"已导入模块 {module_name}，"
+                        f"耗时 {(perf_counter() - start_time) * 1000:.2f} ms"
+                    )
+
+        loaded_func[0]()
+
+    # PyWebIO 使用函数名作为页面名称
+    lazy_page_func.__name__ = module_name
+    lazy_page_func.__qualname__ = module_name
+    return lazy_page_func
+
+
+def get_lazy_module_info(base_path: str, module_name: str) -> Module:
+    manifest: Dict[str, Any] = get_module_manifest(base_path, module_name)
+
+    return Module(
+        page_func_name=module_name,
+        page_func=get_lazy_page_func(base_path, module_name),
+        page_name=manifest["NAME"],
+        page_desc=manifest["DESC"],
+        page_visibility=manifest["VISIBILITY"],
+    )
+
+
+def get_all_modules_info(base_path: str, lazy: bool = False) -> List[Module]:
+    info_func = get_lazy_module_info if lazy else get_module_info
+    return [info_func(base_path, x.split(".")[0]) for x in get_all_modules(base_path)]
@@ -1,4 +1,3 @@
-from time import sleep
 from typing import Any, Dict, Optional
 
 from pywebio.session import eval_js, info, run_js
@@ -22,19 +21,6 @@ def get_url_to_module(module_name: str, params: Optional[Dict[str, Any]] = None)
     return result
 
 
-def get_chart_width(in_tab: bool = False) -> int:
-    # 880 为宽度上限
-    result: int = min(eval_js("document.body.clientWidth"), 880)
-    # Tab 两侧边距共 47
-    if in_tab:
-        result -= 47
-    return result
-
-
-def get_chart_height() -> int:
-    return int(get_chart_width() / 2)
-
-
 def get_token() -> Optional[str]:
     cookie_str: str = eval_js("document.cookie")
     if not cookie_str:  # Cookie 字符串为空
@@ -49,21 +35,16 @@ def set_token(value: str) -> None:
 
 
 def jump_to(url: str, delay: int = 0) -> None:
-    if delay:
-        sleep(delay)
-    run_js(f"window.location.href = '{url}'")
+    # 在浏览器中延迟执行，不阻塞会话线程
+    run_js(f"setTimeout(() => {{ window.location.href = '{url}' }}, {delay * 1000})")
 
 
 def reload(delay: int = 0) -> None:
-    if delay:
-        sleep(delay)
-    run_js("location.reload()")
+    run_js(f"setTimeout(() => {{ location.reload() }}, {delay * 1000})")
 
 
 def close_page(delay: int = 0) -> None:
-    if delay:
-        sleep(delay)
-    run_js("window.close()")
+    run_js(f"setTimeout(() => {{ window.close() }}, {delay * 1000})")
 
 
 def get_url_params() -> Dict[str, str]:
@@ -0,0 +1,63 @@
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+from bson import ObjectId
+
+# 键集分页游标，由排序字段值与记录 _id 组成
+Cursor = Tuple[Any, str]
+
+
+def get_keyset_filter(
+    sort_field: str, direction: Literal[1, -1], cursor: Optional[Cursor]
+) -> Dict[str, Any]:
+    """获取键集分页的过滤条件，配合 (排序字段, _id) 复合索引使用时，每页的查询成本与页码无关
+
+    Args:
+        sort_field (str): 排序字段
+        direction (Literal[1, -1]): 排序方向，1 为升序，-1 为降序
+        cursor (Optional[Cursor]): 上一页最后一条记录的游标，为 None 时返回第一页
+
+    Returns:
+        Dict[str, Any]: 过滤条件
+    """
+    if not cursor:
+        return {}
+
+    value, id = cursor
+    operator: str = "$gt" if direction == 1 else "$lt"
+    return {
+        "$or": [
+            {sort_field: {operator: value}},
+            {sort_field: value, "_id": {operator: ObjectId(id)}},
+        ]
+    }
+
+
+def get_keyset_sort(
+    sort_field: str, direction: Literal[1, -1]
+) -> List[Tuple[str, int]]:
+    return [(sort_field, direction), ("_id", direction)]
+
+
+def get_next_cursor(
+    db_data_list: List[Dict], sort_field: str, limit: int
+) -> Optional[Cursor]:
+    """获取下一页的游标，查询时需要多取一条记录用于判断是否还有下一页
+
+    该函数会移除多取的记录
+
+    Args:
+        db_data_list (List[Dict]): 查询结果，长度最多为 limit + 1
+        sort_field (str): 排序字段，支持点号分隔的嵌套字段
+        limit (int): 每页数量
+
+    Returns:
+        Optional[Cursor]: 下一页的游标，没有下一页时为 None
+    """
+    if len(db_data_list) <= limit:
+        return None
+
+    del db_data_list[limit:]
+    last_item: Any = db_data_list[-1]
+    for key in sort_field.split("."):
+        last_item = last_item[key]
+    return (last_item, str(db_data_list[-1]["_id"]))
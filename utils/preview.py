@@ -0,0 +1,106 @@
+from json import dumps
+from typing import Any, Dict, List, Optional
+
+from pywebio.session import local, run_js
+
+# 输入停止后等待的毫秒数，之后再计算预览
+PREVIEW_DEBOUNCE_MS = 200
+
+# 预览运行时，每个会话只注入一次
+# 输入框变化时在浏览器中计算预览结果并更新页面，不与服务器通信
+# 计算函数返回的对象可包含以下字段：
+#   values：需要更新值的输入框，{名称: 值}
+#   help：需要更新帮助文本的输入框，{名称: 文本}
+#   show / hide：需要显示或隐藏的 Scope 名称列表
+#   hints：展示在提示区域的提示列表，[{text: 文本, type: "warning" | "success"}]
+PREVIEW_RUNTIME_JS = """
+(function () {
+    if (window.FTNPreview) return;
+
+    function getInput(name) {
+        return $("[name='" + name + "']");
+    }
+
+    function apply(result, hintScope) {
+        Object.keys(result.values || {}).forEach(function (name) {
+            getInput(name).val(result.values[name]);
+        });
+        Object.keys(result.help || {}).forEach(function (name) {
+            getInput(name).closest(".form-group").find(".form-text")
+                .text(result.help[name]);
+        });
+        (result.show || []).forEach(function (scope) {
+            $("#pywebio-scope-" + scope).show();
+        });
+        (result.hide || []).forEach(function (scope) {
+            $("#pywebio-scope-" + scope).hide();
+        });
+        if (hintScope) {
+            var container = $("#pywebio-scope-" + hintScope).empty();
+            (result.hints || []).forEach(function (hint) {
+                $("<div>").addClass("alert alert-" + (hint.type || "warning"))
+                    .text(hint.text).appendTo(container);
+            });
+        }
+    }
+
+    function bind(spec, compute) {
+        var timer = null;
+        function update() {
+            var values = {};
+            spec.watch.forEach(function (name) {
+                values[name] = getInput(name).val();
+            });
+            apply(compute(values, spec.params), spec.hint_scope);
+        }
+        spec.watch.forEach(function (name) {
+            getInput(name).on("input change", function () {
+                clearTimeout(timer);
+                timer = setTimeout(update, spec.delay);
+            });
+        });
+        update();
+    }
+
+    window.FTNPreview = {bind: bind};
+})();
+"""
+
+
+def _inject_preview_runtime() -> None:
+    """为当前会话注入预览运行时，同一会话中只注入一次"""
+    if local.preview_runtime_injected:
+        return
+
+    run_js(PREVIEW_RUNTIME_JS)
+    local.preview_runtime_injected = True
+
+
+def bind_live_preview(
+    watch: List[str],
+    compute_js: str,
+    params: Optional[Dict[str, Any]] = None,
+    hint_scope: Optional[str] = None,
+    delay: int = PREVIEW_DEBOUNCE_MS,
+) -> None:
+    """在浏览器中监听输入框变化，防抖后计算预览结果并更新页面
+
+    预览所需的数据通过 params 在绑定时一次性传入，输入过程中不会触发服务器回调，
+    提交时仍需在服务器端进行校验
+
+    Args:
+        watch (List[str]): 监听的 pin 名称，其值以字符串形式传入计算函数
+        compute_js (str): JavaScript 计算函数，形如 `function (values, params) {...}`
+        params (Optional[Dict[str, Any]], optional): 传入计算函数的参数. Defaults to None.
+        hint_scope (Optional[str], optional): 展示提示的 Scope 名称. Defaults to None.
+        delay (int, optional): 防抖毫秒数. Defaults to PREVIEW_DEBOUNCE_MS.
+    """
+    _inject_preview_runtime()
+
+    spec = {
+        "watch": watch,
+        "params": params or {},
+        "hint_scope": hint_scope,
+        "delay": delay,
+    }
+    run_js(f"window.FTNPreview.bind({dumps(spec, ensure_ascii=False)}, {compute_js})")
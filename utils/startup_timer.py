@@ -0,0 +1,43 @@
+from time import perf_counter
+from typing import List, Tuple
+
+
+class StartupTimer:
+    """记录启动过程中各阶段的耗时，输出格式参考 `python -X importtime`
+
+    计时从该模块被导入时开始，因此应在入口文件中最先导入
+    """
+
+    def __init__(self) -> None:
+        self._start_time: float = perf_counter()
+        self._last_mark_time: float = self._start_time
+        self._phases: List[Tuple[str, float]] = []
+
+    def mark(self, phase_name: str) -> None:
+        """标记一个阶段结束，该阶段耗时为距上一次标记的时间
+
+        Args:
+            phase_name (str): 阶段名称
+        """
+        now_time = perf_counter()
+        self._phases.append((phase_name, now_time - self._last_mark_time))
+        self._last_mark_time = now_time
+
+    def report(self) -> List[str]:
+        """生成启动耗时报告
+
+        Returns:
+            List[str]: 报告行列表，每行包含阶段耗时、累计耗时与阶段名称
+        """
+        result: List[str] = ["startup time: self [ms] | cumulative | phase"]
+        cumulative: float = 0
+        for phase_name, duration in self._phases:
+            cumulative += duration
+            result.append(
+                f"startup time: {duration * 1000:9.2f} | "
+                f"{cumulative * 1000:10.2f} | {phase_name}"
+            )
+        return result
+
+
+startup_timer = StartupTimer()
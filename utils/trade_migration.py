@@ -0,0 +1,226 @@
+"""交易数据时序集合迁移工具
+
+在项目根目录下运行：
+
+    python -m utils.trade_migration migrate           # 将 trade_data 复制到时序集合
+    python -m utils.trade_migration migrate --resume  # 只复制上次迁移之后写入的交易记录
+    python -m utils.trade_migration verify            # 校验两个集合的记录数与交易量、交易额之和
+    python -m utils.trade_migration benchmark         # 对比两种存储方式下数据概览聚合的耗时
+
+迁移步骤：
+
+1. 服务运行时执行 migrate，复制已有的交易记录
+2. 停止服务，执行 migrate --resume，复制第一步期间写入的交易记录并校验
+3. 将配置文件中的 `db.enable_trade_timeseries` 设为 `true` 并启动服务
+
+服务运行时写入的交易记录只有在停止服务后执行 --resume 才能完整复制，
+校验不通过时不应切换存储方式
+"""
+from argparse import ArgumentParser
+from datetime import datetime, timedelta
+from statistics import median
+from time import perf_counter
+from typing import Any, Dict, List
+
+from utils.config import config
+from utils.db import (
+    TRADE_TIMESERIES_COLLECTION_NAME,
+    create_trade_timeseries_collection,
+    db,
+)
+
+SOURCE_COLLECTION_NAME = "trade_data"
+
+
+def migrate(batch_size: int, drop: bool, resume: bool) -> int:
+    """以流式批量的方式将交易数据按 _id 顺序复制到时序集合
+
+    交易记录的 _id 随写入时间递增，按 _id 顺序复制后，
+    源集合中 _id 大于时序集合中最大 _id 的记录即为尚未复制的记录
+
+    Args:
+        batch_size (int): 每批写入的记录数
+        drop (bool): 是否先删除已存在的时序集合
+        resume (bool): 是否只复制时序集合中最大 _id 之后的记录
+
+    Raises:
+        RuntimeError: 服务已使用时序集合，或时序集合中已有数据且未指定 --resume
+
+    Returns:
+        int: 复制的记录数
+    """
+    if config.db.enable_trade_timeseries:
+        # 此时新交易直接写入时序集合，再次迁移会产生重复记录
+        raise RuntimeError("配置中已启用时序集合，不能再次迁移")
+
+    if drop:
+        db.drop_collection(TRADE_TIMESERIES_COLLECTION_NAME)
+    target = create_trade_timeseries_collection()
+
+    filter: Dict[str, Any] = {}
+    if resume:
+        last_item = next(target.find({}, {"_id": 1}).sort("_id", -1).limit(1), None)
+        if last_item:
+            filter["_id"] = {"$gt": last_item["_id"]}
+    elif target.estimated_document_count() != 0:
+        raise RuntimeError(
+            "时序集合中已有数据，如需复制之后写入的记录请使用 --resume 参数，"
+            "如需重新迁移请使用 --drop 参数"
+        )
+
+    copied_count = 0
+    batch: List[Dict] = []
+    for item in (
+        db[SOURCE_COLLECTION_NAME].find(filter).sort("_id", 1).batch_size(batch_size)
+    ):
+        batch.append(item)
+        if len(batch) >= batch_size:
+            # 有序写入，中断时已写入的记录仍是按 _id 排列的前缀，可以使用 --resume 继续
+            target.insert_many(batch, ordered=True)
+            copied_count += len(batch)
+            batch.clear()
+            print(f"已复制 {copied_count} 条交易记录")
+    if batch:
+        target.insert_many(batch, ordered=True)
+        copied_count += len(batch)
+
+    print(f"迁移完成，共复制 {copied_count} 条交易记录")
+    return copied_count
+
+
+def _get_summary(collection_name: str) -> Dict[str, Dict[str, Any]]:
+    return {
+        item["_id"]: item
+        for item in db[collection_name].aggregate(
+            [
+                {
+                    "$group": {
+                        "_id": "$trade_type",
+                        "count": {"$sum": 1},
+                        "trade_amount": {"$sum": "$trade_amount"},
+                        "total_price": {"$sum": "$total_price"},
+                    }
+                }
+            ]
+        )
+    }
+
+
+def verify() -> bool:
+    """校验两个集合中各交易类型的记录数、交易量之和与交易额之和是否一致
+
+    Returns:
+        bool: 是否一致
+    """
+    source_summary = _get_summary(SOURCE_COLLECTION_NAME)
+    target_summary = _get_summary(TRADE_TIMESERIES_COLLECTION_NAME)
+
+    result = True
+    for trade_type in sorted(set(source_summary) | set(target_summary)):
+        source = source_summary.get(trade_type, {})
+        target = target_summary.get(trade_type, {})
+        for key in ("count", "trade_amount", "total_price"):
+            source_value = source.get(key, 0)
+            target_value = target.get(key, 0)
+            # 交易额为浮点数，累加顺序不同可能产生微小误差
+            is_equal = abs(source_value - target_value) < 1e-6
+            result = result and is_equal
+            print(
+                f"[{'OK' if is_equal else 'MISMATCH'}] {trade_type} {key}："
+                f"{source_value} / {target_value}"
+            )
+    return result
+
+
+def benchmark(repeat: int) -> None:
+    """对比普通集合与时序集合上数据概览聚合管道的耗时
+
+    Args:
+        repeat (int): 每个聚合管道的执行次数
+    """
+    from data.overview import get_per_time_unit_pipeline
+
+    cases: List[Dict[str, Any]] = []
+    for trade_type in ("buy", "sell"):
+        cases.extend(
+            [
+                {
+                    "name": f"{trade_type} 24 小时每小时均价",
+                    "args": (trade_type, timedelta(hours=24), "hour", "avg_price"),
+                    "accumulator": {"$avg": "$unit_price"},
+                },
+                {
+                    "name": f"{trade_type} 30 天每天交易量",
+                    "args": (trade_type, timedelta(days=30), "day", "traded_amount"),
+                    "accumulator": {"$sum": "$trade_amount"},
+                },
+                {
+                    "name": f"{trade_type} 365 天每天均价",
+                    "args": (trade_type, timedelta(days=365), "day", "avg_price"),
+                    "accumulator": {"$avg": "$unit_price"},
+                },
+            ]
+        )
+
+    collection_names: Dict[str, str] = {
+        "collection": SOURCE_COLLECTION_NAME,
+        "timeseries": TRADE_TIMESERIES_COLLECTION_NAME,
+    }
+    print(f"{'聚合':<24}{'普通集合 (ms)':>16}{'时序集合 (ms)':>16}")
+    for case in cases:
+        trade_type, time_range, unit, result_field = case["args"]
+        pipeline = get_per_time_unit_pipeline(
+            trade_type,
+            datetime.now() - time_range,
+            unit,
+            result_field,
+            case["accumulator"],
+        )
+
+        result: Dict[str, float] = {}
+        for layout, collection_name in collection_names.items():
+            durations: List[float] = []
+            for _ in range(repeat):
+                start_time = perf_counter()
+                list(db[collection_name].aggregate(pipeline))
+                durations.append((perf_counter() - start_time) * 1000)
+            result[layout] = median(durations)
+
+        print(
+            f"{case['name']:<24}"
+            f"{result['collection']:>16.2f}{result['timeseries']:>16.2f}"
+        )
+
+
+def main() -> None:
+    parser = ArgumentParser(description="交易数据时序集合迁移工具")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = subparsers.add_parser("migrate", help="将交易数据复制到时序集合")
+    migrate_parser.add_argument("--batch-size", type=int, default=1000)
+    migrate_parser.add_argument(
+        "--drop", action="store_true", help="先删除已存在的时序集合"
+    )
+    migrate_parser.add_argument(
+        "--resume", action="store_true", help="只复制上次迁移之后写入的交易记录"
+    )
+
+    subparsers.add_parser("verify", help="校验迁移结果")
+
+    benchmark_parser = subparsers.add_parser("benchmark", help="对比聚合耗时")
+    benchmark_parser.add_argument("--repeat", type=int, default=10)
+
+    args = parser.parse_args()
+    if args.command == "migrate":
+        migrate(args.batch_size, args.drop, args.resume)
+        if not verify():
+            raise SystemExit(1)
+    elif args.command == "verify":
+        if not verify():
+            raise SystemExit(1)
+    elif args.command == "benchmark":
+        benchmark(args.repeat)
+
+
+if __name__ == "__main__":
+    main()
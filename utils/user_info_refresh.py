@@ -0,0 +1,102 @@
+from time import sleep
+from typing import Dict, List, Optional
+
+from apscheduler.schedulers.background import BackgroundScheduler
+from bson import ObjectId
+
+from data.order import OrderStatus
+from data.user import User
+from utils.config import config
+from utils.db import order_data_db, user_data_db
+from utils.exceptions import (
+    JianshuAPIError,
+    UIDNotExistError,
+    UserURLIlliegalError,
+)
+from utils.jianshu import jianshu_client
+from utils.log import run_logger
+
+
+def backfill_orders_user_info() -> int:
+    """为缺少冗余简书账号信息的交易中意向单补全发布者信息
+
+    发布者已不存在的意向单无法补全，跳过并记录警告
+
+    Returns:
+        int: 补全的意向单数量
+    """
+    user_ids: List[str] = order_data_db.distinct(
+        "user.id",
+        {"status": OrderStatus.TREADING, "user.jianshu": {"$exists": False}},
+    )
+    updated_count = 0
+    for user_id in user_ids:
+        try:
+            user = User.from_id(user_id)
+        except UIDNotExistError:
+            run_logger.warning(f"意向单发布者 {user_id} 不存在，跳过补全")
+            continue
+        updated_count += user.sync_to_active_orders()
+    return updated_count
+
+
+def refresh_jianshu_names(batch_size: int, request_interval: float) -> int:
+    """分批刷新已绑定简书账号用户的简书昵称，昵称变化时同步到交易中的意向单
+
+    每次请求间隔固定时间，避免触发简书接口的频率限制
+
+    Args:
+        batch_size (int): 每批读取的用户数量
+        request_interval (float): 两次请求之间的间隔秒数
+
+    Returns:
+        int: 昵称发生变化的用户数量
+    """
+    changed_count = 0
+    last_id: Optional[ObjectId] = None
+    while True:
+        filter: Dict = {"jianshu.url": {"$ne": None}}
+        if last_id:
+            filter["_id"] = {"$gt": last_id}
+        db_data_list: List[Dict] = list(
+            user_data_db.find(filter).sort([("_id", 1)]).limit(batch_size)
+        )
+        if not db_data_list:
+            break
+        last_id = db_data_list[-1]["_id"]
+
+        for db_data in db_data_list:
+            user = User.from_db_data(db_data)
+            try:
+                jianshu_name = jianshu_client.get_user_name(
+                    user.jianshu_url, use_cache=False
+                )
+            except (JianshuAPIError, UserURLIlliegalError) as e:
+                run_logger.warning(f"刷新用户 {user.id} 的简书昵称失败：{e}")
+            else:
+                if jianshu_name != user.jianshu_name:
+                    user.jianshu_name = jianshu_name
+                    user.sync()
+                    user.sync_to_active_orders()
+                    changed_count += 1
+            sleep(request_interval)
+
+    return changed_count
+
+
+def user_info_refresh_job() -> None:
+    backfilled_count = backfill_orders_user_info()
+    if backfilled_count:
+        run_logger.info(f"已为 {backfilled_count} 条意向单补全发布者简书账号信息")
+
+    changed_count = refresh_jianshu_names(
+        config.jianshu.refresh_batch_size,
+        config.jianshu.refresh_request_interval_seconds,
+    )
+    run_logger.info(f"简书昵称刷新完成，{changed_count} 位用户的昵称发生变化")
+
+
+scheduler = BackgroundScheduler()
+# 启动时立即补全一次，之后每天凌晨 3 点执行一次完整刷新
+scheduler.add_job(backfill_orders_user_info, "date")
+scheduler.add_job(user_info_refresh_job, "cron", hour=3)
@@ -0,0 +1,29 @@
+"""用户交易统计重建工具
+
+在项目根目录下运行：
+
+    python -m utils.user_stats_rebuild
+
+重建会替换整个统计集合，期间产生的累加会被丢弃，需先停止服务再执行
+"""
+from argparse import ArgumentParser
+from time import perf_counter
+
+from data.user_stats import rebuild_user_stats
+from utils.db import user_stats_db
+
+
+def main() -> None:
+    parser = ArgumentParser(description="根据历史数据重新生成全部用户的交易统计，需先停止服务")
+    parser.parse_args()
+
+    start = perf_counter()
+    rebuild_user_stats()
+    print(
+        f"已重新生成 {user_stats_db.estimated_document_count()} 条用户统计数据，"
+        f"耗时 {perf_counter() - start:.1f} 秒"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+from threading import Lock, Thread
+from time import sleep
+from typing import Any, Dict, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from utils.config import config
+from utils.log import run_logger
+
+# (集合名, _id) -> {字段名: 值}
+PendingWrites = Dict[Tuple[str, ObjectId], Dict[str, Any]]
+
+
+class WriteBehindBuffer:
+    """延迟写入缓冲区
+
+    对同一条记录同一字段的多次写入只保留最新值，并定期通过一次无序批量写入刷新到数据库，
+    适用于最后活跃时间等写入频繁、但单次写入价值较低的字段
+    """
+
+    def __init__(self, save_interval: int) -> None:
+        self._save_interval = save_interval
+        self._lock = Lock()
+        self._pending: PendingWrites = {}
+        self._collections: Dict[str, Any] = {}
+        self._stats: Dict[str, int] = {
+            "submitted": 0,  # 提交的写入次数
+            "coalesced": 0,  # 被合并的写入次数
+            "written": 0,  # 实际写入数据库的更新次数
+            "flushes": 0,  # 批量写入次数
+        }
+        self._save_thread = Thread(target=self._save_to_db, daemon=True)
+
+        self._save_thread.start()
+
+    def set(self, collection, object_id: ObjectId, field: str, value: Any) -> None:
+        """提交一次字段写入，写入将在下一次刷新时生效
+
+        Args:
+            collection (Collection): 数据库集合
+            object_id (ObjectId): 记录 _id
+            field (str): 字段名，支持点号分隔的嵌套字段
+            value (Any): 字段值
+        """
+        with self._lock:
+            self._collections[collection.name] = collection
+            fields = self._pending.setdefault((collection.name, object_id), {})
+            if field in fields:
+                self._stats["coalesced"] += 1
+            fields[field] = value
+            self._stats["submitted"] += 1
+
+    def _save_to_db(self) -> None:
+        while True:
+            sleep(self._save_interval)
+            try:
+                self.force_refresh()
+            except Exception as e:
+                # 写入失败的数据已放回缓冲区，在下一次刷新时重试
+                run_logger.error(f"延迟写入缓冲区刷新失败：{e!r}")
+
+    def _requeue(self, pending: PendingWrites) -> None:
+        """将写入失败的数据放回缓冲区，期间提交的新值优先于放回的旧值"""
+        with self._lock:
+            for key, fields in pending.items():
+                self._pending[key] = {**fields, **self._pending.get(key, {})}
+
+    def force_refresh(self) -> None:
+        """将缓冲区中的数据写入数据库
+
+        写入失败的集合对应的数据会被放回缓冲区，所有集合写入完成后抛出第一个异常
+
+        Raises:
+            Exception: 批量写入失败
+        """
+        with self._lock:
+            if not self._pending:  # 没有要保存的数据
+                return
+            pending = self._pending
+            self._pending = {}
+
+        pending_by_collection: Dict[str, PendingWrites] = {}
+        for key, fields in pending.items():
+            pending_by_collection.setdefault(key[0], {})[key] = fields
+
+        written_count = 0
+        error: Optional[Exception] = None
+        for collection_name, collection_pending in pending_by_collection.items():
+            operation_list = [
+                UpdateOne({"_id": object_id}, {"$set": fields})
+                for (_, object_id), fields in collection_pending.items()
+            ]
+            try:
+                self._collections[collection_name].bulk_write(
+                    operation_list, ordered=False
+                )
+            except Exception as e:
+                # 字段更新可重复执行，部分写入成功时整批放回也不会产生错误数据
+                self._requeue(collection_pending)
+                error = error or e
+                continue
+            written_count += len(collection_pending)
+
+        with self._lock:
+            self._stats["written"] += written_count
+            self._stats["flushes"] += 1
+
+        if error:
+            raise error
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+
+write_behind_buffer: WriteBehindBuffer = WriteBehindBuffer(
+    save_interval=config.db.write_behind_save_interval,
+)
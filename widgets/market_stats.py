@@ -0,0 +1,45 @@
+from typing import Literal
+
+from pywebio.output import put_collapse, put_html, put_markdown, put_table
+
+from data.market_stats import get_market_stats
+
+
+def put_market_stats(trade_type: Literal["buy", "sell"]):
+    # 统计数据有缓存，重复渲染不会产生额外查询
+    stats = get_market_stats(trade_type)
+
+    if stats["count"]:
+        summary_lines = [
+            f"24 小时成交 {stats['count']} 笔，共 {stats['trade_amount']} 简书贝",
+            f"中位数：{stats['median']}，P10 / P90：{stats['p10']} / {stats['p90']}",
+            f"平均值：{stats['avg']}，标准差：{stats['std_dev']}",
+        ]
+        if not stats["reliable"]:
+            summary_lines.append("成交较少，以上数据仅供参考")
+    else:
+        summary_lines = ["24 小时内暂无成交"]
+
+    max_count = max(item["count"] for item in stats["histogram"]) or 1
+    return put_collapse(
+        "市场价格统计",
+        [
+            # 每行单独成段，否则 Markdown 会将相邻的行合并为一段
+            put_markdown("\n\n".join(summary_lines)),
+            put_markdown("**交易中意向单单价分布**"),
+            put_table(
+                [
+                    [
+                        f"{item['min']:.2f} - {item['max']:.2f}",
+                        item["count"],
+                        put_html(
+                            '<div style="height: 10px; background-color: #28a745; '
+                            f'width: {round(item["count"] / max_count * 100)}%;"></div>'
+                        ),
+                    ]
+                    for item in stats["histogram"]
+                ],
+                header=["单价", "数量", ""],
+            ),
+        ],
+    )
@@ -32,7 +32,8 @@ def put_order_item(order: Order, current_user: Optional[User] = None):
 
     # 受限于调用者，不能保证获取到当前用户对象
     # 如无法获取，传入默认值 None，使“我的”比较横为假
-    order_user: User = order.user
+    # 发布者信息均来自意向单中冗余存储的字段，不查询用户数据
+    is_mine: bool = current_user is not None and order.user_id == current_user.id
 
     return put_widget(
         tpl,
@@ -46,11 +47,11 @@ def put_order_item(order: Order, current_user: Optional[User] = None):
                 put_row(
                     [
                         put_badge("我的", color="success")
-                        if order_user == current_user
+                        if is_mine
                         else put_markdown(""),
                         None,
                         put_badge("未绑定简书", color="warning")
-                        if not order_user.is_jianshu_binded
+                        if not order.is_user_jianshu_binded
                         else put_markdown(""),
                         None,
                     ],
@@ -72,8 +73,8 @@ def put_order_item(order: Order, current_user: Optional[User] = None):
             ],
             "links": [
                 put_markdown(
-                    "简书个人主页：" + link("点击跳转", order_user.jianshu_url, new_window=True)
-                    if order_user.is_jianshu_binded
+                    "简书个人主页：" + link("点击跳转", order.user_jianshu_url, new_window=True)
+                    if order.is_user_jianshu_binded
                     else "",
                     sanitize=False,
                 ),
@@ -81,10 +82,10 @@ def put_order_item(order: Order, current_user: Optional[User] = None):
                     "一键跳转简书 App："
                     + link(
                         "点击跳转",
-                        user_URL_to_URL_scheme(order_user.jianshu_url),
+                        user_URL_to_URL_scheme(order.user_jianshu_url),
                         new_window=False,
                     )
-                    if order_user.is_jianshu_binded and is_Android()
+                    if order.is_user_jianshu_binded and is_Android()
                     else "",
                     sanitize=False,
                 ),
@@ -117,7 +118,9 @@ def put_order_detail(order: Order) -> None:
     ),
 
 
-def put_finished_order_item(order: Order) -> None:
+def put_finished_order_item(
+    order: Order, scope: Optional[str] = None, position: int = -1
+):
     tpl = """
     <div class="card" style="padding: 15px;">
         <p>发布时间：{{publish_time}}</p>
@@ -136,4 +139,6 @@ def put_finished_order_item(order: Order) -> None:
             "total_price": order.total_price,
             "total_amount": order.total_amount,
         },
+        scope=scope,
+        position=position,
     )